@@ -0,0 +1,222 @@
+"""Offline throughput benchmark of ``process_cvs``.
+
+The real collector runs against ``FakeGmailService`` and ``FakeLLMClient``
+(see ``fakes.py``), so no network, Gmail account or API key is needed. Each
+mailbox size runs in its own process with a fresh data directory, and the
+report (emails/s, latency percentiles per pipeline stage, peak memory,
+storage written) is saved under ``benchmarks/results/`` to be compared
+across versions::
+
+    cd backend
+    python -m benchmarks.bench_collector --sizes 100 1000 10000 --llm-latency 0.8
+    python -m benchmarks.bench_collector --compare results/a.json results/b.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import functools
+import subprocess
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+JOB_TITLE = "Data Analyst"
+
+
+def directory_sizes(root):
+    """Bytes and file count under each top-level folder of ``root``."""
+    sizes = {}
+    for top in sorted(os.listdir(root)):
+        total = files = 0
+        for folder, _, names in os.walk(os.path.join(root, top)):
+            for name in names:
+                total += os.path.getsize(os.path.join(folder, name))
+                files += 1
+        sizes[top] = {"bytes": total, "files": files}
+    return sizes
+
+
+def _real_extraction_available():
+    try:
+        import fitz  # noqa: F401
+        import docx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_once(size, config):
+    """One ``process_cvs`` run over a fake mailbox of ``size`` messages, in
+    this process. Expects ``EMAIL_COLLECTOR_DATA_DIR`` to point to an empty
+    directory."""
+    from benchmarks.fakes import FakeGmailService, FakeLLMClient, fake_extract
+    from email_collector import llm_client, processor
+    from email_collector.text_extract import ExtractionService
+
+    llm = FakeLLMClient(latency=config["llm_latency"], jitter=config["llm_jitter"])
+    llm_client._client = llm
+    if config["extraction"] == "fake":
+        processor.ExtractionService = functools.partial(ExtractionService, worker=fake_extract)
+
+    service = FakeGmailService(size, job_title=JOB_TITLE, latency=config["gmail_latency"],
+                               duplicate_ratio=config["duplicate_ratio"])
+
+    start = time.perf_counter()
+    result = processor.process_cvs(
+        target_job_title=JOB_TITLE, max_emails=size, verbose=False, service_factory=lambda: service,
+        llm_batch_size=config["llm_batch_size"], persist_attachments=config["persist_attachments"],
+    )
+    elapsed = time.perf_counter() - start
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "messages": size,
+        "seconds": elapsed,
+        "emails_per_second": size / elapsed if elapsed else None,
+        "counters": result["metrics"]["counters"],
+        # list / fetch / triage spans, then the pipeline stages
+        "stages": result["metrics"]["stages"],
+        "gmail_calls": service.calls,
+        "llm_calls": llm.calls,
+        "peak_rss_bytes": self_usage.ru_maxrss * unit,
+        "peak_rss_children_bytes": children_usage.ru_maxrss * unit,
+        "storage": directory_sizes(os.environ["EMAIL_COLLECTOR_DATA_DIR"]),
+    }
+
+
+def run_isolated(size, config):
+    """``run_once`` in a child process with its own data directory."""
+    data_dir = tempfile.mkdtemp(prefix="bench_collector_")
+    output = os.path.join(data_dir, "_report.json")
+    env = dict(os.environ, EMAIL_COLLECTOR_DATA_DIR=os.path.join(data_dir, "data"))
+    os.makedirs(env["EMAIL_COLLECTOR_DATA_DIR"])
+    command = [sys.executable, "-m", "benchmarks.bench_collector", "--child", str(size), "--output", output,
+               "--config", json.dumps(config)]
+    try:
+        # the collector reports progress on stdout: keep it out of the measurements
+        subprocess.run(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, check=True)
+        with open(output, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_run(run):
+    lines = [f"{run['messages']:>6} emails  {run['seconds']:8.2f}s  {run['emails_per_second']:8.1f} emails/s  "
+             f"RSS {run['peak_rss_bytes'] / 2**20:.0f} Mo (+{run['peak_rss_children_bytes'] / 2**20:.0f} Mo workers)  "
+             f"stockage {sum(s['bytes'] for s in run['storage'].values()) / 2**20:.1f} Mo"]
+    for stage, stats in run["stages"].items():
+        lines.append(f"        {stage:<10} n={stats['count']:<6} p50={stats['p50'] * 1000:8.1f}ms  "
+                     f"p90={stats['p90'] * 1000:8.1f}ms  p99={stats['p99'] * 1000:8.1f}ms")
+    return "\n".join(lines)
+
+
+def compare(old, new):
+    """Lines comparing two saved reports, size by size."""
+    lines = [f"{old.get('label')} ({old.get('git_revision')}) -> {new.get('label')} ({new.get('git_revision')})"]
+    old_runs = {run["messages"]: run for run in old["runs"]}
+    for run in new["runs"]:
+        before = old_runs.get(run["messages"])
+        if before is None:
+            continue
+        change = (run["emails_per_second"] / before["emails_per_second"] - 1) * 100
+        lines.append(f"{run['messages']:>6} emails  {before['emails_per_second']:8.1f} -> "
+                     f"{run['emails_per_second']:8.1f} emails/s ({change:+.1f}%)  "
+                     f"RSS {before['peak_rss_bytes'] / 2**20:.0f} -> {run['peak_rss_bytes'] / 2**20:.0f} Mo")
+        for stage, stats in run["stages"].items():
+            if stage in before["stages"]:
+                lines.append(f"        {stage:<10} p50 {before['stages'][stage]['p50'] * 1000:8.1f} -> "
+                             f"{stats['p50'] * 1000:8.1f}ms  p99 {before['stages'][stage]['p99'] * 1000:8.1f} -> "
+                             f"{stats['p99'] * 1000:8.1f}ms")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="secondes par appel LLM")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--gmail-latency", type=float, default=0.05, help="secondes par appel Gmail")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--llm-batch-size", type=int, default=1)
+    parser.add_argument("--persist-attachments", choices=["sync", "async", "none"], default="sync")
+    parser.add_argument("--extraction", choices=["auto", "real", "fake"], default="auto",
+                        help="'real' needs PyMuPDF and python-docx")
+    parser.add_argument("--label", help="name of the saved report (git revision by default)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        report = run_once(args.child, json.loads(args.config))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        return 0
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                reports.append(json.load(f))
+        print("\n".join(compare(*reports)))
+        return 0
+
+    extraction = args.extraction
+    if extraction == "auto":
+        extraction = "real" if _real_extraction_available() else "fake"
+    config = {
+        "llm_latency": args.llm_latency,
+        "llm_jitter": args.llm_jitter,
+        "gmail_latency": args.gmail_latency,
+        "duplicate_ratio": args.duplicate_ratio,
+        "llm_batch_size": args.llm_batch_size,
+        "persist_attachments": args.persist_attachments,
+        "extraction": extraction,
+    }
+    revision = _git_revision()
+    report = {
+        "label": args.label or revision,
+        "git_revision": revision,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "runs": [],
+    }
+    for size in args.sizes:
+        run = run_isolated(size, config)
+        report["runs"].append(run)
+        print(format_run(run), flush=True)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}_{report['label'] or 'local'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Résultats: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""Offline stand-ins used by the collector benchmarks.
+
+``FakeGmailService`` serves a synthetic mailbox through the subset of the
+Gmail API the collector uses (paged ``messages.list``, batched
+``messages.get``, ``attachments.get``, ``getProfile``), with real PDF and
+DOCX attachments built by ``make_pdf`` / ``make_docx``. ``FakeLLMClient``
+mimics the Groq chat client with a configurable latency.
+"""
+
+import io
+import re
+import json
+import time
+import base64
+import random
+import zipfile
+import threading
+from xml.sax.saxutils import escape
+
+
+FIRST_NAMES = ["Alice", "Bruno", "Chloe", "David", "Emma", "Farid", "Gaelle", "Hugo", "Ines", "Jules"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau"]
+SKILLS = ["Python", "SQL", "Excel", "Power BI", "Tableau", "R", "SAS", "Spark", "Airflow", "dbt", "Docker", "Git"]
+OTHER_JOBS = ["Comptable", "Developpeur Java", "Chef de projet", "Assistant RH"]
+
+
+# -- synthetic documents ---------------------------------------------------
+
+def cv_pages(n, rng):
+    """Lines of a plausible CV for candidate ``n``, split in 1 to 3 pages."""
+    first, last = FIRST_NAMES[n % len(FIRST_NAMES)], LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    header = f"{first} {last} - Curriculum Vitae"
+    skills = rng.sample(SKILLS, 5)
+    body = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{n}@example.com - +33 6 {n % 100:02d} 12 34 56",
+        "PROFIL",
+        "Analyste de donnees rigoureux, " * rng.randint(2, 6),
+        "EXPERIENCES PROFESSIONNELLES",
+    ]
+    for year in range(2024, 2024 - rng.randint(1, 5), -1):
+        body += [f"Data Analyst - Entreprise {rng.randint(1, 99)} ({year - 1}-{year})",
+                 "- Construction de tableaux de bord et automatisation des rapports",
+                 "- Analyse des ventes, modelisation et presentation aux equipes metier"]
+    body += ["COMPETENCES", ", ".join(skills), "FORMATION", "Master Statistique - Universite de Lyon (2018)",
+             "LANGUES", "Anglais : courant", "Francais : natif", "CENTRES D'INTERET", "Course a pied, photographie"]
+
+    page_count = rng.randint(1, 3)
+    per_page = -(-len(body) // page_count)
+    pages = []
+    for index in range(page_count):
+        lines = body[index * per_page:(index + 1) * per_page]
+        # header and footer repeated on every page, as real CV exports do
+        pages.append([header] + lines + [f"Page {index + 1}/{page_count}"])
+    return pages, f"{first} {last}", skills
+
+
+def _pdf_text(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """Minimal valid PDF with one Helvetica text page per list of lines."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_pdf_text(line)}) Tj T*" for line in lines) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref)
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+_DOCX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="word/document.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "word/_rels/document.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"/>'
+    ),
+}
+
+
+def make_docx(pages):
+    """Minimal valid DOCX with one paragraph per line."""
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>"
+                         for lines in pages for line in lines)
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{paragraphs}</w:body></w:document>')
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _DOCX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr("word/document.xml", document)
+    return out.getvalue()
+
+
+def fake_extract(source, max_pages=None, max_chars=None, filename=None):
+    """Pool worker reading ``make_pdf`` / ``make_docx`` output without PyMuPDF
+    or python-docx, for machines where those are not installed."""
+    from email_collector.text_extract import ExtractionResult
+
+    start = time.monotonic()
+    data = bytes(source)
+    if (filename or "").lower().endswith(".pdf"):
+        streams = re.findall(rb"stream\n(.*?)\nendstream", data, re.S)[:max_pages]
+        pages = ["\n".join(part.decode("latin-1").replace("\\(", "(").replace("\\)", ")")
+                           for part in re.findall(rb"\(((?:\\.|[^\\)])*)\) Tj", stream))
+                 for stream in streams]
+        text = "\f".join(pages)
+    else:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            xml = archive.read("word/document.xml").decode("utf-8")
+        text = "\n".join(re.sub(r"<[^>]+>", "", p) for p in re.findall(r"<w:p>.*?</w:p>", xml))
+    truncated = max_chars is not None and len(text) > max_chars
+    text = text[:max_chars] if truncated else text
+    return ExtractionResult(filename, text, None, None, truncated, time.monotonic() - start)
+
+
+# -- Gmail -----------------------------------------------------------------
+
+class _Request:
+    def __init__(self, service, fn):
+        self._service = service
+        self._fn = fn
+
+    def execute(self):
+        self._service.sleep(self._service.latency)
+        return self._fn()
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, request_id=None):
+        self._requests.append((request_id, request))
+
+    def execute(self):
+        # one round trip for the whole batch, as with the real batch endpoint
+        self._service.sleep(self._service.latency)
+        for request_id, request in self._requests:
+            try:
+                response, error = request._fn(), None
+            except Exception as e:
+                response, error = None, e
+            self._callback(request_id, response, error)
+
+
+class FakeGmailService:
+    """Synthetic mailbox of ``message_count`` applications.
+
+    Most subjects apply to ``job_title``, the others to unrelated jobs;
+    attachments alternate between PDF and DOCX and ``duplicate_ratio`` of
+    the messages re-send an earlier CV (reminders, forwards). Every API call
+    waits ``latency`` seconds. The same instance can be shared by threads.
+    """
+
+    def __init__(self, message_count, job_title="Data Analyst", match_ratio=0.8, duplicate_ratio=0.1,
+                 latency=0.0, seed=0):
+        self.message_count = message_count
+        self.job_title = job_title
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        rng = random.Random(seed)
+        self._messages = {}
+        self._documents = {}
+        for n in range(message_count):
+            msg_id = f"{n:08x}"
+            title = job_title if rng.random() < match_ratio else rng.choice(OTHER_JOBS)
+            if n and rng.random() < duplicate_ratio:
+                document = rng.randrange(n)
+            else:
+                document = n
+            extension = "pdf" if document % 2 == 0 else "docx"
+            self._messages[msg_id] = (title, document, f"cv_{document}.{extension}")
+        self._rng = rng
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.calls += 1
+        if seconds:
+            time.sleep(seconds)
+
+    def _document(self, document):
+        # built lazily and kept: the attachment body is requested by id
+        if document not in self._documents:
+            pages, _, _ = cv_pages(document, random.Random(document))
+            data = make_pdf(pages) if document % 2 == 0 else make_docx(pages)
+            self._documents[document] = base64.urlsafe_b64encode(data).decode("ascii")
+        return self._documents[document]
+
+    # users() / messages() / attachments() / history() all resolve to self
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def attachments(self):
+        return self
+
+    def history(self):
+        return self
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def getProfile(self, userId="me"):
+        return _Request(self, lambda: {"emailAddress": "recrutement@example.com",
+                                       "historyId": str(self.message_count)})
+
+    def list(self, userId="me", maxResults=100, pageToken=None, q=None, startHistoryId=None, **kwargs):
+        if startHistoryId is not None:
+            # history().list: the mailbox never changes, nothing was added since
+            return _Request(self, lambda: {"history": [], "historyId": str(self.message_count)})
+        ids = list(self._messages)
+        start = int(pageToken or 0)
+        end = start + maxResults
+
+        def _page():
+            page = {"messages": [{"id": msg_id, "threadId": msg_id} for msg_id in ids[start:end]]}
+            if end < len(ids):
+                page["nextPageToken"] = str(end)
+            return page
+
+        return _Request(self, _page)
+
+    def get(self, userId="me", id=None, messageId=None, format="full", metadataHeaders=None):
+        if messageId is not None:
+            # attachments().get(messageId=..., id=attachment_id)
+            return _Request(self, lambda: {"data": self._document(int(id))})
+
+        title, document, filename = self._messages[id]
+        n = int(id, 16)
+
+        def _message():
+            headers = [
+                {"name": "From", "value": f"Candidat {n} <candidat{n}@example.com>"},
+                {"name": "Subject", "value": f"Candidature — {title} — Candidat {n}"},
+                {"name": "Date", "value": "Tue, 14 Oct 2025 09:30:00 +0200"},
+            ]
+            payload = {"headers": headers}
+            if format == "full":
+                payload["parts"] = [
+                    {"filename": "", "body": {"size": 120}},
+                    {"filename": filename, "body": {"attachmentId": str(document)}},
+                ]
+            return {"id": id, "payload": payload}
+
+        return _Request(self, _message)
+
+
+# -- LLM -------------------------------------------------------------------
+
+class FakeLLMClient:
+    """Groq-shaped client answering from the CV text after ``latency`` seconds
+    (plus up to ``jitter``), for single-CV and batch prompts alike."""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = self
+        self.completions = self
+
+    @staticmethod
+    def _answer(cv_text):
+        lines = [line for line in cv_text.splitlines() if line.strip()]
+        full_name = next((line for line in lines if "Curriculum" not in line), "")
+        heading = next((i for i, line in enumerate(lines) if line.strip() == "COMPETENCES"), None)
+        skills = lines[heading + 1] if heading is not None and heading + 1 < len(lines) else ""
+        return {
+            "first_name": full_name.split(" ")[0],
+            "last_name": " ".join(full_name.split(" ")[1:]),
+            "full_name": full_name,
+            "email": next(iter(re.findall(r"\S+@\S+", cv_text)), ""),
+            "phone_number": "",
+            "technical_skills": [s.strip() for s in skills.split(",") if s.strip()],
+            "secondary_skills": [],
+            "soft_skills": ["Rigueur"],
+            "languages": [{"language": "Anglais", "level": "courant"}],
+            "educations": [],
+            "experiences": [],
+            "interests": [],
+            "summary": "",
+        }
+
+    def create(self, model=None, messages=None, temperature=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        prompt = messages[-1]["content"] if messages else ""
+        # the CV texts sit between the instructions and the expected structure
+        cv_texts = prompt.split(" :\n\n", 1)[-1].rsplit("\n\nTu dois renvoyer", 1)[0]
+        parts = re.split(r"^### CV (\S+)$", cv_texts, flags=re.MULTILINE)
+        if len(parts) > 1:
+            content = json.dumps([{"id": cv_id, "cv": self._answer(text)}
+                                  for cv_id, text in zip(parts[1::2], parts[2::2])])
+        else:
+            content = json.dumps(self._answer(cv_texts))
+        message = type("Message", (), {"content": content})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
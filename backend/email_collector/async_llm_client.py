@@ -0,0 +1,143 @@
+"""Asyncio Groq client for CV extraction under load.
+
+A single ``AsyncGroq`` instance (one pooled HTTP connection) is shared by
+every request. Requests wait on token buckets sized from the Groq
+requests-per-minute and tokens-per-minute quotas, and 429 / 5xx / connection
+errors are retried with jittered exponential backoff that honors
+``Retry-After``, so a burst of CVs is slowed down instead of lost.
+"""
+
+import os
+import asyncio
+
+try:
+    from .llm_client import MODEL, load_prompt
+    from .llm_cache import make_cache_key
+    from .rate_limit import TokenBucket, estimate_tokens, parse_retry_after, backoff_delay
+    from .cv_schema import parse_cv_content
+except Exception:
+    from llm_client import MODEL, load_prompt
+    from llm_cache import make_cache_key
+    from rate_limit import TokenBucket, estimate_tokens, parse_retry_after, backoff_delay
+    from cv_schema import parse_cv_content
+
+
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "8000"))
+# tokens reserved for the answer when budgeting a request against the TPM quota
+COMPLETION_TOKENS = 1500
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    return parse_retry_after(headers.get("retry-after"))
+
+
+def _is_retryable(error):
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    from groq import APIConnectionError
+
+    # APITimeoutError is a subclass
+    return isinstance(error, APIConnectionError)
+
+
+class AsyncLLMClient:
+    """Rate-limited, retrying asyncio client for ``extract_cv_data``."""
+
+    def __init__(self, api_key=None, base_url=None, model=MODEL,
+                 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, max_concurrency=8, cache=None):
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
+        self._client = None
+        self.retries = 0
+
+    def _get_client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+
+            # retries are handled here, where the rate limiter can see them
+            self._client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def complete(self, prompt):
+        """Send one chat request and return the raw message content."""
+        client = self._get_client()
+        budget = estimate_tokens(prompt) + COMPLETION_TOKENS
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(budget)
+                try:
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0,
+                    )
+                    return response.choices[0].message.content
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, _retry_after(e))
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+
+    async def extract_cv_data(self, cv_text):
+        """Async counterpart of ``llm_client.extract_cv_data_with_llm``.
+
+        Returns the validated CV data, or None once the retries are exhausted
+        or when the answer cannot be repaired. Answers go through ``cache`` when
+        one is given.
+        """
+        prompt_template = load_prompt()
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(cv_text, prompt_template, self.model)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            content = await self.complete(prompt_template.replace("{cv_text}", cv_text))
+            cv_data = parse_cv_content(content)
+        except Exception:
+            return None
+
+        if cache_key is not None:
+            self.cache.set(cache_key, cv_data)
+        return cv_data
+
+    async def extract_many(self, cv_texts):
+        """Extract several CVs concurrently; results keep the input order."""
+        return await asyncio.gather(*(self.extract_cv_data(text) for text in cv_texts))
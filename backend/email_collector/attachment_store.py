@@ -0,0 +1,151 @@
+"""Content-addressed storage of CV attachments.
+
+Every attachment is stored once under ``cv_files/_by_hash/<sha256>.<ext>``
+and hard-linked into the job folders that received it. An index keeps, per
+hash, the text and LLM data extracted the first time, so the same file sent
+again (forward, reminder, several applications, another run) reuses them
+instead of going through extraction and the LLM again.
+
+In zero-disk mode the index is fed by ``record_extraction`` alone and rows
+have no blob until ``add`` is called for the same content.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+try:
+    from .paths import MAIN_CV_FOLDER, data_dir
+except Exception:
+    from paths import MAIN_CV_FOLDER, data_dir
+
+
+BLOB_FOLDER = "_by_hash"
+INDEX_FILE = "index.db"
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class AttachmentStore:
+    """Blob folder + SQLite index of the attachments already seen."""
+
+    def __init__(self, root=None):
+        if root is None:
+            root = os.path.join(data_dir(), MAIN_CV_FOLDER, BLOB_FOLDER)
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        # shared by the download workers, serialized by the lock above
+        self._conn = sqlite3.connect(os.path.join(root, INDEX_FILE), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS attachments (
+                sha256 TEXT PRIMARY KEY,
+                blob_path TEXT,
+                size INTEGER,
+                cv_text TEXT,
+                cv_data TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                seen_count INTEGER NOT NULL DEFAULT 1
+            )
+            """
+        )
+        self._conn.commit()
+
+    def lookup(self, digest):
+        """Return ``{"blob_path", "cv_text", "cv_data"}`` for a known hash, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT blob_path, cv_text, cv_data FROM attachments WHERE sha256 = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"blob_path": row[0], "cv_text": row[1], "cv_data": json.loads(row[2]) if row[2] else None}
+
+    def add(self, data, filename):
+        """Store ``data`` once and return ``(digest, blob_path, known)``."""
+        digest = hash_bytes(data)
+        ext = os.path.splitext(filename)[1].lower()
+        blob_path = os.path.join(self.root, f"{digest}{ext}")
+        now = datetime.now().isoformat()
+
+        if not os.path.exists(blob_path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+
+        with self._lock:
+            cur = self._conn.execute(
+                """
+                UPDATE attachments
+                SET blob_path = COALESCE(blob_path, ?), size = COALESCE(size, ?),
+                    last_seen = ?, seen_count = seen_count + 1
+                WHERE sha256 = ?
+                """,
+                (blob_path, len(data), now, digest),
+            )
+            known = cur.rowcount > 0
+            if not known:
+                self._conn.execute(
+                    """
+                    INSERT INTO attachments (sha256, blob_path, size, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (digest, blob_path, len(data), now, now),
+                )
+            self._conn.commit()
+        return digest, blob_path, known
+
+    def record_extraction(self, digest, cv_text=None, cv_data=None):
+        """Remember what was extracted from ``digest``, creating its row if needed."""
+        now = datetime.now().isoformat()
+        payload = json.dumps(cv_data, ensure_ascii=False) if cv_data is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO attachments (sha256, cv_text, cv_data, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(sha256) DO UPDATE SET
+                    cv_text = COALESCE(excluded.cv_text, cv_text),
+                    cv_data = COALESCE(excluded.cv_data, cv_data)
+                """,
+                (digest, cv_text, payload, now, now),
+            )
+            self._conn.commit()
+
+    def link(self, blob_path, folder, filename):
+        """Expose a stored blob in ``folder`` as ``{timestamp}_{filename}``.
+
+        Uses a hard link so the job folder costs no extra disk space, and
+        falls back to a copy where hard links are not supported.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base, ext = os.path.splitext(filename)
+        link_name = f"{timestamp}_{filename}"
+        n = 1
+        while True:
+            path = os.path.join(folder, link_name)
+            try:
+                try:
+                    os.link(blob_path, path)
+                except FileExistsError:
+                    raise
+                except OSError:
+                    with open(blob_path, "rb") as src, open(path, "xb") as dst:
+                        dst.write(src.read())
+                return path
+            except FileExistsError:
+                link_name = f"{timestamp}_{base}_{n}{ext}"
+                n += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
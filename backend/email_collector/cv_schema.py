@@ -0,0 +1,276 @@
+"""Schema of the CV data returned by the LLM, tolerant parsing and validation.
+
+``CV_SCHEMA`` is the structure asked for in ``prompts/prompt.txt``: ``str``
+for a text field, ``[spec]`` for a list of ``spec``, a dict for an object.
+
+``repair_json`` fixes the usual defects of a model answer locally (code
+fences, prose around the JSON, trailing commas, Python literals, an answer
+cut off mid-array) and ``validate_cv_data`` coerces the result to the schema,
+reporting field by field what was missing or had to be changed. Only an
+answer with no usable JSON object at all is worth another LLM call.
+"""
+
+import re
+import json
+
+
+LANGUAGE_SCHEMA = {"language": str, "level": str}
+
+EDUCATION_SCHEMA = {
+    "title": str,
+    "institution": str,
+    "start_date": str,
+    "end_date": str,
+    "description": str,
+}
+
+EXPERIENCE_SCHEMA = {
+    "title": str,
+    "company": str,
+    "start_date": str,
+    "end_date": str,
+    "missions": str,
+    "technical_skills_used": [str],
+    "soft_skills_used": [str],
+}
+
+CV_SCHEMA = {
+    "first_name": str,
+    "last_name": str,
+    "full_name": str,
+    "email": str,
+    "phone_number": str,
+    "technical_skills": [str],
+    "secondary_skills": [str],
+    "soft_skills": [str],
+    "languages": [LANGUAGE_SCHEMA],
+    "educations": [EDUCATION_SCHEMA],
+    "experiences": [EXPERIENCE_SCHEMA],
+    "interests": [str],
+    "summary": str,
+}
+
+# a string where the schema wants a list of strings is split on these
+_LIST_SEPARATORS = re.compile(r"\s*(?:[,;\n]|•)\s*")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def new_report():
+    return {"repairs": [], "missing": [], "coerced": [], "unexpected": []}
+
+
+def _note(report, repair):
+    if repair not in report["repairs"]:
+        report["repairs"].append(repair)
+
+
+def _strip_fences(content):
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+
+def repair_json(content, report=None):
+    """Parse ``content`` as JSON, repairing it where needed.
+
+    Raises ``ValueError`` when no JSON value can be recovered.
+    """
+    report = report if report is not None else new_report()
+    text = _strip_fences(content or "")
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("aucun JSON dans la réponse")
+    start = min(starts)
+    if text[:start].strip():
+        _note(report, "prose")
+
+    out = []
+    stack = []
+    # per open object: True while a key is expected, False after its colon
+    expect_key = []
+    safe = (0, [])
+    in_string = escape = False
+    i = start
+    n = len(text)
+
+    def _mark():
+        return len(out), list(stack)
+
+    while i < n:
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                if not (stack and stack[-1] == "{" and expect_key[-1]):
+                    out.append(c)
+                    safe = _mark()
+                    i += 1
+                    continue
+            elif c == "\n":
+                _note(report, "control_chars")
+                c = "\\n"
+            out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+            out.append(c)
+        elif c in "{[":
+            stack.append(c)
+            expect_key.append(c == "{")
+            out.append(c)
+            safe = _mark()
+        elif c in "}]":
+            if not stack:
+                break
+            while out and out[-1] in " \t\r\n,":
+                if out.pop() == ",":
+                    _note(report, "trailing_comma")
+            out.append(_CLOSERS[stack.pop()])
+            expect_key.pop()
+            safe = _mark()
+            if not stack:
+                if text[i + 1:].strip():
+                    _note(report, "prose")
+                break
+        elif c == ":":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = False
+            out.append(c)
+        elif c == ",":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+            out.append(c)
+        elif c.isspace():
+            out.append(c)
+        else:
+            match = re.match(r"[A-Za-z0-9+\-.]+", text[i:])
+            token = match.group(0) if match else c
+            if token in _LITERALS:
+                if token != _LITERALS[token]:
+                    _note(report, "literals")
+                out.append(_LITERALS[token])
+                safe = _mark()
+            elif _NUMBER.match(token):
+                out.append(token)
+                safe = _mark()
+            elif i + len(token) == n:
+                # a literal cut off by the end of the answer
+                i = n
+                continue
+            else:
+                raise ValueError(f"JSON irréparable près de {text[i:i + 20]!r}")
+            i += len(token)
+            continue
+        i += 1
+    else:
+        # ran out of text: the answer was cut off
+        _note(report, "truncated")
+        if in_string and not (stack and stack[-1] == "{" and expect_key[-1]):
+            # keep a value cut in the middle rather than dropping it
+            if escape:
+                out.pop()
+            out.append('"')
+            safe = _mark()
+        length, open_brackets = safe
+        del out[length:]
+        while out and out[-1] in " \t\r\n,:":
+            out.pop()
+        out.extend(_CLOSERS[b] for b in reversed(open_brackets))
+
+    try:
+        return json.loads("".join(out))
+    except ValueError as e:
+        raise ValueError(f"JSON irréparable: {e}")
+
+
+def _text(value, path, report):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    report["coerced"].append(path)
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value if v not in (None, ""))
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    return ""
+
+
+def _validate(value, spec, path, report):
+    if spec is str:
+        return _text(value, path, report)
+
+    if isinstance(spec, list):
+        item_spec = spec[0]
+        if value is None:
+            return []
+        if isinstance(value, str):
+            if item_spec is not str:
+                report["coerced"].append(path)
+                return []
+            value = [v for v in _LIST_SEPARATORS.split(value) if v]
+            report["coerced"].append(path)
+        elif isinstance(value, dict):
+            value = [value]
+            report["coerced"].append(path)
+        elif not isinstance(value, list):
+            report["coerced"].append(path)
+            return []
+        items = []
+        for index, item in enumerate(value):
+            item = _validate(item, item_spec, f"{path}[{index}]", report)
+            # the empty placeholders copied from the prompt's template carry nothing
+            if item and (not isinstance(item, dict) or any(item.values())):
+                items.append(item)
+        return items
+
+    if not isinstance(value, dict):
+        report["coerced"].append(path)
+        return None
+    return {key: _validate(value.get(key), sub, f"{path}.{key}", report) for key, sub in spec.items()}
+
+
+def validate_cv_data(data, report=None):
+    """Coerce ``data`` to ``CV_SCHEMA``, field by field.
+
+    Missing fields get their empty value ("" or []) and are listed under
+    ``missing``; fields of the wrong type are converted (a comma-separated
+    string into a list...) and listed under ``coerced``; keys outside the
+    schema are dropped and listed under ``unexpected``. Raises ``ValueError``
+    when ``data`` is not an object.
+    """
+    report = report if report is not None else new_report()
+    if not isinstance(data, dict):
+        raise ValueError("la réponse n'est pas un objet JSON")
+
+    cv_data = {}
+    for key, spec in CV_SCHEMA.items():
+        if key not in data:
+            report["missing"].append(key)
+        cv_data[key] = _validate(data.get(key), spec, key, report)
+    report["unexpected"].extend(key for key in data if key not in CV_SCHEMA)
+    return cv_data
+
+
+def parse_cv_content(content, report=None):
+    """``repair_json`` + ``validate_cv_data`` of one model answer."""
+    report = report if report is not None else new_report()
+    return validate_cv_data(repair_json(content, report), report)
@@ -0,0 +1,92 @@
+"""Continuous collection: one long-running process, one run per cycle.
+
+``watch`` starts a collection run every ``interval`` seconds, give or take a
+random ``jitter`` so that several collectors don't poll Gmail in step, until
+it is asked to stop. What is slow to set up is built once and reused by
+every run: the Gmail clients through ``ServicePool``, the extraction process
+pool (``extraction_service`` option of ``process_cvs``) and the LLM client,
+which is already shared by the whole process.
+
+``install_stop_handlers`` turns SIGTERM / SIGINT into a stop request: no new
+CV is started, the ones in flight are finished and saved, then the process
+exits. A second signal exits at once.
+"""
+
+import time
+import random
+import signal
+import threading
+
+
+class ServicePool:
+    """Gmail service factory reusing the clients of finished threads.
+
+    Gmail clients are not thread-safe, so every live thread gets its own. The
+    pipeline workers of a run are gone once it ends: their clients are handed
+    to the workers of the next run instead of authenticating again.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._by_thread = {}
+        self._free = []
+        self.created = 0
+
+    def __call__(self):
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._by_thread:
+                return self._by_thread[ident]
+            alive = {thread.ident for thread in threading.enumerate()}
+            for other in [i for i in self._by_thread if i not in alive]:
+                self._free.append(self._by_thread.pop(other))
+            service = self._free.pop() if self._free else None
+        if service is None:
+            service = self._factory()
+            with self._lock:
+                self.created += 1
+        with self._lock:
+            self._by_thread[ident] = service
+        return service
+
+
+def install_stop_handlers(stop_event, signals=(signal.SIGTERM, signal.SIGINT)):
+    """Set ``stop_event`` on the first of ``signals``; the next one kills the
+    process as usual. Must be called from the main thread."""
+    def _handler(signum, frame):
+        print(f"🛑 Arrêt demandé ({signal.Signals(signum).name}) — fin des CV en cours...")
+        stop_event.set()
+        for sig in signals:
+            signal.signal(sig, signal.SIG_DFL)
+
+    for sig in signals:
+        signal.signal(sig, _handler)
+
+
+def next_delay(interval, jitter, rng=random):
+    return max(0.0, interval + rng.uniform(-jitter, jitter))
+
+
+def watch(run_once, interval, jitter=0.0, stop_event=None, max_cycles=None):
+    """Call ``run_once()`` every ``interval`` (± ``jitter``) seconds until
+    ``stop_event`` is set or ``max_cycles`` runs are done.
+
+    The interval counts from the start of a cycle, so a long run is followed
+    by a short wait. A failing cycle is reported and the next one runs as
+    planned. Returns the number of cycles run.
+    """
+    stop_event = stop_event if stop_event is not None else threading.Event()
+    cycles = 0
+    while not stop_event.is_set():
+        started = time.monotonic()
+        try:
+            run_once()
+        except Exception as e:
+            print(f"❌ Cycle de collecte en échec: {e}")
+        cycles += 1
+        if max_cycles is not None and cycles >= max_cycles:
+            break
+        # wait() returns as soon as a stop is requested
+        stop_event.wait(max(0.0, next_delay(interval, jitter) - (time.monotonic() - started)))
+    return cycles
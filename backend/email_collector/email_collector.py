@@ -2,17 +2,28 @@
 
 This file provides a small command-line entrypoint that delegates
 the heavy lifting to the reorganized modules in the package.
+
+Without arguments it asks for the job interactively. With arguments it runs
+headless, once or continuously (``--watch``), e.g. under systemd::
+
+    python email_collector.py --job "Data Analyst" --watch --interval 300
+    python email_collector.py --all-offers --db rh_jobs.db --watch
 """
 
+import os
+import sys
+import argparse
+import threading
+
 try:
     # normal package import (works when run as module)
-    from .processor import process_cvs
+    from .processor import process_cvs, route_cvs, PERSIST_MODES
+    from .service import get_gmail_service
+    from .text_extract import ExtractionService
+    from .daemon import ServicePool, install_stop_handlers, watch
 except Exception:
     # fallback when the file is executed directly (python email_collector.py)
     # add package folder to sys.path and import the local module
-    import sys
-    import os
-
     pkg_dir = os.path.dirname(__file__)
     # repo root is three levels up from this file: /<repo>/backend/email_collector/email_collector.py
     repo_root = os.path.dirname(os.path.dirname(os.path.dirname(pkg_dir)))
@@ -21,10 +32,16 @@ except Exception:
 
     # Try package import first (if repo root inserted)
     try:
-        from backend.email_collector.processor import process_cvs
+        from backend.email_collector.processor import process_cvs, route_cvs, PERSIST_MODES
+        from backend.email_collector.service import get_gmail_service
+        from backend.email_collector.text_extract import ExtractionService
+        from backend.email_collector.daemon import ServicePool, install_stop_handlers, watch
     except Exception:
         # Fallback to direct local import when executing inside the package folder
-        from processor import process_cvs
+        from processor import process_cvs, route_cvs, PERSIST_MODES
+        from service import get_gmail_service
+        from text_extract import ExtractionService
+        from daemon import ServicePool, install_stop_handlers, watch
 
 
 def _run_cli():
@@ -51,5 +68,83 @@ def _run_cli():
         print(f"❌ Erreur : {e}")
 
 
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Collecte des CV reçus par Gmail, sans interaction")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--job", help="poste à filtrer (ex: Statisticien)")
+    target.add_argument("--all-offers", action="store_true",
+                        help="router chaque candidature vers l'offre ouverte correspondante de la base RH")
+    parser.add_argument("--db", help="base RH lue avec --all-offers (défaut: rh_jobs.db)")
+    parser.add_argument("--max-emails", type=int, default=50)
+    parser.add_argument("--incremental", action="store_true",
+                        help="seulement les messages arrivés depuis le dernier passage (toujours actif avec --watch)")
+    parser.add_argument("--watch", action="store_true", help="tourner en continu jusqu'à SIGTERM")
+    parser.add_argument("--interval", type=float, default=300, help="secondes entre deux passages (défaut: 300)")
+    parser.add_argument("--jitter", type=float, default=30, help="variation aléatoire de l'intervalle (défaut: 30)")
+    parser.add_argument("--storage-format", choices=["json", "jsonl"], default="json")
+    parser.add_argument("--llm-batch-size", type=int, default=1)
+    parser.add_argument("--persist-attachments", choices=PERSIST_MODES, default="sync")
+    parser.add_argument("--metrics-file", help="rapport JSON du dernier passage")
+    parser.add_argument("--prometheus-file", help="fichier .prom pour le textfile collector de node_exporter")
+    parser.add_argument("--profile-file", help="statistiques cProfile du dernier passage")
+    parser.add_argument("--quiet", action="store_true", help="n'afficher que les erreurs et le bilan")
+    return parser.parse_args(argv)
+
+
+def _job_offer_repository(db_path=None):
+    # service_database lives in backend/, next to this package
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    from service_database import JobOfferRepository, DB_PATH
+    return JobOfferRepository(db_path or DB_PATH)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        _run_cli()
+        return 0
+
+    args = _parse_args(argv)
+    stop = threading.Event()
+    install_stop_handlers(stop)
+    repository = _job_offer_repository(args.db) if args.all_offers else None
+    run_options = {
+        "max_emails": args.max_emails,
+        "verbose": not args.quiet,
+        "incremental": args.incremental or args.watch,
+        "storage_format": args.storage_format,
+        "llm_batch_size": args.llm_batch_size,
+        "persist_attachments": args.persist_attachments,
+        "metrics_file": args.metrics_file,
+        "prometheus_file": args.prometheus_file,
+        "profile_file": args.profile_file,
+        # authenticated once, then reused by every run
+        "service_factory": ServicePool(get_gmail_service),
+        "should_stop": stop.is_set,
+    }
+
+    # the extraction processes are started once for the whole process
+    with ExtractionService() as extraction:
+        def _run_once():
+            if args.all_offers:
+                result = route_cvs(job_offer_repository=repository, extraction_service=extraction, **run_options)
+                print(f"🎉 Passage terminé — {result['processed']} CV(s) routés, {result['unmatched']} sans offre")
+            else:
+                result = process_cvs(target_job_title=args.job, extraction_service=extraction, **run_options)
+                print(f"🎉 Passage terminé — {result['processed']} CV(s) traités. Fichier: {result['json_file']}")
+            return result
+
+        if args.watch:
+            print(f"👀 Surveillance de la boîte toutes les {args.interval:g}s (±{args.jitter:g}s)")
+            watch(_run_once, args.interval, args.jitter, stop)
+        else:
+            _run_once()
+    if stop.is_set():
+        print("👋 Arrêt propre terminé")
+    return 0
+
+
 if __name__ == "__main__":
-    _run_cli()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""Streaming export of the candidates files to flat CSV and Parquet tables.
+
+The ``candidates_*.json`` arrays are read one record at a time
+(``iter_json_array``) and ``.jsonl`` stores line by line, so memory does not
+grow with the size of the files. Each candidate becomes one row of the
+``candidates`` table; its nested lists of objects (``languages``,
+``educations``, ``experiences``) go to child tables of the same name, one
+row per item, keyed by ``source_file`` + ``cv_id`` and ``position``. Lists of
+strings (skills, interests) are joined with ``"; "``::
+
+    python -m email_collector.export --out export/ --format csv parquet \\
+        --job "Data Analyst" --start 2025-10-01 --end 2025-11-01
+
+Parquet needs pyarrow; rows are written by row groups of
+``ROW_GROUP_SIZE``.
+"""
+
+import os
+import csv
+import sys
+import glob
+import json
+import argparse
+
+try:
+    from .cv_schema import CV_SCHEMA
+    from .paths import MAIN_CANDIDATES_FOLDER, data_dir
+    from .storage import iter_jsonl_records
+    from .utils import normalize_job_title
+except Exception:
+    from cv_schema import CV_SCHEMA
+    from paths import MAIN_CANDIDATES_FOLDER, data_dir
+    from storage import iter_jsonl_records
+    from utils import normalize_job_title
+
+
+CHUNK_SIZE = 1 << 16
+ROW_GROUP_SIZE = 10000
+LIST_SEPARATOR = "; "
+FORMATS = ("csv", "parquet")
+
+# fields added by the collector around the CV data (see storage.ensure_json_structure)
+RECORD_FIELDS = ["cv_id", "candidate_id", "source_email_id", "application_datetime", "job_applied_for"]
+KEY_FIELDS = ["source_file", "cv_id"]
+CHILD_TABLES = {field: list(spec[0]) for field, spec in CV_SCHEMA.items()
+                if isinstance(spec, list) and isinstance(spec[0], dict)}
+TABLES = {
+    "candidates": ["source_file"] + RECORD_FIELDS + [field for field in CV_SCHEMA if field not in CHILD_TABLES],
+    **{field: KEY_FIELDS + ["position"] + columns for field, columns in CHILD_TABLES.items()},
+}
+
+
+def iter_json_array(json_file, chunk_size=CHUNK_SIZE):
+    """Yield the items of the JSON array in ``json_file`` one at a time,
+    reading ``chunk_size`` characters at a time.
+
+    A truncated or invalid file stops at the last complete item, with a
+    warning.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_file, "r", encoding="utf-8") as f:
+        buffer, position, eof = "", 0, False
+        started = False
+
+        def _skip(chars):
+            nonlocal position
+            while position < len(buffer) and buffer[position] in chars:
+                position += 1
+
+        while True:
+            _skip(" \t\r\n" + ("," if started else ""))
+            if position >= len(buffer) and not eof:
+                # keep only what is left to parse
+                buffer, position = buffer[position:] + f.read(chunk_size), 0
+                eof = position >= len(buffer)
+                continue
+            if position >= len(buffer):
+                if started:
+                    print(f"⚠️ Fichier JSON tronqué: {json_file}")
+                return
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"{json_file} is not a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    print(f"⚠️ Fichier JSON invalide ou tronqué, lecture arrêtée: {json_file}")
+                    return
+                # the item goes past the buffer: read more and decode it again
+                more = f.read(chunk_size)
+                eof = not more
+                buffer, position = buffer[position:] + more, 0
+                continue
+            position = end
+            yield item
+
+
+def candidate_files(folder=None):
+    """``candidates_*.json`` / ``.jsonl`` files of ``folder`` (the collector's
+    candidates folder by default). When a ``.jsonl`` store and its compacted
+    ``.json`` copy both exist, only the ``.jsonl`` one is kept."""
+    folder = folder or os.path.join(data_dir(), MAIN_CANDIDATES_FOLDER)
+    paths = sorted(glob.glob(os.path.join(folder, "candidates_*.json")) +
+                   glob.glob(os.path.join(folder, "candidates_*.jsonl")))
+    return [path for path in paths
+            if not (path.endswith(".json") and os.path.splitext(path)[0] + ".jsonl" in paths)]
+
+
+def iter_candidates(paths, job=None, start=None, end=None):
+    """Yield ``(path, record)`` for the candidates of ``paths`` applying for
+    ``job`` (accents and case ignored) between the ISO dates ``start`` and
+    ``end`` (excluded), like ``CandidateRepository.list_for_job``."""
+    wanted_job = normalize_job_title(job) if job else None
+    for path in paths:
+        records = iter_jsonl_records(path) if path.endswith(".jsonl") else iter_json_array(path)
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            if wanted_job and normalize_job_title(record.get("job_applied_for")) != wanted_job:
+                continue
+            applied = record.get("application_datetime") or ""
+            if (start and applied < start) or (end and applied >= end):
+                continue
+            yield path, record
+
+
+def _cell(value):
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(item) for item in value if item is not None)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def flatten_candidate(record, source_file=""):
+    """``{table: [rows]}`` of one candidate record."""
+    rows = {"candidates": [{column: _cell(record.get(column)) for column in TABLES["candidates"]}]}
+    rows["candidates"][0]["source_file"] = source_file
+    for field, columns in CHILD_TABLES.items():
+        rows[field] = []
+        for position, item in enumerate(record.get(field) or []):
+            if not isinstance(item, dict):
+                item = {columns[0]: item}
+            row = {"source_file": source_file, "cv_id": record.get("cv_id"), "position": position}
+            row.update({column: _cell(item.get(column)) for column in columns})
+            rows[field].append(row)
+    return rows
+
+
+class _CsvTable:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetTable:
+    """Parquet file written one row group at a time; every column is a string
+    except ``position``."""
+
+    def __init__(self, path, columns, row_group_size=ROW_GROUP_SIZE):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._columns = columns
+        self._schema = pa.schema([(column, pa.int32() if column == "position" else pa.string())
+                                  for column in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+        self._row_group_size = row_group_size
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        data = {column: [_text(row.get(column), column) for row in self._rows] for column in self._columns}
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        # an empty table still gets a file with its schema
+        self._flush()
+        self._writer.close()
+
+
+def _text(value, column):
+    if value is None or column == "position":
+        return value
+    return str(value)
+
+
+def export_candidates(paths, output_dir, formats=("csv",), job=None, start=None, end=None,
+                      row_group_size=ROW_GROUP_SIZE):
+    """Write ``<output_dir>/<table>.<format>`` for every table and format from
+    the candidates of ``paths`` passing the filters. Returns the number of rows
+    written per table."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"unknown export format: {', '.join(sorted(unknown))}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    outputs = {table: [] for table in TABLES}
+    counts = {table: 0 for table in TABLES}
+    try:
+        for table, columns in TABLES.items():
+            for export_format in formats:
+                path = os.path.join(output_dir, f"{table}.{export_format}")
+                if export_format == "csv":
+                    outputs[table].append(_CsvTable(path, columns))
+                else:
+                    outputs[table].append(_ParquetTable(path, columns, row_group_size))
+
+        for path, record in iter_candidates(paths, job=job, start=start, end=end):
+            source_file = os.path.splitext(os.path.basename(path))[0]
+            for table, rows in flatten_candidate(record, source_file).items():
+                for row in rows:
+                    for output in outputs[table]:
+                        output.write(row)
+                counts[table] += len(rows)
+    finally:
+        for table_outputs in outputs.values():
+            for output in table_outputs:
+                output.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporte les candidats en tables CSV / Parquet")
+    parser.add_argument("sources", nargs="*",
+                        help="fichiers candidates_*.json / .jsonl ou dossiers (dossier des candidats par défaut)")
+    parser.add_argument("--out", required=True, help="dossier de sortie")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["csv"], dest="formats")
+    parser.add_argument("--job", help="poste visé")
+    parser.add_argument("--start", help="date ISO de début (incluse)")
+    parser.add_argument("--end", help="date ISO de fin (exclue)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for source in args.sources or [None]:
+        paths.extend(candidate_files(source) if source is None or os.path.isdir(source) else [source])
+    counts = export_candidates(paths, args.out, args.formats, job=args.job, start=args.start, end=args.end)
+    print(f"✅ {counts['candidates']} candidat(s) exporté(s) depuis {len(paths)} fichier(s) vers {args.out} "
+          f"({', '.join(f'{table}: {n}' for table, n in counts.items() if table != 'candidates')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
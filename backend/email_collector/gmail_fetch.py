@@ -0,0 +1,134 @@
+"""Gmail listing and batched message retrieval helpers.
+
+Listing follows ``nextPageToken`` until the requested number of messages is
+reached, and message bodies are fetched through Gmail batch HTTP requests so
+that a chunk of messages costs a single round trip instead of one per message.
+Incremental runs read only message additions through the History API.
+"""
+
+# messages.list accepts at most 500 results per page
+GMAIL_PAGE_SIZE = 500
+# Gmail accepts up to 100 calls per batch but recommends no more than 50
+GMAIL_BATCH_SIZE = 50
+
+
+class HistoryExpiredError(Exception):
+    """The stored ``startHistoryId`` is too old to be used with history.list."""
+
+
+def _http_status(error):
+    resp = getattr(error, "resp", None)
+    status = getattr(resp, "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_mailbox_profile(service):
+    """Return the Gmail profile (``emailAddress``, ``historyId``...)."""
+    return service.users().getProfile(userId="me").execute()
+
+
+def list_message_ids(service, max_emails, query=None, page_size=GMAIL_PAGE_SIZE):
+    """Return up to ``max_emails`` message IDs, newest first, across pages."""
+    ids = []
+    seen = set()
+    page_token = None
+    while len(ids) < max_emails:
+        params = {"userId": "me", "maxResults": min(page_size, max_emails - len(ids))}
+        if query:
+            params["q"] = query
+        if page_token:
+            params["pageToken"] = page_token
+
+        results = service.users().messages().list(**params).execute()
+        for msg in results.get("messages", []):
+            if msg["id"] not in seen:
+                seen.add(msg["id"])
+                ids.append(msg["id"])
+
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
+    return ids[:max_emails]
+
+
+def fetch_messages(service, message_ids, fmt="full", batch_size=GMAIL_BATCH_SIZE, metadata_headers=None):
+    """Fetch messages through batch requests of ``batch_size`` calls.
+
+    Yields ``(message_id, message, error)`` tuples in the order of
+    ``message_ids``. Exactly one of ``message`` and ``error`` is set, so a
+    failing message is reported on its own without aborting its batch.
+    """
+    batch_size = max(1, min(int(batch_size), 100))
+    messages = service.users().messages()
+
+    for start in range(0, len(message_ids), batch_size):
+        chunk = message_ids[start:start + batch_size]
+        results = {}
+
+        def _callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        batch = service.new_batch_http_request(callback=_callback)
+        for msg_id in chunk:
+            params = {"userId": "me", "id": msg_id, "format": fmt}
+            if fmt == "metadata" and metadata_headers:
+                params["metadataHeaders"] = list(metadata_headers)
+            batch.add(messages.get(**params), request_id=msg_id)
+
+        try:
+            batch.execute()
+        except Exception as e:
+            # the whole batch failed (network, auth): report it on every message
+            for msg_id in chunk:
+                results.setdefault(msg_id, (None, e))
+
+        for msg_id in chunk:
+            response, error = results.get(msg_id, (None, None))
+            if response is None and error is None:
+                error = RuntimeError("no response received in batch")
+            yield msg_id, response, error
+
+
+def list_history_message_ids(service, start_history_id, page_size=GMAIL_PAGE_SIZE):
+    """Return the IDs of messages added since ``start_history_id``.
+
+    Returns ``(message_ids, latest_history_id)``, oldest message first.
+    Raises ``HistoryExpiredError`` when Gmail no longer keeps history that far
+    back (HTTP 404), in which case the caller should fall back to a full listing.
+    """
+    ids = []
+    seen = set()
+    latest_history_id = str(start_history_id)
+    page_token = None
+    while True:
+        params = {
+            "userId": "me",
+            "startHistoryId": str(start_history_id),
+            "historyTypes": ["messageAdded"],
+            "maxResults": page_size,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+
+        try:
+            results = service.users().history().list(**params).execute()
+        except Exception as e:
+            if _http_status(e) == 404:
+                raise HistoryExpiredError(f"historyId {start_history_id} expired") from e
+            raise
+
+        for record in results.get("history", []):
+            for added in record.get("messagesAdded", []):
+                msg_id = added.get("message", {}).get("id")
+                if msg_id and msg_id not in seen:
+                    seen.add(msg_id)
+                    ids.append(msg_id)
+
+        latest_history_id = str(results.get("historyId", latest_history_id))
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            break
+    return ids, latest_history_id
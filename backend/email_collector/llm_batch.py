@@ -0,0 +1,282 @@
+"""Several CVs per LLM request.
+
+``extract_cv_data_with_llm`` pays the whole instruction block of the prompt
+for every CV. Here short CVs are packed, each under its own id, into one
+request using ``prompts/batch_prompt.txt`` and the model answers with a JSON
+array. Batches are sized from a token budget; when an answer is invalid or
+misses some ids the batch is bisected and retried, down to single CVs which
+fall back to the one-CV prompt.
+
+``LLMBatcher`` groups the calls made one CV at a time by the pipeline
+workers into such batches.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    from .llm_client import MODEL, _get_client, load_prompt, parse_llm_content, extract_cv_data_with_llm
+    from .llm_cache import get_default_cache, make_cache_key
+    from .rate_limit import estimate_tokens
+    from .cv_schema import new_report, validate_cv_data
+except Exception:
+    from llm_client import MODEL, _get_client, load_prompt, parse_llm_content, extract_cv_data_with_llm
+    from llm_cache import get_default_cache, make_cache_key
+    from rate_limit import estimate_tokens
+    from cv_schema import new_report, validate_cv_data
+
+
+BATCH_PROMPT_FILE = "prompts/batch_prompt.txt"
+# prompt + expected answers of one request, kept under the tokens-per-minute quota
+BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+MAX_BATCH_SIZE = 8
+# rough size of the JSON answer for one CV
+COMPLETION_TOKENS_PER_CV = 800
+
+
+def cv_cost(cv_text):
+    """Tokens a CV adds to a batch: its text plus its share of the answer."""
+    return estimate_tokens(cv_text) + COMPLETION_TOKENS_PER_CV
+
+
+def plan_batches(cv_texts, token_budget=BATCH_TOKEN_BUDGET, max_batch_size=MAX_BATCH_SIZE, overhead=0):
+    """Group the indexes of ``cv_texts`` into batches that fit ``token_budget``.
+
+    Consecutive CVs are packed greedily; a CV too long to share a request
+    gets a batch of its own.
+    """
+    batches = []
+    current, used = [], overhead
+    for index, text in enumerate(cv_texts):
+        cost = cv_cost(text)
+        if current and (used + cost > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_batch(items):
+    """Render ``[(cv_id, cv_text)]`` for the ``{cv_texts}`` placeholder."""
+    return "\n\n".join(f"### CV {cv_id}\n{text}" for cv_id, text in items)
+
+
+def parse_batch_content(content, cv_ids, report=None):
+    """Return ``{cv_id: cv_data}`` for the well-formed entries of an answer.
+
+    Answers are repaired and validated like single-CV ones; unknown ids and
+    malformed entries are ignored and the caller retries the missing ids.
+    The last entry of an answer that was cut off is dropped too: it may be a
+    partial CV that validation would happily fill with empty fields.
+    """
+    report = report if report is not None else new_report()
+    parsed = parse_llm_content(content, report)
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results", parsed.get("cvs"))
+    if not isinstance(parsed, list):
+        raise ValueError("la réponse n'est pas un tableau JSON")
+    if "truncated" in report["repairs"]:
+        parsed = parsed[:-1]
+
+    wanted = {str(cv_id) for cv_id in cv_ids}
+    results = {}
+    for entry in parsed:
+        if not isinstance(entry, dict):
+            continue
+        cv_id = str(entry.get("id", ""))
+        cv_data = entry.get("cv")
+        if cv_id in wanted and isinstance(cv_data, dict):
+            results[cv_id] = validate_cv_data(cv_data)
+    return results
+
+
+def _request_batch(items, prompt_template, stats):
+    prompt = prompt_template.replace("{cv_texts}", format_batch(items))
+    response = _get_client().chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0
+    )
+    report = new_report()
+    answered = parse_batch_content(response.choices[0].message.content, [cv_id for cv_id, _ in items], report)
+    if report["repairs"]:
+        stats["repaired"] += len(answered)
+    return answered
+
+
+def _resolve(items, prompt_template, results, stats):
+    """Fill ``results`` for every item, bisecting the batch on failure."""
+    if len(items) == 1:
+        cv_id, text = items[0]
+        stats["requests"] += 1
+        report = new_report()
+        results[cv_id] = extract_cv_data_with_llm(text, use_cache=False, report=report)
+        if results[cv_id] is not None and report["repairs"]:
+            stats["repaired"] += 1
+        if report.get("reprompted"):
+            stats["reprompted"] += 1
+        return
+
+    stats["requests"] += 1
+    try:
+        answered = _request_batch(items, prompt_template, stats)
+    except Exception:
+        answered = {}
+    results.update(answered)
+
+    missing = [item for item in items if item[0] not in answered]
+    if not missing:
+        return
+    if len(missing) < len(items):
+        # partial answer: only the missing CVs go again
+        _resolve(missing, prompt_template, results, stats)
+        return
+    stats["splits"] += 1
+    middle = len(items) // 2
+    _resolve(items[:middle], prompt_template, results, stats)
+    _resolve(items[middle:], prompt_template, results, stats)
+
+
+def extract_cv_batch_with_llm(cv_texts, cache=None, use_cache=True, token_budget=BATCH_TOKEN_BUDGET,
+                              max_batch_size=MAX_BATCH_SIZE, stats=None):
+    """Batched counterpart of ``extract_cv_data_with_llm``.
+
+    Returns one result per text, in order (None where extraction failed).
+    ``stats``, when given, receives the number of ``requests`` sent, of
+    batch ``splits``, of ``cache_hits`` and, like the reports of the one-CV
+    path, of CVs taken from a ``repaired`` answer or ``reprompted``.
+    """
+    stats = stats if stats is not None else {}
+    for name in ("requests", "splits", "cache_hits", "repaired", "reprompted"):
+        stats.setdefault(name, 0)
+    prompt_template = load_prompt(BATCH_PROMPT_FILE)
+    if use_cache:
+        cache = cache or get_default_cache()
+
+    results = [None] * len(cv_texts)
+    keys = [None] * len(cv_texts)
+    todo = []
+    for index, text in enumerate(cv_texts):
+        if use_cache:
+            keys[index] = make_cache_key(text, prompt_template, MODEL)
+            results[index] = cache.get(keys[index])
+        if results[index] is None:
+            todo.append(index)
+        else:
+            stats["cache_hits"] += 1
+
+    overhead = estimate_tokens(prompt_template)
+    answers = {}
+    for batch in plan_batches([cv_texts[i] for i in todo], token_budget, max_batch_size, overhead):
+        items = [(str(todo[i] + 1), cv_texts[todo[i]]) for i in batch]
+        _resolve(items, prompt_template, answers, stats)
+
+    for index in todo:
+        results[index] = answers.get(str(index + 1))
+        if use_cache and results[index] is not None:
+            cache.set(keys[index], results[index])
+    return results
+
+
+_STOP = object()
+
+
+class LLMBatcher:
+    """Collect CVs submitted one by one into batched requests.
+
+    ``extract`` blocks until the CV's batch is answered. A batch leaves when
+    it is full (size or token budget) or ``max_wait`` seconds after its first
+    CV arrived. The batch size adapts: halved after a batch had to be split,
+    grown by one after a clean answer.
+    """
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, token_budget=BATCH_TOKEN_BUDGET, max_wait=0.5,
+                 max_concurrency=4, use_cache=True, extract_batch=extract_cv_batch_with_llm):
+        self.max_batch_size = max_batch_size
+        self.batch_size = max_batch_size
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self.use_cache = use_cache
+        self.requests = 0
+        self.cache_hits = 0
+        self.repaired = 0
+        self.reprompted = 0
+        self._extract_batch = extract_batch
+        self._overhead = estimate_tokens(load_prompt(BATCH_PROMPT_FILE))
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-batch")
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._collect, name="llm-batcher", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def extract(self, cv_text):
+        future = Future()
+        self._queue.put((cv_text, future))
+        return future.result()
+
+    def _collect(self):
+        held = None
+        while True:
+            entry = held if held is not None else self._queue.get()
+            held = None
+            if entry is _STOP:
+                break
+            batch = [entry]
+            used = self._overhead + cv_cost(entry[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                if used + cv_cost(entry[0]) > self.token_budget:
+                    held = entry
+                    break
+                batch.append(entry)
+                used += cv_cost(entry[0])
+            self._executor.submit(self._dispatch, batch)
+            if stop:
+                break
+
+    def _dispatch(self, batch):
+        stats = {}
+        try:
+            results = self._extract_batch([text for text, _ in batch], use_cache=self.use_cache,
+                                          token_budget=self.token_budget, max_batch_size=len(batch),
+                                          stats=stats)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.requests += stats.get("requests", 0)
+            self.cache_hits += stats.get("cache_hits", 0)
+            self.repaired += stats.get("repaired", 0)
+            self.reprompted += stats.get("reprompted", 0)
+            if stats.get("splits"):
+                self.batch_size = max(1, self.batch_size // 2)
+            elif len(batch) >= self.batch_size:
+                self.batch_size = min(self.max_batch_size, self.batch_size + 1)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
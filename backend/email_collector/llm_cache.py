@@ -0,0 +1,150 @@
+"""Persistent cache of LLM extractions, keyed by content.
+
+The key is a SHA-256 of the normalized CV text, the prompt template and the
+model name, so a CV seen again (reprocessing, re-application) is answered from
+disk while any change of prompt or model naturally misses. Entries expire
+after ``max_age_days`` and the least recently used ones are evicted once the
+cache holds more than ``max_entries`` entries or ``max_bytes`` of JSON.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+try:
+    from .paths import data_dir
+except Exception:
+    from paths import data_dir
+
+
+CACHE_FOLDER = "cache"
+CACHE_FILE = "llm_cache.db"
+
+
+def normalize_cv_text(cv_text):
+    text = unicodedata.normalize("NFC", cv_text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(cv_text, prompt_template, model):
+    digest = hashlib.sha256()
+    for part in (normalize_cv_text(cv_text), prompt_template or "", model or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed LRU cache with size and age limits."""
+
+    def __init__(self, path=None, max_entries=20000, max_bytes=200 * 1024 * 1024, max_age_days=180,
+                 bypass=False):
+        if path is None:
+            path = os.path.join(data_dir(), CACHE_FOLDER, CACHE_FILE)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # shared by the LLM worker threads, serialized by the lock above
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        if self.bypass:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and self.max_age and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        if self.bypass or value is None:
+            return
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.max_age:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.max_age,))
+
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if (self.max_entries is None or count <= self.max_entries) and (self.max_bytes is None or total <= self.max_bytes):
+            return
+
+        # walk from the least recently used entry until both limits hold
+        to_delete = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if (self.max_entries is None or count <= self.max_entries) and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            to_delete.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Process-wide cache under ``cache/llm_cache.db``; ``LLM_CACHE_BYPASS=1`` disables it."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(bypass=os.getenv("LLM_CACHE_BYPASS", "") in ("1", "true", "yes"))
+        return _default_cache
@@ -1,15 +1,36 @@
 import os
-import json
 from dotenv import load_dotenv
 from groq import Groq
 
+try:
+    from .llm_cache import get_default_cache, make_cache_key
+    from .cv_schema import new_report, repair_json, parse_cv_content
+except Exception:
+    from llm_cache import get_default_cache, make_cache_key
+    from cv_schema import new_report, repair_json, parse_cv_content
+
 
 load_dotenv()
 
+MODEL = "openai/gpt-oss-20b"
+
+# sent back, with the conversation, only when the answer could not be repaired
+REPROMPT = (
+    "Ta réponse précédente n'est pas un JSON exploitable ({error}). "
+    "Renvoie UNIQUEMENT le JSON complet et valide demandé, sans aucun texte avant ou après."
+)
+
+# one client (and its HTTP connection pool) per process instead of one per CV
+_client = None
+
 
 def _get_client():
-    api_key = os.getenv("GROQ_API_KEY")
-    return Groq(api_key=api_key)
+    global _client
+    if _client is None:
+        api_key = os.getenv("GROQ_API_KEY")
+        # the SDK retries 429 / 5xx itself, honoring Retry-After
+        _client = Groq(api_key=api_key, max_retries=5)
+    return _client
 
 
 def load_prompt(prompt_file="prompts/prompt.txt"):
@@ -22,28 +43,52 @@ def load_prompt(prompt_file="prompts/prompt.txt"):
         return "{cv_text}"
 
 
-def extract_cv_data_with_llm(cv_text):
-    client = _get_client()
+def parse_llm_content(content, report=None):
+    """Parse a model answer, repairing fences, prose, trailing commas and truncation."""
+    return repair_json(content, report)
+
+
+def _chat(messages):
+    response = _get_client().chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        temperature=0
+    )
+    return response.choices[0].message.content
+
+
+def extract_cv_data_with_llm(cv_text, cache=None, use_cache=True, report=None):
+    """Extract the CV data of ``cv_text``, validated against ``CV_SCHEMA``.
+
+    ``report``, when given, receives what was repaired, missing or coerced
+    (see ``cv_schema``), ``reprompted`` when a second call was needed and
+    ``cached`` when the answer came from the cache.
+    """
+    report = report if report is not None else new_report()
     prompt_template = load_prompt()
-    prompt = prompt_template.replace("{cv_text}", cv_text)
+    if use_cache:
+        cache = cache or get_default_cache()
+        cache_key = make_cache_key(cv_text, prompt_template, MODEL)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            report["cached"] = True
+            return cached
+
+    messages = [{"role": "user", "content": prompt_template.replace("{cv_text}", cv_text)}]
 
     try:
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-20b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-
-        return json.loads(content)
+        content = _chat(messages)
+        try:
+            cv_data = parse_cv_content(content, report)
+        except ValueError as e:
+            # nothing usable to repair locally: one targeted follow-up
+            messages.append({"role": "assistant", "content": content})
+            messages.append({"role": "user", "content": REPROMPT.format(error=e)})
+            report["reprompted"] = True
+            cv_data = parse_cv_content(_chat(messages), report)
     except Exception:
         return None
+
+    if use_cache:
+        cache.set(cache_key, cv_data)
+    return cv_data
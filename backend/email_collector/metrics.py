@@ -0,0 +1,212 @@
+"""Timings and counters of one collector run.
+
+``RunMetrics`` records a timing span per stage call (``list``, ``fetch``,
+``triage``, then the pipeline stages ``download``, ``extract``, ``compact``,
+``llm`` and ``persist``) and the run counters (processed, skipped, filtered,
+failed, cache hits...). A run is exported as a JSON report and as a
+Prometheus textfile for the node_exporter textfile collector. ``profiled``
+runs a block under cProfile.
+"""
+
+import os
+import sys
+import math
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+from collections import defaultdict
+from datetime import datetime
+
+
+PROMETHEUS_PREFIX = "email_collector"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def percentile(values, q):
+    """Nearest-rank quantile ``q`` (0 < q <= 1) of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # the epsilon keeps 100 * 0.9 from rounding up to rank 91
+    rank = max(1, math.ceil(len(ordered) * q - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class RunMetrics:
+    """Thread-safe collector of stage timings and counters for one run.
+
+    ``labels`` (run name, job title...) are written with every Prometheus sample;
+    avoid ``job`` and ``instance``, which Prometheus sets itself when scraping.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self.started_at = datetime.now()
+        self.duration = None
+        self.durations = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, failed=False):
+        with self._lock:
+            self.durations[stage].append(seconds)
+            if failed:
+                self.failures[stage] += 1
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        """Time the ``with`` block as one call of ``stage``."""
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.observe(stage, time.perf_counter() - start, failed)
+
+    def timed(self, stage, iterable):
+        """Yield from ``iterable``, timing each wait for the next item."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start)
+            yield item
+
+    def count(self, counts):
+        """Add the numeric values of ``counts`` to the counters."""
+        with self._lock:
+            for name, value in counts.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.counters[name] += value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+        return self
+
+    def stages(self):
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self.durations.items()}
+            failures = dict(self.failures)
+        summary = {}
+        for stage, values in durations.items():
+            summary[stage] = {
+                "count": len(values),
+                "failed": failures.get(stage, 0),
+                "total": sum(values),
+                "max": max(values),
+            }
+            summary[stage].update({f"p{round(q * 100)}": percentile(values, q) for q in QUANTILES})
+        return summary
+
+    def to_dict(self):
+        return {
+            "labels": self.labels,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds": self.duration if self.duration is not None else time.perf_counter() - self._start,
+            "stages": self.stages(),
+            "counters": dict(self.counters),
+        }
+
+    def format_summary(self):
+        """One line with the total time spent per stage, slowest first."""
+        stages = sorted(self.stages().items(), key=lambda item: item[1]["total"], reverse=True)
+        return ", ".join(f"{stage} {stats['total']:.1f}s" for stage, stats in stages)
+
+    def to_prometheus(self):
+        """The run in the Prometheus text exposition format."""
+        def _labels(**extra):
+            labels = dict(self.labels, **extra)
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+        data = self.to_dict()
+        name = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {name}_stage_seconds Time spent per call of each stage during the last run.",
+            f"# TYPE {name}_stage_seconds summary",
+        ]
+        for stage, stats in data["stages"].items():
+            for q in QUANTILES:
+                lines.append(f"{name}_stage_seconds{_labels(stage=stage, quantile=q)} {stats[f'p{round(q * 100)}']}")
+            lines.append(f"{name}_stage_seconds_sum{_labels(stage=stage)} {stats['total']}")
+            lines.append(f"{name}_stage_seconds_count{_labels(stage=stage)} {stats['count']}")
+        lines += [f"# HELP {name}_stage_failures Failed calls per stage during the last run.",
+                  f"# TYPE {name}_stage_failures gauge"]
+        lines += [f"{name}_stage_failures{_labels(stage=stage)} {stats['failed']}"
+                  for stage, stats in data["stages"].items()]
+        lines += [f"# HELP {name}_events Counters of the last run (processed, skipped, cache hits...).",
+                  f"# TYPE {name}_events gauge"]
+        lines += [f"{name}_events{_labels(event=event)} {value}" for event, value in sorted(data["counters"].items())]
+        lines += [f"# HELP {name}_run_duration_seconds Duration of the last run.",
+                  f"# TYPE {name}_run_duration_seconds gauge",
+                  f"{name}_run_duration_seconds{_labels()} {data['duration_seconds']}",
+                  f"# HELP {name}_last_run_timestamp_seconds Start of the last run.",
+                  f"# TYPE {name}_last_run_timestamp_seconds gauge",
+                  f"{name}_last_run_timestamp_seconds{_labels()} {self.started_at.timestamp()}"]
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        _write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.to_prometheus())
+
+
+def _label_value(value):
+    text = "" if value is None else str(value)
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path, text):
+    # the textfile collector may read at any time: never expose a partial file
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def profiled(path):
+    """Run the block under cProfile and dump the stats to ``path``.
+
+    Threads started inside the block (pipeline workers) are profiled too and
+    merged into the same file. Does nothing when ``path`` is empty.
+    """
+    if not path:
+        yield
+        return
+
+    profiles = [cProfile.Profile()]
+    if sys.version_info < (3, 12):
+        # before 3.12 a profiler only sees the thread that enabled it
+        def _bootstrap(*args):
+            sys.setprofile(None)
+            profile = cProfile.Profile()
+            profiles.append(profile)
+            profile.enable()
+
+        threading.setprofile(_bootstrap)
+    profiles[0].enable()
+    try:
+        yield
+    finally:
+        profiles[0].disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        stats.dump_stats(path)
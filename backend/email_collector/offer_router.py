@@ -0,0 +1,117 @@
+"""Routing of applications to the open job offers.
+
+``OfferIndex`` normalizes every active offer title once (tokens + character
+trigrams, with an inverted trigram index) so the job title read in an email
+subject is scored against all the offers in one lookup. ``route_cvs`` in
+``processor`` uses it to sort a whole mailbox in a single pass.
+"""
+
+import re
+from collections import namedtuple, defaultdict
+
+try:
+    from .utils import normalize_job_title
+except Exception:
+    from utils import normalize_job_title
+
+
+DEFAULT_MIN_SCORE = 0.6
+
+# words that carry no meaning in a job title ("Data Analyst (H/F)")
+STOP_WORDS = frozenset({
+    "h", "f", "hf", "fh", "m", "x", "de", "du", "des", "d", "la", "le", "les", "l", "en", "et",
+    "a", "au", "aux", "pour", "un", "une", "poste", "offre", "of", "the", "and",
+})
+
+OfferMatch = namedtuple("OfferMatch", ["offer", "score"])
+
+
+def is_active(offer):
+    """``JobOffer.status`` is 1 for an open offer."""
+    return str(offer.status).strip().lower() in ("1", "true", "active", "open", "ouverte")
+
+
+def _stem(token):
+    # analyste / analystes / analyst, ingenieure / ingenieur
+    if len(token) > 4:
+        token = token.rstrip("s")
+        if token.endswith("e") and len(token) > 4:
+            token = token[:-1]
+    return token
+
+
+def title_tokens(title):
+    words = re.findall(r"[a-z0-9+#]+", normalize_job_title(title))
+    return [_stem(word) for word in words if word not in STOP_WORDS]
+
+
+def title_trigrams(tokens):
+    text = f" {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class OfferIndex:
+    """Precomputed, normalized titles of the offers, scored with fuzzy matching."""
+
+    def __init__(self, offers, min_score=DEFAULT_MIN_SCORE):
+        self.offers = list(offers)
+        self.min_score = min_score
+        self._entries = []
+        self._by_trigram = defaultdict(set)
+        for position, offer in enumerate(self.offers):
+            tokens = title_tokens(offer.title)
+            trigrams = title_trigrams(tokens)
+            self._entries.append((offer, frozenset(tokens), trigrams))
+            for trigram in trigrams:
+                self._by_trigram[trigram].add(position)
+
+    @classmethod
+    def from_repository(cls, repository, min_score=DEFAULT_MIN_SCORE):
+        """Index the active offers of a ``JobOfferRepository``."""
+        if hasattr(repository, "iter_offers"):
+            # routing only needs the titles: the descriptions are never read
+            offers = repository.iter_offers(columns=("title", "status"))
+        else:
+            offers = repository.list()
+        return cls([offer for offer in offers if is_active(offer)], min_score)
+
+    def __len__(self):
+        return len(self.offers)
+
+    def score(self, tokens, trigrams, position):
+        _, offer_tokens, offer_trigrams = self._entries[position]
+        query_tokens = frozenset(tokens)
+        if query_tokens == offer_tokens:
+            return 1.0
+        score = 0.5 * _dice(query_tokens, offer_tokens) + 0.5 * _dice(trigrams, offer_trigrams)
+        # "Statisticien débutant" still applies to "Statisticien", and vice versa
+        if query_tokens and offer_tokens and (query_tokens <= offer_tokens or offer_tokens <= query_tokens):
+            score = 0.8 + 0.2 * score
+        return score
+
+    def rank(self, job_title):
+        """Every offer sharing a trigram with ``job_title``, best first."""
+        tokens = title_tokens(job_title)
+        trigrams = title_trigrams(tokens)
+        candidates = set()
+        for trigram in trigrams:
+            candidates |= self._by_trigram.get(trigram, set())
+        scored = [OfferMatch(self.offers[p], self.score(tokens, trigrams, p)) for p in candidates]
+        # ties go to the most recent offer (highest id)
+        scored.sort(key=lambda m: (m.score, m.offer.id or 0), reverse=True)
+        return scored
+
+    def match(self, job_title):
+        """Best offer for ``job_title`` as an ``OfferMatch``, or None below ``min_score``."""
+        if not job_title:
+            return None
+        ranked = self.rank(job_title)
+        if ranked and ranked[0].score >= self.min_score:
+            return ranked[0]
+        return None
@@ -5,11 +5,16 @@ from datetime import datetime
 
 MAIN_CANDIDATES_FOLDER = "candidates"
 MAIN_CV_FOLDER = "cv_files"
+# everything the collector writes (CVs, candidates, caches, checkpoints) goes
+# under the package folder unless this variable points elsewhere
+DATA_DIR_ENV = "EMAIL_COLLECTOR_DATA_DIR"
 
 
-def create_output_paths(job_title):
-    script_dir = os.path.dirname(__file__)
+def data_dir():
+    return os.getenv(DATA_DIR_ENV) or os.path.dirname(__file__)
+
 
+def make_safe_job_title(job_title):
     # Normaliser le titre du poste pour l'utiliser dans les noms de fichiers
     safe_job_title = (job_title or "").strip()
 
@@ -17,19 +22,36 @@ def create_output_paths(job_title):
     # garder lettres/chiffres/espaces/tirets
     safe_job_title = re.sub(r'[^\w\s-]', '', safe_job_title)
     safe_job_title = re.sub(r'[-\s]+', '_', safe_job_title).strip('_')
-    safe_job_title = safe_job_title.lower()
+    return safe_job_title.lower()
+
+
+def output_paths(job_title):
+    """Dated CV folder and JSON file of ``job_title``, without creating them."""
+    safe_job_title = make_safe_job_title(job_title)
 
     date_str = datetime.now().strftime("%Y%m%d")
 
     cv_folder_name = f"cv_files_{safe_job_title}_{date_str}"
     json_file_name = f"candidates_{safe_job_title}_{date_str}.json"
 
-    # Créer chemins relatifs au dossier du package
-    base = script_dir
+    # Créer chemins relatifs au dossier de données (le package par défaut)
+    base = data_dir()
     cv_folder = os.path.join(base, MAIN_CV_FOLDER, cv_folder_name)
     json_file = os.path.join(base, MAIN_CANDIDATES_FOLDER, json_file_name)
+    return cv_folder, json_file
+
 
+def create_output_paths(job_title):
+    cv_folder, json_file = output_paths(job_title)
     os.makedirs(cv_folder, exist_ok=True)
     os.makedirs(os.path.dirname(json_file), exist_ok=True)
 
     return cv_folder, json_file
+
+
+def create_unmatched_path():
+    """JSON file collecting the applications no open offer matched."""
+    date_str = datetime.now().strftime("%Y%m%d")
+    json_file = os.path.join(data_dir(), MAIN_CANDIDATES_FOLDER, f"unmatched_{date_str}.json")
+    os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    return json_file
@@ -0,0 +1,149 @@
+"""Staged worker-pool pipeline with bounded queues and ordered output.
+
+Each stage has its own pool of threads and a bounded input queue, so a slow
+stage (the LLM) applies back-pressure instead of letting downloads pile up in
+memory. Results are handed to ``sink`` on the calling thread in input order,
+which keeps ID allocation and storage writes deterministic whatever the
+completion order of the workers. The number of items between the feeder and
+the sink is capped too, so a stalled item does not let the results behind it
+pile up while they wait for their turn.
+"""
+
+import time
+import queue
+import threading
+from collections import namedtuple
+
+
+Stage = namedtuple("Stage", ["name", "fn", "workers"])
+
+# ``value`` is the output of the last stage reached; when ``error`` is set,
+# ``stage`` names the stage that raised it
+PipelineResult = namedtuple("PipelineResult", ["seq", "item", "value", "error", "stage"])
+
+
+class SkipItem(Exception):
+    """Raised by a stage to drop an item without treating it as a failure."""
+
+
+_DONE = object()
+
+
+def run_pipeline(items, stages, sink, queue_size=16, should_stop=None, observer=None, max_in_flight=None):
+    """Run every item through ``stages`` and call ``sink(result)`` in order.
+
+    ``items`` may be a lazy iterable; it is consumed on a feeder thread. When
+    ``should_stop()`` becomes true no new item is fed, but the items already
+    in flight still go through every stage and reach the sink. Returns the
+    number of items fed.
+
+    At most ``max_in_flight`` items are fed and not yet handed to the sink;
+    by default, as many as the stage queues and workers hold.
+
+    ``observer(stage_name, seconds, error)``, when given, is called from the
+    worker threads after every stage call, and from the calling thread,
+    where the sink runs, after every sink call with ``"sink"`` as the stage
+    name.
+    """
+    stages = list(stages)
+    if not stages or any(stage.workers < 1 for stage in stages):
+        raise ValueError("every pipeline stage needs at least one worker")
+    if max_in_flight is None:
+        max_in_flight = queue_size * len(stages) + sum(stage.workers for stage in stages)
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    # released by the sink: bounds the results waiting in the reorder buffer
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    results = queue.Queue()
+    fed = [0]
+    feeder_error = []
+
+    def _feed():
+        try:
+            for seq, item in enumerate(items):
+                in_flight.acquire()
+                if should_stop is not None and should_stop():
+                    in_flight.release()
+                    break
+                queues[0].put((seq, item, item, None, None))
+                fed[0] = seq + 1
+        except Exception as e:
+            feeder_error.append(e)
+        finally:
+            for _ in range(stages[0].workers):
+                queues[0].put(_DONE)
+
+    def _make_workers(index):
+        stage = stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else results
+        remaining = [stage.workers]
+        lock = threading.Lock()
+
+        def _work():
+            while True:
+                entry = inbox.get()
+                if entry is _DONE:
+                    break
+                seq, item, value, error, failed_stage = entry
+                if error is None:
+                    start = time.perf_counter()
+                    try:
+                        value = stage.fn(value)
+                    except Exception as e:
+                        error, failed_stage = e, stage.name
+                    if observer is not None:
+                        observer(stage.name, time.perf_counter() - start, error)
+                outbox.put((seq, item, value, error, failed_stage))
+
+            # the last worker of a stage closes the next one
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                if outbox is results:
+                    results.put(_DONE)
+                else:
+                    for _ in range(stages[index + 1].workers):
+                        outbox.put(_DONE)
+
+        # the workers of a stage share the countdown above
+        return [threading.Thread(target=_work, name=f"pipeline-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)]
+
+    threads = [threading.Thread(target=_feed, name="pipeline-feed", daemon=True)]
+    for index in range(len(stages)):
+        threads.extend(_make_workers(index))
+    for thread in threads:
+        thread.start()
+
+    def _deliver(entry):
+        start = time.perf_counter()
+        try:
+            sink(PipelineResult(*entry))
+        finally:
+            in_flight.release()
+        if observer is not None:
+            observer("sink", time.perf_counter() - start, None)
+
+    # reorder buffer: hand results to the sink strictly by sequence number
+    pending = {}
+    next_seq = 0
+    while True:
+        entry = results.get()
+        if entry is _DONE:
+            break
+        pending[entry[0]] = entry
+        while next_seq in pending:
+            _deliver(pending.pop(next_seq))
+            next_seq += 1
+
+    for thread in threads:
+        thread.join()
+    for seq in sorted(pending):
+        _deliver(pending[seq])
+
+    if feeder_error:
+        raise feeder_error[0]
+    return fed[0]
@@ -1,20 +1,40 @@
 import os
 import base64
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Support both package-relative imports (when run as module) and direct execution
 try:
     # Preferred when imported as package
     from .service import get_gmail_service
-    from .paths import create_output_paths
+    from .gmail_fetch import (
+        list_message_ids,
+        list_history_message_ids,
+        fetch_messages,
+        get_mailbox_profile,
+        HistoryExpiredError,
+        GMAIL_BATCH_SIZE,
+    )
+    from .sync_state import load_checkpoint, save_checkpoint
+    from .paths import create_output_paths, create_unmatched_path, make_safe_job_title, output_paths
     from .utils import extract_job_title_from_subject, job_titles_match
-    from .text_extract import extract_text
+    from .text_extract import ExtractionService
+    from .text_compact import compact_cv_text, DEFAULT_TOKEN_BUDGET
     from .llm_client import extract_cv_data_with_llm
+    from .llm_batch import LLMBatcher
+    from .cv_schema import new_report
+    from .offer_router import OfferIndex, DEFAULT_MIN_SCORE
+    from .pipeline import Stage, SkipItem, run_pipeline
+    from .metrics import RunMetrics, profiled
+    from .attachment_store import AttachmentStore, hash_bytes
     from .storage import (
-        is_email_already_processed,
+        CandidateStore,
+        open_candidate_store,
+        jsonl_path_for,
+        compact_jsonl_in_background,
         ensure_json_structure,
-        get_next_ids,
-        append_candidate_to_json,
         reorder_json_fields,
     )
 except Exception:
@@ -28,148 +48,695 @@ except Exception:
     # Try to import using package path first (when running from repo root)
     try:
         from backend.email_collector.service import get_gmail_service
-        from backend.email_collector.paths import create_output_paths
+        from backend.email_collector.gmail_fetch import (
+            list_message_ids,
+            list_history_message_ids,
+            fetch_messages,
+            get_mailbox_profile,
+            HistoryExpiredError,
+            GMAIL_BATCH_SIZE,
+        )
+        from backend.email_collector.sync_state import load_checkpoint, save_checkpoint
+        from backend.email_collector.paths import create_output_paths, create_unmatched_path, make_safe_job_title, output_paths
         from backend.email_collector.utils import extract_job_title_from_subject, job_titles_match
-        from backend.email_collector.text_extract import extract_text
+        from backend.email_collector.text_extract import ExtractionService
+        from backend.email_collector.text_compact import compact_cv_text, DEFAULT_TOKEN_BUDGET
         from backend.email_collector.llm_client import extract_cv_data_with_llm
+        from backend.email_collector.llm_batch import LLMBatcher
+        from backend.email_collector.cv_schema import new_report
+        from backend.email_collector.offer_router import OfferIndex, DEFAULT_MIN_SCORE
+        from backend.email_collector.pipeline import Stage, SkipItem, run_pipeline
+        from backend.email_collector.metrics import RunMetrics, profiled
+        from backend.email_collector.attachment_store import AttachmentStore, hash_bytes
         from backend.email_collector.storage import (
-            is_email_already_processed,
+            CandidateStore,
+            open_candidate_store,
+            jsonl_path_for,
+            compact_jsonl_in_background,
             ensure_json_structure,
-            get_next_ids,
-            append_candidate_to_json,
             reorder_json_fields,
         )
     except Exception:
         # Fallback to local module names (works when executed from package directory)
         from service import get_gmail_service
-        from paths import create_output_paths
+        from gmail_fetch import (
+            list_message_ids,
+            list_history_message_ids,
+            fetch_messages,
+            get_mailbox_profile,
+            HistoryExpiredError,
+            GMAIL_BATCH_SIZE,
+        )
+        from sync_state import load_checkpoint, save_checkpoint
+        from paths import create_output_paths, create_unmatched_path, make_safe_job_title, output_paths
         from utils import extract_job_title_from_subject, job_titles_match
-        from text_extract import extract_text
+        from text_extract import ExtractionService
+        from text_compact import compact_cv_text, DEFAULT_TOKEN_BUDGET
         from llm_client import extract_cv_data_with_llm
+        from llm_batch import LLMBatcher
+        from cv_schema import new_report
+        from offer_router import OfferIndex, DEFAULT_MIN_SCORE
+        from pipeline import Stage, SkipItem, run_pipeline
+        from metrics import RunMetrics, profiled
+        from attachment_store import AttachmentStore, hash_bytes
         from storage import (
-            is_email_already_processed,
+            CandidateStore,
+            open_candidate_store,
+            jsonl_path_for,
+            compact_jsonl_in_background,
             ensure_json_structure,
-            get_next_ids,
-            append_candidate_to_json,
             reorder_json_fields,
         )
 
 
-def process_cvs(target_job_title=None, max_emails=50, verbose=True):
-    if not target_job_title:
-        raise ValueError("target_job_title is required")
+# Narrow the listing server-side to messages that can carry a CV
+DEFAULT_QUERY = "has:attachment {filename:pdf filename:docx}"
+TRIAGE_HEADERS = ("From", "Subject", "Date")
 
-    if verbose:
-        print("🚀 Démarrage du traitement (processor)...")
 
-    cv_folder, json_file = create_output_paths(target_job_title)
-    if verbose:
-        print(f"📁 CV folder: {cv_folder}")
-        print(f"📄 JSON file: {json_file}")
-        print("🔌 Connexion à Gmail...")
+def _get_header(headers, name, default=None):
+    return next((h["value"] for h in headers if h["name"].lower() == name), default)
 
-    service = get_gmail_service()
-    if verbose:
-        print("✅ Connexion Gmail obtenue")
+
+def _parse_application_datetime(date_header):
+    try:
+        return datetime.strptime(date_header[:-6], "%a, %d %b %Y %H:%M:%S").isoformat()
+    except Exception:
+        return datetime.now().isoformat()
+
+
+# where the original attachment files go: written before extraction ("sync"),
+# by a background writer while the CV goes on from memory ("async"), or
+# nowhere at all ("none")
+PERSIST_MODES = ("sync", "async", "none")
+
+# where the CVs of one job go; ``job_title``, when set, is written as
+# ``job_applied_for`` instead of the title read in the subject
+Destination = namedtuple("Destination", ["store", "cv_folder", "job_title"])
+
+# checkpoint name of the runs routing the mailbox to every open offer
+ALL_OFFERS = "all offers"
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def _list_message_ids(service, target_job_title, max_emails, incremental, verbose, query=DEFAULT_QUERY):
+    """Return ``(message_ids, checkpoint)`` for this run.
+
+    In incremental mode only the messages added since the stored historyId
+    are listed; ``checkpoint`` is the ``(mailbox, history_id)`` pair to save
+    once the run succeeded. A missing or expired checkpoint falls back to a
+    full listing of the newest ``max_emails`` messages.
+    """
+    if not incremental:
+        if verbose:
+            print(f"📧 Recherche jusqu'à {max_emails} messages")
+        return list_message_ids(service, max_emails, query=query), None
+
+    # historyId is read before listing so that nothing arriving meanwhile is lost
+    profile = get_mailbox_profile(service)
+    mailbox = profile.get("emailAddress")
+    start_history_id = load_checkpoint(mailbox, target_job_title)
+
+    if start_history_id:
+        try:
+            message_ids, history_id = list_history_message_ids(service, start_history_id)
+            if verbose:
+                print(f"🔄 Synchronisation incrémentale: {len(message_ids)} nouveau(x) message(s) depuis {start_history_id}")
+            return message_ids, (mailbox, history_id)
+        except HistoryExpiredError:
+            if verbose:
+                print("⚠️ Point de reprise expiré — listing complet")
 
     if verbose:
         print(f"📧 Recherche jusqu'à {max_emails} messages")
-    results = service.users().messages().list(userId="me", maxResults=max_emails).execute()
-    messages = results.get("messages", [])
+    return list_message_ids(service, max_emails, query=query), (mailbox, profile.get("historyId"))
+
+
+def _build_options(verbose, batch_size=GMAIL_BATCH_SIZE, candidate_repository=None, download_workers=4,
+                   extract_workers=None, llm_workers=4, queue_size=16, service_factory=None, use_llm_cache=True,
+                   deduplicate_attachments=True, extraction_timeout=60, persist_attachments="sync",
+                   token_budget=DEFAULT_TOKEN_BUDGET, llm_batch_size=1, stage_observer=None, metrics=None,
+                   extraction_service=None, should_stop=None):
+    if persist_attachments not in PERSIST_MODES:
+        raise ValueError(f"persist_attachments must be one of {PERSIST_MODES}")
+    return {
+        "batch_size": batch_size,
+        "verbose": verbose,
+        # progress lines follow ``verbose``; errors are always printed
+        "log": print if verbose else _quiet,
+        "candidate_repository": candidate_repository,
+        # Gmail clients are not thread-safe: download workers build their own
+        "service_factory": service_factory or get_gmail_service,
+        # one extract thread per pool process: each thread waits on a single file;
+        # a long-running caller passes its own pool, kept warm between runs
+        "extraction": extraction_service or ExtractionService(max_workers=extract_workers,
+                                                              timeout=extraction_timeout),
+        "owns_extraction": extraction_service is None,
+        "workers": {"download": download_workers, "llm": llm_workers},
+        "queue_size": queue_size,
+        "use_llm_cache": use_llm_cache,
+        "attachments": AttachmentStore() if deduplicate_attachments else None,
+        "persist": persist_attachments,
+        "token_budget": token_budget,
+        # several short CVs per LLM request; each LLM worker then has up to
+        # ``llm_batch_size`` CVs waiting on its batch
+        "batcher": LLMBatcher(max_batch_size=llm_batch_size, max_concurrency=llm_workers,
+                              use_cache=use_llm_cache) if llm_batch_size > 1 else None,
+        "writer": ThreadPoolExecutor(max_workers=1, thread_name_prefix="cv-writer")
+        if persist_attachments == "async" else None,
+        # extra ``run_pipeline`` observer, called with the raw stage names
+        "stage_observer": stage_observer,
+        "metrics": metrics if metrics is not None else RunMetrics(),
+        # once true no new email or CV is started; the ones in flight are saved
+        "should_stop": should_stop,
+    }
 
-    cv_count = 0
-    filtered_out = 0
 
-    total = len(messages)
-    for idx, msg in enumerate(messages, start=1):
-        print(f"--- Email {idx}/{total} (id={msg.get('id')}) ---")
+def _close_options(options):
+    if options["writer"] is not None:
+        # the originals still being written must land before the stores close
+        options["writer"].shutdown(wait=True)
+    if options["owns_extraction"]:
+        options["extraction"].close()
+    if options["batcher"] is not None:
+        options["batcher"].close()
+    if options["attachments"] is not None:
+        options["attachments"].close()
+
+
+def process_cvs(target_job_title=None, max_emails=50, verbose=True, batch_size=GMAIL_BATCH_SIZE,
+                incremental=False, query=DEFAULT_QUERY, flush_every=10, storage_format="json",
+                candidate_repository=None, download_workers=4, extract_workers=None, llm_workers=4,
+                queue_size=16, service_factory=None, use_llm_cache=True, deduplicate_attachments=True,
+                extraction_timeout=60, persist_attachments="sync", token_budget=DEFAULT_TOKEN_BUDGET,
+                llm_batch_size=1, stage_observer=None, metrics_file=None, prometheus_file=None, profile_file=None,
+                extraction_service=None, should_stop=None):
+    """Collect the CVs sent for ``target_job_title``.
+
+    ``metrics_file`` / ``prometheus_file`` receive the timings and counters of
+    the run (JSON report, Prometheus textfile); ``profile_file`` the cProfile
+    stats of the whole run. ``extraction_service`` is an ``ExtractionService``
+    shared between runs (left open). When ``should_stop()`` becomes true the
+    run stops taking new emails, finishes the CVs in flight and returns with
+    ``stopped`` set; the incremental checkpoint is then left where it was.
+    """
+    if not target_job_title:
+        raise ValueError("target_job_title is required")
+
+    metrics = RunMetrics({"run": "process_cvs", "job_title": target_job_title})
+    with profiled(profile_file):
+        if verbose:
+            print("🚀 Démarrage du traitement (processor)...")
+
+        cv_folder, json_file = create_output_paths(target_job_title)
+        if verbose:
+            print(f"📁 CV folder: {cv_folder}")
+            print(f"📄 JSON file: {json_file}")
+            print("🔌 Connexion à Gmail...")
+
+        service = (service_factory or get_gmail_service)()
+        if verbose:
+            print("✅ Connexion Gmail obtenue")
+
+        with metrics.span("list"):
+            message_ids, checkpoint = _list_message_ids(service, target_job_title, max_emails, incremental,
+                                                        verbose, query)
+
+        options = _build_options(
+            verbose, batch_size=batch_size, candidate_repository=candidate_repository,
+            download_workers=download_workers, extract_workers=extract_workers, llm_workers=llm_workers,
+            queue_size=queue_size, service_factory=service_factory, use_llm_cache=use_llm_cache,
+            deduplicate_attachments=deduplicate_attachments, extraction_timeout=extraction_timeout,
+            persist_attachments=persist_attachments, token_budget=token_budget, llm_batch_size=llm_batch_size,
+            stage_observer=stage_observer, metrics=metrics, extraction_service=extraction_service,
+            should_stop=should_stop,
+        )
+        store = open_candidate_store(json_file, storage_format, flush_every=flush_every)
+        destination = Destination(store, cv_folder, None)
+
+        def _route(meta):
+            if not meta["job_title"]:
+                return None
+            if not job_titles_match(meta["job_title"], target_job_title):
+                options["log"](f"⏭️ Poste '{meta['job_title']}' ne correspond pas à '{target_job_title}' — skip")
+                return None
+            return destination
+
         try:
-            msg_data = service.users().messages().get(userId="me", id=msg["id"], format="full").execute()
-        except Exception as e:
-            print(f"❌ Erreur récupération email {msg.get('id')}: {e}")
-            continue
+            result = _process_messages(service, message_ids, _route, store.is_email_already_processed, options)
+        finally:
+            _close_options(options)
+            saved = store.close()
+            if not saved:
+                print("❌ Échec sauvegarde JSON")
 
-        if is_email_already_processed(msg["id"], json_file):
-            print(f"⏭️ Email {msg['id']} déjà traité — skip")
-            continue
+        # only move the checkpoint forward once every new message has been read
+        # and saved, otherwise the failed ones would never be listed again
+        if checkpoint and checkpoint[1] and saved and not result["errors"] and not result["stopped"]:
+            save_checkpoint(checkpoint[0], target_job_title, checkpoint[1])
 
-        payload = msg_data.get("payload", {})
-        headers = payload.get("headers", [])
+        # the JSON array export is rebuilt off the critical path
+        if storage_format == "jsonl" and result["processed"]:
+            compact_jsonl_in_background(store.json_file, json_file)
 
-        sender_full = next((h["value"] for h in headers if h["name"].lower() == "from"), "Unknown")
-        subject = next((h["value"] for h in headers if h["name"].lower() == "subject"), "No Subject")
-        print(f"De: {sender_full}")
-        print(f"Sujet: {subject}")
+        result.update({"cv_folder": cv_folder, "json_file": json_file, "store_file": store.json_file})
 
-        email_job_title = extract_job_title_from_subject(subject)
-        if not email_job_title:
-            print("⚠️ Aucun poste détecté dans l'objet — skip")
-            filtered_out += 1
-            continue
+    _export_metrics(metrics, result, verbose, metrics_file, prometheus_file)
+    return result
+
+
+def route_cvs(job_offer_repository=None, offers=None, max_emails=50, verbose=True, incremental=False,
+              query=DEFAULT_QUERY, flush_every=10, storage_format="json", min_score=DEFAULT_MIN_SCORE,
+              metrics_file=None, prometheus_file=None, profile_file=None, **pipeline_options):
+    """Sort one pass over the mailbox into every open offer.
+
+    Offers come from ``job_offer_repository.list()`` (active ones only) or
+    from ``offers``. Each email goes to the offer whose title best matches
+    the one in its subject and is written to that offer's usual CV folder
+    and candidates file; emails matching no offer are listed in
+    ``candidates/unmatched_<date>.json``. ``pipeline_options`` are the tuning
+    arguments of ``process_cvs`` (workers, cache, batching...); the metrics
+    and profile files are written as in ``process_cvs``.
+    """
+    if offers is not None:
+        index = OfferIndex(offers, min_score)
+    elif job_offer_repository is not None:
+        index = OfferIndex.from_repository(job_offer_repository, min_score)
+    else:
+        raise ValueError("job_offer_repository or offers is required")
+    if not len(index):
+        raise ValueError("aucune offre active à router")
+
+    metrics = RunMetrics({"run": "route_cvs"})
+    with profiled(profile_file):
+        if verbose:
+            print(f"🚀 Routage des candidatures vers {len(index)} offre(s) ouverte(s)...")
+            print("🔌 Connexion à Gmail...")
+        service = (pipeline_options.get("service_factory") or get_gmail_service)()
+        with metrics.span("list"):
+            message_ids, checkpoint = _list_message_ids(service, ALL_OFFERS, max_emails, incremental, verbose, query)
+
+        # one destination per distinct output file: two offers with the same title share it
+        destinations = {}
+
+        def _destination(offer):
+            key = make_safe_job_title(offer.title)
+            if key not in destinations:
+                cv_folder, json_file = create_output_paths(offer.title)
+                store = open_candidate_store(json_file, storage_format, flush_every=flush_every)
+                destinations[key] = Destination(store, cv_folder, offer.title)
+            return destinations[key]
+
+        # offers with candidates already saved today are opened up front so that
+        # their emails are skipped before any fetch; the others open on first use
+        for offer in index.offers:
+            _, json_file = output_paths(offer.title)
+            if os.path.exists(json_file) or os.path.exists(jsonl_path_for(json_file)):
+                _destination(offer)
 
-        print(f"💼 Poste détecté dans l'objet: {email_job_title}")
-        if not job_titles_match(email_job_title, target_job_title):
-            print(f"⏭️ Poste '{email_job_title}' ne correspond pas à '{target_job_title}' — skip")
-            filtered_out += 1
+        unmatched_file = create_unmatched_path()
+        unmatched = CandidateStore(unmatched_file)
+        unmatched_ids = set()
+
+        def _route(meta):
+            match = index.match(meta["job_title"])
+            if match is not None:
+                options["log"](f"🧭 Offre retenue: {match.offer.title} (score {match.score:.2f})")
+                return _destination(match.offer)
+
+            options["log"]("❓ Aucune offre ouverte ne correspond — candidature mise de côté")
+            unmatched_ids.add(meta["msg_id"])
+            if not unmatched.is_email_already_processed(meta["msg_id"]):
+                ranked = index.rank(meta["job_title"]) if meta["job_title"] else []
+                unmatched.append({
+                    "source_email_id": meta["msg_id"],
+                    "application_datetime": meta["application_datetime"],
+                    "sender": meta["sender"],
+                    "subject": meta["subject"],
+                    "detected_job_title": meta["job_title"],
+                    "closest_offer": ranked[0].offer.title if ranked else None,
+                    "closest_score": round(ranked[0].score, 3) if ranked else None,
+                })
+            return None
+
+        def _is_known(msg_id):
+            return any(d.store.is_email_already_processed(msg_id) for d in destinations.values())
+
+        options = _build_options(verbose, metrics=metrics, **pipeline_options)
+        processed_by = Counter()
+        try:
+            result = _process_messages(service, message_ids, _route, _is_known, options, processed_by)
+        finally:
+            _close_options(options)
+            saved = unmatched.close()
+            for destination in destinations.values():
+                saved = destination.store.close() and saved
+            if not saved:
+                print("❌ Échec sauvegarde JSON")
+
+        if checkpoint and checkpoint[1] and saved and not result["errors"] and not result["stopped"]:
+            save_checkpoint(checkpoint[0], ALL_OFFERS, checkpoint[1])
+
+        offers_result = {}
+        for destination in destinations.values():
+            processed = processed_by[destination.store.json_file]
+            if storage_format == "jsonl" and processed:
+                compact_jsonl_in_background(destination.store.json_file, output_paths(destination.job_title)[1])
+            offers_result[destination.job_title] = {
+                "processed": processed,
+                "cv_folder": destination.cv_folder,
+                "store_file": destination.store.json_file,
+            }
+
+        result.update({"offers": offers_result, "unmatched": len(unmatched_ids), "unmatched_file": unmatched_file})
+
+    _export_metrics(metrics, result, verbose, metrics_file, prometheus_file)
+    return result
+
+
+def _export_metrics(metrics, result, verbose, metrics_file=None, prometheus_file=None):
+    metrics.count(result)
+    metrics.finish()
+    result["metrics"] = metrics.to_dict()
+    if verbose:
+        print(f"⏱️ Temps par étape: {metrics.format_summary()}")
+    if metrics_file:
+        metrics.write_report(metrics_file)
+    if prometheus_file:
+        metrics.write_prometheus(prometheus_file)
+
+
+def _iter_cv_attachments(payload):
+    parts = payload.get("parts", []) or [payload]
+    for part in parts:
+        filename = part.get("filename", "")
+        body = part.get("body", {})
+        if not filename:
             continue
+        if filename.lower().endswith((".pdf", ".docx")) and "attachmentId" in body:
+            yield filename, body["attachmentId"]
+
 
-        date_header = next((h["value"] for h in headers if h["name"].lower() == "date"), None)
+def _save_attachment(cv_folder, filename, file_data):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base, ext = os.path.splitext(filename)
+    safe_filename = f"{timestamp}_{filename}"
+    n = 1
+    while True:
+        filepath = os.path.join(cv_folder, safe_filename)
         try:
-            application_datetime = datetime.strptime(date_header[:-6], "%a, %d %b %Y %H:%M:%S").isoformat()
-        except Exception:
-            application_datetime = datetime.now().isoformat()
+            # exclusive creation: two workers saving the same name in the same second don't clash
+            with open(filepath, "xb") as f:
+                f.write(file_data)
+            return filepath
+        except FileExistsError:
+            safe_filename = f"{timestamp}_{base}_{n}{ext}"
+            n += 1
+
+
+def _triage(service, message_ids, route, is_known, batch_size, counts, metrics, log=print, should_stop=None):
+    """Phase 1: drop already-processed IDs, then route on headers only.
+
+    ``route(meta)`` returns the ``Destination`` of a message or None to
+    leave it out. Returns ``{msg_id: (destination, email_job_title,
+    application_datetime)}`` for the messages worth downloading.
+    """
+    pending_ids = [msg_id for msg_id in message_ids if not is_known(msg_id)]
+    counts["skipped"] = len(message_ids) - len(pending_ids)
+    if counts["skipped"]:
+        log(f"⏭️ {counts['skipped']} email(s) déjà traité(s) — skip")
+
+    selected = {}
+    total = len(pending_ids)
+    fetched = fetch_messages(service, pending_ids, fmt="metadata", batch_size=batch_size,
+                             metadata_headers=TRIAGE_HEADERS)
+    # "fetch" is the wait on Gmail, "triage" the header parsing and routing
+    for idx, (msg_id, msg_meta, error) in enumerate(metrics.timed("fetch", fetched), start=1):
+        if should_stop is not None and should_stop():
+            break
+        log(f"--- Email {idx}/{total} (id={msg_id}) ---")
+        if error is not None:
+            print(f"❌ Erreur récupération email {msg_id}: {error}")
+            counts["errors"] += 1
+            continue
+
+        with metrics.span("triage"):
+            headers = msg_meta.get("payload", {}).get("headers", [])
+            sender_full = _get_header(headers, "from", "Unknown")
+            subject = _get_header(headers, "subject", "No Subject")
+            log(f"De: {sender_full}")
+            log(f"Sujet: {subject}")
 
-        parts = payload.get("parts", []) or [payload]
-        cv_found = False
+            email_job_title = extract_job_title_from_subject(subject)
+            if email_job_title:
+                log(f"💼 Poste détecté dans l'objet: {email_job_title}")
+            else:
+                log("⚠️ Aucun poste détecté dans l'objet — skip")
 
-        for part in parts:
-            filename = part.get("filename", "")
-            body = part.get("body", {})
-            if not filename:
+            application_datetime = _parse_application_datetime(_get_header(headers, "date"))
+            destination = route({
+                "msg_id": msg_id,
+                "sender": sender_full,
+                "subject": subject,
+                "job_title": email_job_title,
+                "application_datetime": application_datetime,
+            })
+            if destination is None:
+                counts["filtered"] += 1
+                continue
+            if destination.store.is_email_already_processed(msg_id):
+                counts["skipped"] += 1
                 continue
-            if filename.lower().endswith((".pdf", ".docx")) and "attachmentId" in body:
-                cv_found = True
-                print(f"📎 Pièce jointe trouvée: {filename}")
-                try:
-                    attachment = service.users().messages().attachments().get(userId="me", messageId=msg["id"], id=body["attachmentId"]).execute()
-                    file_data = base64.urlsafe_b64decode(attachment.get("data", ""))
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    safe_filename = f"{timestamp}_{filename}"
-                    filepath = os.path.join(cv_folder, safe_filename)
-                    with open(filepath, "wb") as f:
-                        f.write(file_data)
-                    print(f"💾 CV sauvegardé: {filepath}")
-
-                    cv_text = extract_text(filepath)
-                    if not cv_text or len(cv_text) < 50:
-                        print("⚠️ Texte extrait trop court — skip")
-                        continue
-
-                    print(f"📄 Texte extrait ({len(cv_text)} caractères). Envoi au LLM...")
-                    cv_data = extract_cv_data_with_llm(cv_text)
-                    if not cv_data:
-                        print("⚠️ LLM n'a pas renvoyé de données valides — skip")
-                        continue
-
-                    cv_data = ensure_json_structure(cv_data, email_job_title)
-                    next_cv, next_candidate = get_next_ids(json_file)
-                    cv_data["cv_id"] = f"CAND-{next_cv:03d}"
-                    cv_data["candidate_id"] = f"PERS-{next_candidate:03d}"
-                    cv_data["source_email_id"] = msg["id"]
-                    cv_data["application_datetime"] = application_datetime
-
-                    cv_data = reorder_json_fields(cv_data)
-                    if append_candidate_to_json(cv_data, json_file):
-                        cv_count += 1
-                        print(f"✅ Candidat ajouté: {cv_data.get('full_name') or 'Inconnu'} ({cv_data['candidate_id']})")
-                    else:
-                        print("❌ Échec sauvegarde JSON")
-                except Exception as e:
-                    print(f"❌ Erreur processing piece jointe: {e}")
-                    continue
-
-        if not cv_found:
-            print("📭 Aucun CV trouvé dans cet email")
-
-
-    return {"processed": cv_count, "filtered": filtered_out, "cv_folder": cv_folder, "json_file": json_file}
+            selected[msg_id] = (destination, email_job_title, application_datetime)
+    return selected
+
+
+def _process_messages(service, message_ids, route, is_known, options, processed_by=None):
+    counts = {"processed": 0, "filtered": 0, "skipped": 0, "errors": 0, "failed": 0, "reused": 0,
+              "write_errors": 0, "db_errors": 0, "tokens_saved": 0, "repaired": 0, "reprompted": 0, "llm_cache_hits": 0,
+              "stopped": False}
+    batch_size = options["batch_size"]
+    candidate_repository = options["candidate_repository"]
+    service_factory = options["service_factory"]
+    attachments = options["attachments"]
+    extraction = options["extraction"]
+    persist = options["persist"]
+    writer = options["writer"]
+    batcher = options["batcher"]
+    metrics = options["metrics"]
+    log = options["log"]
+    should_stop = options["should_stop"]
+
+    selected = _triage(service, message_ids, route, is_known, batch_size, counts, metrics, log, should_stop)
+
+    # Phase 2 — full payloads, only for the messages that passed the filter,
+    # then one pipeline job per CV attachment
+    if options["verbose"] and selected:
+        print(f"📥 Téléchargement de {len(selected)} email(s) retenu(s)")
+
+    counts_lock = threading.Lock()
+
+    def _count(name, amount=1):
+        # the feeder, the async writer and this thread all update the counters
+        with counts_lock:
+            counts[name] += amount
+
+    def _attachment_jobs():
+        fetched = fetch_messages(service, list(selected), fmt="full", batch_size=batch_size)
+        for msg_id, msg_data, error in metrics.timed("fetch", fetched):
+            if error is not None:
+                print(f"❌ Erreur récupération email {msg_id}: {error}")
+                _count("errors")
+                continue
+
+            destination, email_job_title, application_datetime = selected[msg_id]
+            cv_attachments = list(_iter_cv_attachments(msg_data.get("payload", {})))
+            if not cv_attachments:
+                log(f"📭 Aucun CV trouvé dans l'email {msg_id}")
+                continue
+            for filename, attachment_id in cv_attachments:
+                yield {
+                    "msg_id": msg_id,
+                    "filename": filename,
+                    "attachment_id": attachment_id,
+                    "job_title": destination.job_title or email_job_title,
+                    "application_datetime": application_datetime,
+                    "destination": destination,
+                }
+
+    local = threading.local()
+
+    def _download(job):
+        if not hasattr(local, "service"):
+            local.service = service_factory()
+        attachment = local.service.users().messages().attachments().get(
+            userId="me", messageId=job["msg_id"], id=job["attachment_id"]
+        ).execute()
+        file_data = base64.urlsafe_b64decode(attachment.get("data", ""))
+
+        if attachments is not None:
+            # same bytes already seen (forward, reminder, another job): reuse what was extracted
+            job["sha256"] = hash_bytes(file_data)
+            previous = attachments.lookup(job["sha256"])
+            if previous and previous["cv_text"]:
+                job["cv_text"] = previous["cv_text"]
+                job["reused"] = True
+                if previous["cv_data"]:
+                    job["cv_data"] = previous["cv_data"]
+
+        if persist == "sync":
+            job["filepath"] = _write_original(job["destination"].cv_folder, job["filename"], file_data)
+        elif persist == "async":
+            writer.submit(_write_original, job["destination"].cv_folder, job["filename"],
+                          file_data).add_done_callback(_on_written)
+        if not job.get("cv_text"):
+            # extraction reads from memory, the file on disk is not needed
+            job["file_data"] = file_data
+        return job
+
+    def _write_original(cv_folder, filename, file_data):
+        if attachments is None:
+            return _save_attachment(cv_folder, filename, file_data)
+        _, blob_path, _ = attachments.add(file_data, filename)
+        return attachments.link(blob_path, cv_folder, filename)
+
+    def _on_written(future):
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Échec écriture pièce jointe: {error}")
+            _count("write_errors")
+
+    def _extract(job):
+        if job.get("cv_text"):
+            return job
+        result = extraction.extract(job.pop("file_data"), job["filename"])
+        if result.error:
+            raise RuntimeError(result.error)
+        if not result.text or len(result.text) < 50:
+            raise SkipItem("Texte extrait trop court")
+        job["cv_text"] = result.text
+        job["truncated"] = result.truncated
+        return job
+
+    def _compact(job):
+        # only the prompt is compacted: the raw text is what gets recorded
+        if job.get("cv_data"):
+            return job
+        job["compaction"] = compact_cv_text(job["cv_text"], options["token_budget"])
+        return job
+
+    def _analyze(job):
+        if job.get("cv_data"):
+            return job
+        if batcher is not None:
+            cv_data = batcher.extract(job["compaction"].text)
+        else:
+            job["llm_report"] = new_report()
+            cv_data = extract_cv_data_with_llm(job["compaction"].text, use_cache=options["use_llm_cache"],
+                                               report=job["llm_report"])
+        if not cv_data:
+            raise SkipItem("LLM n'a pas renvoyé de données valides")
+        job["cv_data"] = cv_data
+        return job
+
+    def _persist(result):
+        # runs on this thread, in attachment order: IDs and writes stay deterministic
+        job = result.item
+        log(f"📎 Pièce jointe: {job['filename']} (email {job['msg_id']})")
+        if job.get("filepath"):
+            log(f"💾 CV sauvegardé: {job['filepath']}")
+        if isinstance(result.error, SkipItem):
+            log(f"⚠️ {result.error} — skip")
+            if attachments is not None and job.get("cv_text"):
+                # keep the text so a later copy of this file skips extraction
+                attachments.record_extraction(job["sha256"], job["cv_text"])
+            return
+        if result.error is not None:
+            print(f"❌ Erreur processing piece jointe ({result.stage}): {result.error}")
+            _count("failed")
+            return
+
+        if job.get("reused"):
+            log(f"♻️ Pièce jointe déjà analysée (sha256 {job['sha256'][:12]}) — extraction réutilisée")
+            _count("reused")
+        else:
+            truncated = " (tronqué)" if job.get("truncated") else ""
+            log(f"📄 Texte extrait ({len(job['cv_text'])} caractères{truncated}), analysé par le LLM")
+        compaction = job.get("compaction")
+        if compaction is not None:
+            saved = compaction.tokens_before - compaction.tokens_after
+            _count("tokens_saved", saved)
+            over_budget = ", budget atteint" if compaction.truncated else ""
+            log(f"✂️ Prompt compacté: {compaction.tokens_before} → {compaction.tokens_after} tokens "
+                  f"(-{saved * 100 // max(compaction.tokens_before, 1)}%{over_budget})")
+        llm_report = job.get("llm_report")
+        if llm_report:
+            if llm_report.get("cached"):
+                _count("llm_cache_hits")
+            if llm_report["repairs"]:
+                _count("repaired")
+                log(f"🩹 Réponse LLM réparée localement ({', '.join(llm_report['repairs'])})")
+            if llm_report.get("reprompted"):
+                _count("reprompted")
+                log("🔁 Réponse LLM irréparable — relance ciblée")
+            if llm_report["missing"]:
+                log(f"⚠️ Champs absents de la réponse LLM: {', '.join(llm_report['missing'])}")
+        try:
+            if attachments is not None:
+                attachments.record_extraction(job["sha256"], job["cv_text"], job["cv_data"])
+            store = job["destination"].store
+            cv_data = ensure_json_structure(dict(job["cv_data"]), job["job_title"])
+            next_cv, next_candidate = store.get_next_ids()
+            cv_data["cv_id"] = f"CAND-{next_cv:03d}"
+            cv_data["candidate_id"] = f"PERS-{next_candidate:03d}"
+            cv_data["source_email_id"] = job["msg_id"]
+            cv_data["application_datetime"] = job["application_datetime"]
+
+            cv_data = reorder_json_fields(cv_data)
+            if store.append(cv_data):
+                _count("processed")
+                if processed_by is not None:
+                    processed_by[store.json_file] += 1
+                log(f"✅ Candidat ajouté: {cv_data.get('full_name') or 'Inconnu'} ({cv_data['candidate_id']})")
+                if candidate_repository is not None:
+                    try:
+                        candidate_repository.add(cv_data, source_file=os.path.basename(store.json_file))
+                    except Exception as e:
+                        # the candidate is saved in the JSON file: only its copy in the database is missing
+                        print(f"⚠️ Échec copie en base du candidat {cv_data['cv_id']}: {e}")
+                        _count("db_errors")
+            else:
+                print("❌ Échec sauvegarde JSON")
+        except Exception as e:
+            print(f"❌ Erreur processing piece jointe: {e}")
+            _count("failed")
+
+    workers = options["workers"]
+    stages = [
+        Stage("download", _download, workers["download"]),
+        Stage("extract", _extract, extraction.max_workers),
+        # pure CPU: more threads would only contend for the GIL
+        Stage("compact", _compact, 1),
+        Stage("llm", _analyze, workers["llm"] * (batcher.max_batch_size if batcher is not None else 1)),
+    ]
+    stage_observer = options["stage_observer"]
+
+    def _observe(stage, seconds, error):
+        # a skipped CV (text too short, empty answer) is not a stage failure
+        failed = error is not None and not isinstance(error, SkipItem)
+        metrics.observe("persist" if stage == "sink" else stage, seconds, failed)
+        if stage_observer is not None:
+            stage_observer(stage, seconds, error)
+
+    run_pipeline(_attachment_jobs(), stages, _persist, queue_size=options["queue_size"],
+                 should_stop=should_stop, observer=_observe)
+    counts["stopped"] = bool(should_stop is not None and should_stop())
+    if batcher is not None:
+        # the batcher is per run: its totals are this run's
+        _count("llm_cache_hits", batcher.cache_hits)
+        _count("repaired", batcher.repaired)
+        _count("reprompted", batcher.reprompted)
+    return counts
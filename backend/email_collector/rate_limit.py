@@ -0,0 +1,78 @@
+"""Asyncio rate limiting and retry helpers for the Groq client.
+
+Groq enforces both a requests-per-minute and a tokens-per-minute quota; one
+``TokenBucket`` per quota keeps the client under both instead of finding the
+limits through HTTP 429 responses.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` tokens a minute."""
+
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until ``amount`` tokens are available, then take them.
+
+        Requests larger than the bucket are capped to its capacity so they
+        wait for a full bucket instead of forever.
+        """
+        amount = min(float(amount), self.capacity)
+        # the lock makes waiters queue up in order instead of racing on refills
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) used for TPM budgeting."""
+    return len(text or "") // 4 + 1
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds of a ``Retry-After`` header, or None."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=1.0, maximum=60.0, retry_after=None):
+    """Delay before retry number ``attempt`` (0-based).
+
+    Full-jitter exponential backoff, except when the server said how long to
+    wait: ``Retry-After`` is then honored, plus a little jitter so that the
+    waiting requests do not all come back at the same instant.
+    """
+    if retry_after is not None:
+        return min(maximum, retry_after) + random.uniform(0, base / 4)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
@@ -0,0 +1,243 @@
+"""Skill-fit scoring of candidates against job offers.
+
+Skills and languages are canonicalized first (``canonical_skill``,
+``language_term``) so that "Postgres", "PostgreSQL" and "postgresql" are one
+term. ``SkillFitScorer`` is built once for a candidate pool: every candidate
+becomes a TF-IDF row of a sparse matrix, weighted by the field the term comes
+from (technical skills > languages > secondary skills > soft skills) and by
+its rarity in the pool, so that a skill few candidates have weighs more than
+one they all list. An offer has no skill list: its row is made of the pool's
+terms found in its title and description. All the fit scores (cosine
+similarity) of the pool against any number of offers are one matrix product,
+and ``top_k`` keeps the best candidates per offer.
+
+NumPy is required; SciPy, when installed, is used for the sparse product.
+"""
+
+import re
+import math
+from collections import Counter, namedtuple
+
+try:
+    from .utils import normalize_job_title
+except Exception:
+    from utils import normalize_job_title
+
+
+# weight of a term by the candidate field it comes from
+FIELD_WEIGHTS = {
+    "technical_skills": 1.0,
+    "languages": 0.6,
+    "secondary_skills": 0.5,
+    "soft_skills": 0.3,
+}
+# an offer term found in the title counts as this many mentions
+TITLE_WEIGHT = 2.0
+# longest skill looked for in an offer text, in words ("google cloud platform")
+MAX_TERM_WORDS = 4
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "postgres": "postgresql",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue.js",
+    "powerbi": "power bi",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "sklearn": "scikit learn",
+    "gcp": "google cloud platform",
+    "aws": "amazon web services",
+    "ml": "machine learning",
+}
+LANGUAGE_ALIASES = {
+    "anglais": "english",
+    "francais": "french",
+    "espagnol": "spanish",
+    "allemand": "german",
+    "italien": "italian",
+    "portugais": "portuguese",
+    "arabe": "arabic",
+    "chinois": "chinese",
+    "mandarin": "chinese",
+    "neerlandais": "dutch",
+    "russe": "russian",
+    "japonais": "japanese",
+}
+LANGUAGE_PREFIX = "lang:"
+
+CandidateFit = namedtuple("CandidateFit", ["candidate", "score", "skills"])
+
+
+def _words(text):
+    # keeps c++, c#, node.js, .net
+    return re.findall(r"[a-z0-9+#.]*[a-z0-9+#]", normalize_job_title(text))
+
+
+def canonical_skill(skill):
+    """Lowercase, accent-free, single-spaced form of ``skill``, aliases resolved."""
+    if not isinstance(skill, str):
+        return ""
+    text = " ".join(_words(skill))
+    return SKILL_ALIASES.get(text, text)
+
+
+def language_term(language):
+    """``lang:<name>`` term of a ``{"language", "level"}`` entry (or a bare name)."""
+    name = language.get("language") if isinstance(language, dict) else language
+    name = canonical_skill(name)
+    if not name:
+        return ""
+    return LANGUAGE_PREFIX + LANGUAGE_ALIASES.get(name, name)
+
+
+def candidate_terms(candidate):
+    """``{term: field weight}`` of a candidate record; a term listed in several
+    fields keeps its best weight."""
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for value in candidate.get(field) or []:
+            term = language_term(value) if field == "languages" else canonical_skill(value)
+            if term and weight > terms.get(term, 0.0):
+                terms[term] = weight
+    return terms
+
+
+def _offer_text(offer):
+    if isinstance(offer, dict):
+        return offer.get("title") or "", offer.get("description") or ""
+    return getattr(offer, "title", None) or "", getattr(offer, "description", None) or ""
+
+
+def offer_terms(offer, vocabulary):
+    """``{term: weight}`` of the ``vocabulary`` terms mentioned by ``offer``
+    (a ``JobOffer`` or a dict with ``title`` / ``description``)."""
+    mentions = Counter()
+    title, description = _offer_text(offer)
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1.0)):
+        words = _words(text)
+        for size in range(1, MAX_TERM_WORDS + 1):
+            for start in range(len(words) - size + 1):
+                gram = " ".join(words[start:start + size])
+                for term in (SKILL_ALIASES.get(gram, gram), LANGUAGE_PREFIX + LANGUAGE_ALIASES.get(gram, gram)):
+                    if term in vocabulary:
+                        mentions[term] += weight
+    # sublinear: a skill repeated ten times is not ten times as required
+    return {term: 1.0 + math.log(count) for term, count in mentions.items()}
+
+
+class SkillFitScorer:
+    """TF-IDF skill vectors of a candidate pool, scored against offers.
+
+    ``candidates`` are records in the ``storage`` JSON format. The pool is
+    read once; scoring a new batch of offers only builds their rows.
+    """
+
+    def __init__(self, candidates):
+        import numpy as np
+
+        self.candidates = list(candidates)
+        self._terms = [candidate_terms(candidate) for candidate in self.candidates]
+        frequencies = Counter(term for terms in self._terms for term in terms)
+        self.vocabulary = {term: column for column, term in enumerate(sorted(frequencies))}
+        # smoothed idf, as in scikit-learn: never zero, even for a term every candidate has
+        count = len(self.candidates)
+        self.idf = np.ones(len(self.vocabulary), dtype=np.float32)
+        for term, column in self.vocabulary.items():
+            self.idf[column] = math.log((1 + count) / (1 + frequencies[term])) + 1.0
+        self._matrix = self._rows(self._terms)
+
+    def _rows(self, rows):
+        """L2-normalized TF-IDF rows as (indptr, indices, data), or a SciPy CSR matrix."""
+        import numpy as np
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indices, weights = [], []
+        for row, terms in enumerate(rows):
+            for term, weight in terms.items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    indices.append(column)
+                    weights.append(weight)
+            indptr[row + 1] = len(indices)
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(weights, dtype=np.float32) * self.idf[indices]
+        row_ids = np.repeat(np.arange(len(rows)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=len(rows))).astype(np.float32)
+        data /= norms[row_ids]
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            return indptr, indices, data
+        return csr_matrix((data, indices, indptr), shape=(len(rows), len(self.vocabulary)))
+
+    def offer_matrix(self, offers):
+        """Dense (offers x vocabulary) matrix of L2-normalized offer rows."""
+        import numpy as np
+
+        matrix = np.zeros((len(offers), len(self.vocabulary)), dtype=np.float32)
+        for row, offer in enumerate(offers):
+            for term, weight in offer_terms(offer, self.vocabulary).items():
+                column = self.vocabulary[term]
+                matrix[row, column] = weight * self.idf[column]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    def scores(self, offers):
+        """(offers x candidates) cosine similarities, in [0, 1]."""
+        import numpy as np
+
+        offers_t = self.offer_matrix(offers).T
+        if not isinstance(self._matrix, tuple):
+            return np.asarray(self._matrix @ offers_t).T
+        # without SciPy: densify a block of candidates at a time (~16 MB each)
+        indptr, indices, data = self._matrix
+        result = np.zeros((len(offers), len(self.candidates)), dtype=np.float32)
+        block = max(1, (1 << 22) // max(1, len(self.vocabulary)))
+        for start in range(0, len(self.candidates), block):
+            stop = min(start + block, len(self.candidates))
+            dense = np.zeros((stop - start, len(self.vocabulary)), dtype=np.float32)
+            rows = np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1]))
+            dense[rows, indices[indptr[start]:indptr[stop]]] = data[indptr[start]:indptr[stop]]
+            result[:, start:stop] = (dense @ offers_t).T
+        return result
+
+    def top_k(self, offers, k=10):
+        """The ``k`` best-fitting candidates of each offer, best first, as
+        ``CandidateFit`` (candidate, score, matched skills). Candidates with
+        no skill in common with the offer are left out."""
+        import numpy as np
+
+        offers = list(offers)
+        if not offers or not self.candidates or k <= 0:
+            return [[] for _ in offers]
+        scores = self.scores(offers)
+        k = min(k, len(self.candidates))
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+
+        results = []
+        for row, offer in enumerate(offers):
+            wanted = None
+            fits = []
+            for index in best[row]:
+                score = float(scores[row, index])
+                if score <= 0:
+                    break
+                if wanted is None:
+                    wanted = offer_terms(offer, self.vocabulary)
+                skills = sorted(term for term in self._terms[index] if term in wanted)
+                fits.append(CandidateFit(self.candidates[index], score, skills))
+            results.append(fits)
+        return results
+
+
+def rank_candidates(candidates, offers, k=10):
+    """``SkillFitScorer(candidates).top_k(offers, k)``."""
+    return SkillFitScorer(candidates).top_k(offers, k)
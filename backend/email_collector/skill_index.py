@@ -0,0 +1,325 @@
+"""Inverted index of candidate skills and languages, with boolean queries.
+
+Every candidate of the ``candidates_*.json`` / ``.jsonl`` files gets a
+number, and every canonical skill or language (``skill_fit.canonical_skill``,
+``skill_fit.language_term``) the sorted array of the numbers of the
+candidates that have it. Language levels and the length of the lists
+(experiences, educations...) are indexed the same way. A query combines those
+postings as bitmaps (Python ints, built on first use and kept up to date),
+so answering it costs a few big-int operations whatever the size of the pool::
+
+    index = SkillIndex.from_folder()
+    index.search('python AND sql AND (english C1 OR french C2) AND NOT "power bi" AND experiences>=3')
+
+Bare words next to each other are ANDed; quote skills of several words. A
+language followed by a level (A1..C2, courant, natif...) means that level or
+better. ``watch()`` subscribes the index to ``storage`` appends so it follows
+the collector without rereading the files.
+"""
+
+import os
+import re
+import glob
+import threading
+from array import array
+from collections import namedtuple
+
+try:
+    from .paths import MAIN_CANDIDATES_FOLDER, data_dir
+    from .skill_fit import canonical_skill, language_term
+    from .storage import add_append_listener, remove_append_listener, iter_jsonl_records, load_existing_data
+except Exception:
+    from paths import MAIN_CANDIDATES_FOLDER, data_dir
+    from skill_fit import canonical_skill, language_term
+    from storage import add_append_listener, remove_append_listener, iter_jsonl_records, load_existing_data
+
+
+SKILL_FIELDS = ("technical_skills", "secondary_skills", "soft_skills")
+# lists whose length can be filtered on: experiences>=3, languages=2...
+COUNT_FIELDS = ("experiences", "educations", "languages", "technical_skills", "secondary_skills", "soft_skills")
+COUNT_ALIASES = {"skills": "technical_skills"}
+
+LEVELS = {"a1": 1, "a2": 2, "b1": 3, "b2": 4, "c1": 5, "c2": 6}
+LEVEL_ALIASES = {
+    "debutant": 1, "beginner": 1, "notions": 1, "scolaire": 2,
+    "intermediaire": 3, "intermediate": 3,
+    "courant": 5, "fluent": 5, "professionnel": 5,
+    "bilingue": 7, "natif": 7, "native": 7, "maternelle": 7, "langue maternelle": 7,
+}
+OPERATORS = {"and": "AND", "et": "AND", "or": "OR", "ou": "OR", "not": "NOT", "sauf": "NOT"}
+
+IndexedCandidate = namedtuple("IndexedCandidate", ["json_file", "cv_id", "full_name", "job_applied_for"])
+
+# keys carrying a value: "lang:english@5", "#experiences=3"
+_VALUE_KEY = re.compile(r"(lang:.*@|#.*=)(\d+)$")
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([a-z_]+)\s*(>=|<=|!=|=|>|<)\s*(\d+)|([^\s()"]+))', re.IGNORECASE)
+
+
+def language_level(level):
+    """Rank of a language level: A1 = 1 ... C2 = 6, native = 7, 0 if unknown."""
+    text = canonical_skill(level)
+    cefr = re.search(r"\b([abc][12])\b", text)
+    if cefr:
+        return LEVELS[cefr.group(1)]
+    if text in LEVEL_ALIASES:
+        return LEVEL_ALIASES[text]
+    return max((rank for word, rank in LEVEL_ALIASES.items() if word in text.split()), default=0)
+
+
+def candidate_tokens(candidate):
+    """Index keys of a candidate record: skills, languages, ``lang@level``
+    and ``#field=length``."""
+    tokens = set()
+    for field in SKILL_FIELDS:
+        for skill in candidate.get(field) or []:
+            term = canonical_skill(skill)
+            if term:
+                tokens.add(term)
+    for language in candidate.get("languages") or []:
+        term = language_term(language)
+        if term:
+            tokens.add(term)
+            if isinstance(language, dict):
+                tokens.add(f"{term}@{language_level(language.get('level'))}")
+    for field in COUNT_FIELDS:
+        values = candidate.get(field)
+        tokens.add(f"#{field}={len(values) if isinstance(values, list) else 0}")
+    return tokens
+
+
+def _to_bitmap(numbers):
+    if not len(numbers):
+        return 0
+    bits = bytearray((numbers[-1] >> 3) + 1)
+    for number in numbers:
+        bits[number >> 3] |= 1 << (number & 7)
+    return int.from_bytes(bits, "little")
+
+
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _numbers(bitmap):
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for position, byte in enumerate(data):
+        if byte:
+            for bit in _BYTE_BITS[byte]:
+                yield position * 8 + bit
+
+
+def _document_key(json_file, candidate):
+    # a .jsonl store and its compacted .json copy hold the same candidates
+    stem = os.path.splitext(os.path.basename(json_file or ""))[0]
+    return stem, candidate.get("cv_id") or candidate.get("source_email_id")
+
+
+class SkillIndex:
+    """Postings of skills, languages, levels and list lengths per candidate.
+
+    Thread-safe: the collector threads append while recruiters query.
+    """
+
+    def __init__(self):
+        self.documents = []
+        self._keys = set()
+        self._postings = {}
+        self._bitmaps = {}
+        # "lang:english@" -> {levels seen}, "#experiences=" -> {lengths seen}
+        self._values = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def from_folder(cls, folder=None):
+        """Index every ``candidates_*.json`` / ``.jsonl`` file of ``folder``
+        (the collector's candidates folder by default)."""
+        folder = folder or os.path.join(data_dir(), MAIN_CANDIDATES_FOLDER)
+        index = cls()
+        for path in sorted(glob.glob(os.path.join(folder, "candidates_*.json*"))):
+            if path.endswith(".jsonl"):
+                records = iter_jsonl_records(path)
+            elif path.endswith(".json"):
+                records = load_existing_data(path)
+            else:
+                continue
+            for candidate in records:
+                index.add(candidate, path)
+        return index
+
+    def add(self, candidate, json_file=None):
+        """Index one candidate record; returns False if it already is."""
+        key = _document_key(json_file, candidate)
+        tokens = candidate_tokens(candidate)
+        with self._lock:
+            if key[1] is not None:
+                if key in self._keys:
+                    return False
+                self._keys.add(key)
+            number = len(self.documents)
+            self.documents.append(IndexedCandidate(json_file, candidate.get("cv_id"), candidate.get("full_name"),
+                                                   candidate.get("job_applied_for")))
+            for token in tokens:
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = array("I")
+                    valued = _VALUE_KEY.match(token)
+                    if valued:
+                        self._values.setdefault(valued.group(1), set()).add(int(valued.group(2)))
+                posting.append(number)
+                if token in self._bitmaps:
+                    self._bitmaps[token] |= 1 << number
+        return True
+
+    def watch(self):
+        """Index every candidate ``storage`` appends to a candidates file from now on."""
+        if self._listener is None:
+            self._listener = add_append_listener(self._on_append)
+        return self
+
+    def _on_append(self, candidate, json_file):
+        # like from_folder: other stores (unmatched emails) are not candidates
+        if os.path.basename(json_file or "").startswith("candidates_"):
+            self.add(candidate, json_file)
+
+    def close(self):
+        if self._listener is not None:
+            remove_append_listener(self._listener)
+            self._listener = None
+
+    def _bitmap(self, token):
+        bitmap = self._bitmaps.get(token)
+        if bitmap is None:
+            posting = self._postings.get(token)
+            if posting is None:
+                return 0
+            bitmap = self._bitmaps[token] = _to_bitmap(posting)
+        return bitmap
+
+    def _matching(self, prefix, accept):
+        # OR of the postings "<prefix><value>" whose value passes ``accept``
+        bitmap = 0
+        for value in self._values.get(prefix, ()):
+            if accept(value):
+                bitmap |= self._bitmap(f"{prefix}{value}")
+        return bitmap
+
+    def is_language(self, text):
+        return language_term(text) in self._postings
+
+    def _term(self, text, min_level=None):
+        term = canonical_skill(text)
+        language = language_term(term)
+        if min_level is not None:
+            return self._matching(f"{language}@", lambda level: level >= min_level)
+        return self._bitmap(term) | self._bitmap(language)
+
+    def _count(self, field, operator, value):
+        field = COUNT_ALIASES.get(field.lower(), field.lower())
+        if field not in COUNT_FIELDS:
+            raise ValueError(f"unknown count field: {field} (expected one of {', '.join(COUNT_FIELDS)})")
+        accept = {
+            ">=": lambda n: n >= value, "<=": lambda n: n <= value, ">": lambda n: n > value,
+            "<": lambda n: n < value, "=": lambda n: n == value, "!=": lambda n: n != value,
+        }[operator]
+        return self._matching(f"#{field}=", accept)
+
+    def match(self, query):
+        """Bitmap of the candidates matching ``query`` (bit n = ``documents[n]``)."""
+        with self._lock:
+            return _Parser(self, query).parse()
+
+    def count(self, query):
+        return bin(self.match(query)).count("1")
+
+    def search(self, query, limit=None):
+        """``IndexedCandidate`` entries matching ``query``, in indexing order."""
+        results = []
+        for number in _numbers(self.match(query)):
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(self.documents[number])
+        return results
+
+
+class _Parser:
+    """Recursive descent over ``or := and (OR and)*``, ``and := not (AND? not)*``,
+    ``not := NOT not | ( or ) | field op number | term [level]``."""
+
+    def __init__(self, index, query):
+        self.index = index
+        self.universe = (1 << len(index.documents)) - 1
+        self.tokens = []
+        position = 0
+        query = query or ""
+        while query[position:].strip():
+            found = _TOKEN.match(query, position)
+            if not found:
+                raise ValueError(f"invalid query near: {query[position:]!r}")
+            position = found.end()
+            opening, closing, quoted, field, operator, number, word = found.groups()
+            if opening or closing:
+                self.tokens.append(("paren", opening or closing))
+            elif quoted is not None:
+                self.tokens.append(("term", quoted))
+            elif field:
+                self.tokens.append(("count", (field, operator, int(number))))
+            elif word.lower() in OPERATORS:
+                self.tokens.append(("op", OPERATORS[word.lower()]))
+            else:
+                self.tokens.append(("term", word))
+        self.position = 0
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return 0
+        bitmap = self._or()
+        if self.position < len(self.tokens):
+            raise ValueError(f"unexpected {self._peek()[1]!r} in query")
+        return bitmap
+
+    def _or(self):
+        bitmap = self._and()
+        while self._peek() == ("op", "OR"):
+            self._next()
+            bitmap |= self._and()
+        return bitmap
+
+    def _and(self):
+        bitmap = self._not()
+        while True:
+            kind, value = self._peek()
+            if (kind, value) == ("op", "AND"):
+                self._next()
+            elif kind not in ("term", "count") and (kind, value) not in (("op", "NOT"), ("paren", "(")):
+                return bitmap
+            bitmap &= self._not()
+
+    def _not(self):
+        kind, value = self._next()
+        if (kind, value) == ("op", "NOT"):
+            return self.universe & ~self._not()
+        if (kind, value) == ("paren", "("):
+            bitmap = self._or()
+            if self._next() != ("paren", ")"):
+                raise ValueError("missing ')' in query")
+            return bitmap
+        if kind == "count":
+            return self.index._count(*value)
+        if kind == "term":
+            next_kind, next_value = self._peek()
+            if next_kind == "term" and language_level(next_value) and self.index.is_language(value):
+                self._next()
+                return self.index._term(value, min_level=language_level(next_value))
+            return self.index._term(value)
+        raise ValueError(f"unexpected {value!r} in query" if kind else "incomplete query")
@@ -1,7 +1,39 @@
 import os
 import json
+import tempfile
+import threading
+import time
 from datetime import datetime
 
+try:
+    from .cv_schema import CV_SCHEMA
+except Exception:
+    from cv_schema import CV_SCHEMA
+
+
+_append_listeners = []
+
+
+def add_append_listener(listener):
+    """Call ``listener(candidate_data, json_file)`` for every candidate appended
+    from now on, by ``append_candidate_to_json`` or a candidate store."""
+    _append_listeners.append(listener)
+    return listener
+
+
+def remove_append_listener(listener):
+    if listener in _append_listeners:
+        _append_listeners.remove(listener)
+
+
+def _notify_append(candidate_data, json_file):
+    for listener in list(_append_listeners):
+        try:
+            listener(candidate_data, json_file)
+        except Exception as e:
+            # an index that fails must not lose the candidate that was saved
+            print(f"⚠️ Écouteur d'ajout en échec: {e}")
+
 
 def _read_json_file(json_file):
     if os.path.exists(json_file):
@@ -14,6 +46,7 @@ def _read_json_file(json_file):
         except json.JSONDecodeError:
             backup_file = f"{json_file}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             os.rename(json_file, backup_file)
+            print(f"⚠️ Fichier JSON corrompu, sauvegardé sous {backup_file}")
             return []
         except Exception:
             return []
@@ -24,26 +57,39 @@ def load_existing_data(json_file):
     return _read_json_file(json_file)
 
 
-def get_next_ids(json_file):
-    data = _read_json_file(json_file)
-    if not data:
-        return 1, 1
+def _write_json_atomic(json_file, data):
+    """Write ``data`` to a temp file in the same folder, then rename it over ``json_file``."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(json_file) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, json_file)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
-    cv_numbers = []
-    candidate_numbers = []
-    for item in data:
+def _last_ids(items):
+    last_cv = 0
+    last_candidate = 0
+    for item in items:
         try:
             if "cv_id" in item and item["cv_id"]:
-                cv_num = int(item["cv_id"].split("-")[1])
-                cv_numbers.append(cv_num)
+                last_cv = max(last_cv, int(item["cv_id"].split("-")[1]))
             if "candidate_id" in item and item["candidate_id"]:
-                cand_num = int(item["candidate_id"].split("-")[1])
-                candidate_numbers.append(cand_num)
+                last_candidate = max(last_candidate, int(item["candidate_id"].split("-")[1]))
         except Exception:
             continue
+    return last_cv, last_candidate
+
 
-    last_cv = max(cv_numbers) if cv_numbers else 0
-    last_candidate = max(candidate_numbers) if candidate_numbers else 0
+def get_next_ids(json_file):
+    data = _read_json_file(json_file)
+    if not data:
+        return 1, 1
+
+    last_cv, last_candidate = _last_ids(data)
     return last_cv + 1, last_candidate + 1
 
 
@@ -54,20 +100,9 @@ def ensure_json_structure(cv_data, job_title=None):
         "source_email_id": None,
         "application_datetime": None,
         "job_applied_for": job_title,
-        "first_name": None,
-        "last_name": None,
-        "full_name": None,
-        "email": None,
-        "phone_number": None,
-        "technical_skills": [],
-        "secondary_skills": [],
-        "soft_skills": [],
-        "languages": [],
-        "educations": [],
-        "experiences": [],
-        "interests": [],
-        "summary": None
     }
+    for key, spec in CV_SCHEMA.items():
+        template[key] = [] if isinstance(spec, list) else None
     for key, default in template.items():
         if key not in cv_data:
             cv_data[key] = default
@@ -97,13 +132,311 @@ def append_candidate_to_json(candidate_data, json_file):
     data = _read_json_file(json_file)
     data.append(candidate_data)
     try:
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
+        _write_json_atomic(json_file, data)
     except Exception:
         return False
+    _notify_append(candidate_data, json_file)
+    return True
 
 
 def is_email_already_processed(email_id, json_file):
     data = _read_json_file(json_file)
     return any(item.get("source_email_id") == email_id for item in data)
+
+
+class CandidateStore:
+    """Candidates JSON file loaded once per run and indexed in memory.
+
+    The processed ``source_email_id`` values and the last CV / candidate
+    numbers are kept in memory, so lookups and ID allocation no longer re-read
+    the file. Appended candidates are buffered and written atomically (temp
+    file + rename) every ``flush_every`` candidates, every ``flush_interval``
+    seconds, and on ``close()``.
+    """
+
+    def __init__(self, json_file, flush_every=10, flush_interval=30.0):
+        self.json_file = json_file
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._records = _read_json_file(json_file)
+        self._email_ids = set()
+        self._last_cv, self._last_candidate = 0, 0
+        for item in self._records:
+            self._track(item)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def records(self):
+        return list(self._records)
+
+    @property
+    def processed_email_ids(self):
+        return set(self._email_ids)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def is_email_already_processed(self, email_id):
+        return email_id in self._email_ids
+
+    def get_next_ids(self):
+        return self._last_cv + 1, self._last_candidate + 1
+
+    def _track(self, candidate_data):
+        if candidate_data.get("source_email_id"):
+            self._email_ids.add(candidate_data["source_email_id"])
+        last_cv, last_candidate = _last_ids([candidate_data])
+        self._last_cv = max(self._last_cv, last_cv)
+        self._last_candidate = max(self._last_candidate, last_candidate)
+
+    def append(self, candidate_data):
+        """Buffer a candidate; returns False only if a triggered flush failed."""
+        with self._lock:
+            self._records.append(candidate_data)
+            self._track(candidate_data)
+            self._pending += 1
+            _notify_append(candidate_data, self.json_file)
+
+            if self._should_flush():
+                return self.flush()
+            return True
+
+    def _should_flush(self):
+        if self.flush_every is not None and self._pending >= self.flush_every:
+            return True
+        if self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            return True
+        return False
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return True
+            try:
+                _write_json_atomic(self.json_file, self._records)
+            except Exception:
+                return False
+            self._pending = 0
+            self._last_flush = time.monotonic()
+            return True
+
+    def close(self):
+        return self.flush()
+
+
+def iter_jsonl_records(jsonl_file, repair=False):
+    """Yield the candidates of a JSON Lines file one at a time.
+
+    A last line without its trailing newline is the sign of an append that
+    was interrupted: with ``repair=True`` it is truncated away (or completed,
+    if it still parses) so the next append starts on a clean line. Undecodable
+    lines elsewhere in the file are skipped.
+    """
+    if not os.path.exists(jsonl_file):
+        return
+
+    good_offset = 0
+    torn = None
+    with open(jsonl_file, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                torn = raw
+                break
+            good_offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Ligne JSONL illisible ignorée dans {jsonl_file}")
+
+    if torn is None:
+        return
+    try:
+        record = json.loads(torn)
+    except json.JSONDecodeError:
+        record = None
+
+    if record is not None:
+        yield record
+    if repair:
+        with open(jsonl_file, "r+b") as f:
+            if record is not None:
+                f.seek(0, os.SEEK_END)
+                f.write(b"\n")
+            else:
+                f.truncate(good_offset)
+                print(f"⚠️ Dernière ligne incomplète tronquée dans {jsonl_file}")
+
+
+def _record_key(candidate_data):
+    return candidate_data.get("source_email_id"), candidate_data.get("cv_id")
+
+
+class JsonlCandidateStore(CandidateStore):
+    """Append-only JSON Lines candidates file, one candidate per line.
+
+    Appending costs one line write whatever the size of the file; records are
+    not kept in memory, only the processed email IDs and ID counters. The file
+    is fsync'ed every ``flush_every`` candidates and on ``close()``. Use
+    ``compact_jsonl`` to produce the JSON array expected downstream.
+
+    Candidates of the same-name ``.json`` file missing from the ``.jsonl``
+    (saved by a ``json`` format run) are copied into it on opening, so they
+    are known, numbered and kept when the ``.json`` is compacted over.
+    """
+
+    def __init__(self, jsonl_file, flush_every=10, flush_interval=30.0):
+        self.json_file = jsonl_file
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._email_ids = set()
+        self._last_cv, self._last_candidate = 0, 0
+        self._count = 0
+        keys = set()
+        for item in iter_jsonl_records(jsonl_file, repair=True):
+            self._track(item)
+            self._count += 1
+            keys.add(_record_key(item))
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._file = open(jsonl_file, "a", encoding="utf-8")
+        self._seed(keys)
+
+    def _seed(self, keys):
+        json_file = os.path.splitext(self.json_file)[0] + ".json"
+        missing = [item for item in _read_json_file(json_file)
+                   if isinstance(item, dict) and _record_key(item) not in keys]
+        if not missing:
+            return
+        self._file.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in missing))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for item in missing:
+            self._track(item)
+        self._count += len(missing)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def records(self):
+        return list(iter_jsonl_records(self.json_file))
+
+    def append(self, candidate_data):
+        """Append a candidate line; returns False if the write failed."""
+        line = json.dumps(candidate_data, ensure_ascii=False)
+        with self._lock:
+            try:
+                # a single write per line keeps a crash from interleaving records
+                self._file.write(line + "\n")
+                self._file.flush()
+            except Exception:
+                return False
+            self._track(candidate_data)
+            self._count += 1
+            self._pending += 1
+            _notify_append(candidate_data, self.json_file)
+
+            if self._should_flush():
+                return self.flush()
+            return True
+
+    def flush(self):
+        with self._lock:
+            if not self._pending or self._file.closed:
+                return True
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception:
+                return False
+            self._pending = 0
+            self._last_flush = time.monotonic()
+            return True
+
+    def close(self):
+        with self._lock:
+            ok = self.flush()
+            if not self._file.closed:
+                self._file.close()
+            return ok
+
+
+def open_candidate_store(json_file, storage_format="json", **kwargs):
+    """Open the candidates store of ``json_file`` in the given format.
+
+    With ``storage_format="jsonl"`` the store lives next to ``json_file``
+    with a ``.jsonl`` extension.
+    """
+    if storage_format == "jsonl":
+        return JsonlCandidateStore(jsonl_path_for(json_file), **kwargs)
+    if storage_format == "json":
+        return CandidateStore(json_file, **kwargs)
+    raise ValueError(f"unknown storage format: {storage_format}")
+
+
+def jsonl_path_for(json_file):
+    return os.path.splitext(json_file)[0] + ".jsonl"
+
+
+def compact_jsonl(jsonl_file, json_file=None):
+    """Export a JSON Lines candidates file as a pretty JSON array.
+
+    Records are streamed to a temp file that replaces ``json_file`` (default:
+    same name with a ``.json`` extension) once complete, so readers never see
+    a half-written export. Returns the output path.
+    """
+    json_file = json_file or os.path.splitext(jsonl_file)[0] + ".json"
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(json_file) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            first = True
+            for record in iter_jsonl_records(jsonl_file):
+                f.write("[\n" if first else ",\n")
+                first = False
+                body = json.dumps(record, indent=2, ensure_ascii=False)
+                f.write("\n".join("  " + line for line in body.splitlines()))
+            f.write("[]" if first else "\n]")
+        os.replace(tmp_path, json_file)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return json_file
+
+
+def compact_jsonl_in_background(jsonl_file, json_file=None):
+    """Run ``compact_jsonl`` on a worker thread and return the started thread."""
+    thread = threading.Thread(target=compact_jsonl, args=(jsonl_file, json_file),
+                              name="jsonl-compaction")
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Outils de stockage des candidats")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="exporter un fichier .jsonl en tableau JSON")
+    compact.add_argument("jsonl_file")
+    compact.add_argument("json_file", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        print(f"✅ Export: {compact_jsonl(args.jsonl_file, args.json_file)}")
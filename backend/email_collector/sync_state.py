@@ -0,0 +1,63 @@
+"""Gmail history checkpoints used by incremental runs.
+
+The last ``historyId`` seen is stored per mailbox and target job in a small
+JSON file of the data folder, so the next run only asks Gmail for the
+messages added since then.
+"""
+
+import os
+import json
+import tempfile
+from datetime import datetime
+
+try:
+    from .paths import data_dir, make_safe_job_title
+except Exception:
+    from paths import data_dir, make_safe_job_title
+
+
+SYNC_STATE_FILE = "sync_state.json"
+
+
+def _state_path(state_file=None):
+    return state_file or os.path.join(data_dir(), SYNC_STATE_FILE)
+
+
+def _read_state(state_file=None):
+    path = _state_path(state_file)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # a damaged checkpoint only costs one full listing
+        return {}
+
+
+def checkpoint_key(mailbox, job_title):
+    return f"{(mailbox or 'me').lower()}|{make_safe_job_title(job_title)}"
+
+
+def load_checkpoint(mailbox, job_title, state_file=None):
+    entry = _read_state(state_file).get(checkpoint_key(mailbox, job_title))
+    return entry.get("history_id") if entry else None
+
+
+def save_checkpoint(mailbox, job_title, history_id, state_file=None):
+    path = _state_path(state_file)
+    state = _read_state(state_file)
+    state[checkpoint_key(mailbox, job_title)] = {
+        "history_id": str(history_id),
+        "updated_at": datetime.now().isoformat(),
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
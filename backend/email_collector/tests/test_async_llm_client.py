@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("groq")
+from email_collector.async_llm_client import AsyncLLMClient
+from email_collector.cv_schema import validate_cv_data
+
+
+class FakeGroqServer:
+    """Local stand-in for the Groq chat completions endpoint.
+
+    Replies with the scripted ``(status, headers)`` failures first, then with
+    a completion whose content echoes the candidate name found in the prompt.
+    """
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.calls += 1
+                if server.failures:
+                    status, headers = server.failures.pop(0)
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    payload = json.dumps({"error": {"message": "fake", "type": "fake"}}).encode()
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                prompt = body["messages"][0]["content"]
+                name = prompt.split("NAME=")[1].split()[0]
+                payload = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": json.dumps({"full_name": name})},
+                    }],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+
+
+def _client(url, **kwargs):
+    return AsyncLLMClient(api_key="test", base_url=url, requests_per_minute=6000, tokens_per_minute=10 ** 7,
+                          backoff_base=0.01, **kwargs)
+
+
+def test_retries_rate_limit_and_server_errors():
+    failures = [(429, {"retry-after": "0"}), (503, {})]
+    with FakeGroqServer(failures) as server:
+        async def scenario():
+            async with _client(server.url) as client:
+                return await client.extract_cv_data("NAME=Alice"), client.retries
+
+        result, retries = asyncio.run(scenario())
+
+    assert result == validate_cv_data({"full_name": "Alice"})
+    assert retries == 2
+    assert server.calls == 3
+
+
+def test_gives_up_after_max_retries():
+    with FakeGroqServer([(429, {"retry-after": "0"})] * 3) as server:
+        async def scenario():
+            async with _client(server.url, max_retries=1) as client:
+                return await client.extract_cv_data("NAME=Bob")
+
+        assert asyncio.run(scenario()) is None
+        assert server.calls == 2
+
+
+def test_extract_many_keeps_order():
+    with FakeGroqServer() as server:
+        async def scenario():
+            async with _client(server.url) as client:
+                return await client.extract_many([f"NAME=cv{i}" for i in range(10)])
+
+        results = asyncio.run(scenario())
+
+    assert [r["full_name"] for r in results] == [f"cv{i}" for i in range(10)]
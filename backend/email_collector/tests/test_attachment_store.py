@@ -0,0 +1,39 @@
+import os
+from email_collector.attachment_store import AttachmentStore, hash_bytes
+
+
+def test_same_content_is_stored_once_and_reused(tmp_path):
+    store = AttachmentStore(str(tmp_path / "blobs"))
+    job_a = tmp_path / "job_a"
+    job_b = tmp_path / "job_b"
+    job_a.mkdir()
+    job_b.mkdir()
+
+    digest, blob, known = store.add(b"%PDF fake cv", "CV.pdf")
+    assert digest == hash_bytes(b"%PDF fake cv")
+    assert not known
+    assert store.lookup(digest)["cv_data"] is None
+    store.record_extraction(digest, "texte du cv", {"full_name": "Jean"})
+
+    digest2, blob2, known2 = store.add(b"%PDF fake cv", "cv_relance.pdf")
+    assert (digest2, blob2, known2) == (digest, blob, True)
+    assert store.lookup(digest) == {"blob_path": blob, "cv_text": "texte du cv", "cv_data": {"full_name": "Jean"}}
+
+    first = store.link(blob, str(job_a), "CV.pdf")
+    second = store.link(blob, str(job_a), "CV.pdf")
+    third = store.link(blob, str(job_b), "CV.pdf")
+    assert len({first, second, third}) == 3
+    assert os.path.samefile(first, blob) and os.path.samefile(third, blob)
+    assert len([p for p in os.listdir(tmp_path / "blobs") if p.endswith(".pdf")]) == 1
+
+
+def test_extraction_recorded_before_any_blob(tmp_path):
+    store = AttachmentStore(str(tmp_path / "blobs"))
+    digest = hash_bytes(b"%PDF in memory")
+    store.record_extraction(digest, "texte du cv")
+    assert store.lookup(digest) == {"blob_path": None, "cv_text": "texte du cv", "cv_data": None}
+
+    _, blob, known = store.add(b"%PDF in memory", "cv.pdf")
+    assert known
+    assert store.lookup(digest)["blob_path"] == blob
+    store.close()
@@ -0,0 +1,51 @@
+import pytest
+
+from email_collector.cv_schema import CV_SCHEMA, new_report, parse_cv_content, repair_json, validate_cv_data
+
+
+@pytest.mark.parametrize("content, expected, repairs", [
+    ('```json\n{"a": [1, 2,],}\n```', {"a": [1, 2]}, ["trailing_comma"]),
+    ('Voici le JSON : {"a": "x"} Bonne journée !', {"a": "x"}, ["prose"]),
+    ('{"a": ["Python", "SQ', {"a": ["Python", "SQ"]}, ["truncated"]),
+    ('{"a": [{"b": 1}, {"c": tr', {"a": [{"b": 1}, {}]}, ["truncated"]),
+    ('{"a": "x", "summ', {"a": "x"}, ["truncated"]),
+    ('{"a": True, "b": None}', {"a": True, "b": None}, ["literals"]),
+    ('{"a": "ligne 1\nligne 2"}', {"a": "ligne 1\nligne 2"}, ["control_chars"]),
+])
+def test_repair_json(content, expected, repairs):
+    report = new_report()
+    assert repair_json(content, report) == expected
+    assert report["repairs"] == repairs
+
+
+def test_repair_json_gives_up_without_json():
+    with pytest.raises(ValueError):
+        repair_json("Désolé, je ne peux pas analyser ce document.")
+
+
+def test_validate_cv_data_reports_fields():
+    report = new_report()
+    cv_data = validate_cv_data({
+        "full_name": " Jean Dupont ",
+        "phone_number": 612345678,
+        "technical_skills": "Python, SQL; Excel",
+        "languages": [{"language": "", "level": ""}, {"language": "Anglais", "level": "C1"}],
+        "experiences": {"title": "Data analyst"},
+        "age": 31,
+    }, report)
+
+    assert list(cv_data) == list(CV_SCHEMA)
+    assert cv_data["full_name"] == "Jean Dupont"
+    assert cv_data["phone_number"] == "612345678"
+    assert cv_data["technical_skills"] == ["Python", "SQL", "Excel"]
+    assert cv_data["languages"] == [{"language": "Anglais", "level": "C1"}]
+    assert cv_data["experiences"][0]["company"] == ""
+    assert cv_data["experiences"][0]["technical_skills_used"] == []
+    assert "email" in report["missing"] and "full_name" not in report["missing"]
+    assert report["coerced"] == ["phone_number", "technical_skills", "experiences"]
+    assert report["unexpected"] == ["age"]
+
+
+def test_parse_cv_content_rejects_non_objects():
+    with pytest.raises(ValueError):
+        parse_cv_content('["Python", "SQL"]')
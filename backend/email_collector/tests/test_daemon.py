@@ -0,0 +1,52 @@
+import threading
+
+from email_collector.daemon import ServicePool, next_delay, watch
+
+
+def test_service_pool_reuses_clients_of_finished_threads():
+    pool = ServicePool(object)
+    main = pool()
+    assert pool() is main
+
+    def run(workers):
+        seen = []
+        barrier = threading.Barrier(workers)
+
+        def _work():
+            service = pool()
+            barrier.wait()  # all alive at once: each needs its own client
+            seen.append(service)
+
+        threads = [threading.Thread(target=_work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return seen
+
+    first = run(3)
+    assert len({id(s) for s in first}) == 3 and main not in first
+    second = run(3)
+    assert {id(s) for s in second} == {id(s) for s in first}
+    assert pool.created == 4
+
+
+def test_next_delay_stays_within_jitter():
+    delays = [next_delay(10, 2) for _ in range(200)]
+    assert all(8 <= d <= 12 for d in delays)
+    assert next_delay(1, 5) >= 0
+
+
+def test_watch_runs_until_stopped_and_survives_failures():
+    stop = threading.Event()
+    calls = []
+
+    def run_once():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("Gmail indisponible")
+        if len(calls) == 4:
+            stop.set()
+
+    assert watch(run_once, interval=0, stop_event=stop) == 4
+    assert watch(lambda: None, interval=0, max_cycles=3) == 3
@@ -0,0 +1,112 @@
+import csv
+import json
+
+import pytest
+
+from email_collector.export import candidate_files, export_candidates, flatten_candidate, iter_json_array
+
+
+def _candidate(cv_id, job="Data Analyst", applied="2025-10-14T09:30:00", **fields):
+    record = {
+        "cv_id": cv_id,
+        "candidate_id": f"PERS-{cv_id[-3:]}",
+        "source_email_id": f"m-{cv_id}",
+        "application_datetime": applied,
+        "job_applied_for": job,
+        "full_name": "Jean Dupont",
+        "technical_skills": ["Python", "SQL"],
+        "languages": [{"language": "Anglais", "level": "C1"}],
+        "educations": [],
+        "experiences": [{"title": "Analyste", "company": "ACME {]\"", "technical_skills_used": ["SQL", "Excel"]},
+                        {"title": "Stagiaire", "company": "Éco"}],
+        "summary": "Analyste de données, \"rigoureux\"",
+    }
+    record.update(fields)
+    return record
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_iter_json_array_streams_across_chunks(tmp_path):
+    records = [_candidate(f"CAND-{n:03d}") for n in range(20)]
+    path = tmp_path / "candidates.json"
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    assert list(iter_json_array(str(path), chunk_size=7)) == records
+
+    path.write_text("", encoding="utf-8")
+    assert list(iter_json_array(str(path))) == []
+
+
+def test_iter_json_array_stops_at_a_truncated_item(tmp_path, capsys):
+    path = tmp_path / "candidates.json"
+    text = json.dumps([_candidate("CAND-001"), _candidate("CAND-002")])
+    path.write_text(text[:-40], encoding="utf-8")
+
+    assert [record["cv_id"] for record in iter_json_array(str(path), chunk_size=16)] == ["CAND-001"]
+    assert "tronqué" in capsys.readouterr().out
+
+
+def test_flatten_candidate_splits_nested_lists():
+    rows = flatten_candidate(_candidate("CAND-001"), "candidates_data_analyst_20251014")
+
+    assert rows["candidates"][0]["technical_skills"] == "Python; SQL"
+    assert rows["candidates"][0]["source_file"] == "candidates_data_analyst_20251014"
+    assert rows["languages"] == [{"source_file": "candidates_data_analyst_20251014", "cv_id": "CAND-001",
+                                  "position": 0, "language": "Anglais", "level": "C1"}]
+    assert [row["position"] for row in rows["experiences"]] == [0, 1]
+    assert rows["experiences"][0]["technical_skills_used"] == "SQL; Excel"
+    assert rows["educations"] == []
+
+
+def test_export_csv_with_filters(tmp_path):
+    folder = tmp_path / "candidates"
+    folder.mkdir()
+    (folder / "candidates_data_analyst_20251014.json").write_text(json.dumps([
+        _candidate("CAND-001"),
+        _candidate("CAND-002", applied="2025-11-02T10:00:00"),
+        _candidate("CAND-003", job="Comptable"),
+    ]), encoding="utf-8")
+    # the .jsonl store wins over its compacted .json copy
+    (folder / "candidates_data_analyst_20251015.json").write_text(json.dumps([_candidate("OLD-001")]),
+                                                                  encoding="utf-8")
+    (folder / "candidates_data_analyst_20251015.jsonl").write_text(
+        json.dumps(_candidate("CAND-004", applied="2025-10-15T08:00:00")) + "\n", encoding="utf-8")
+
+    paths = candidate_files(str(folder))
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["candidates_data_analyst_20251014.json",
+                                                     "candidates_data_analyst_20251015.jsonl"]
+
+    out = tmp_path / "export"
+    counts = export_candidates(paths, str(out), job="data analyst", start="2025-10-01", end="2025-11-01")
+
+    assert counts == {"candidates": 2, "languages": 2, "educations": 0, "experiences": 4}
+    candidates = _read_csv(out / "candidates.csv")
+    assert [row["cv_id"] for row in candidates] == ["CAND-001", "CAND-004"]
+    assert candidates[0]["summary"] == "Analyste de données, \"rigoureux\""
+    experiences = _read_csv(out / "experiences.csv")
+    assert experiences[0]["company"] == "ACME {]\""
+    assert experiences[3]["source_file"] == "candidates_data_analyst_20251015"
+    assert _read_csv(out / "educations.csv") == []
+
+
+def test_export_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source = tmp_path / "candidates_data_analyst_20251014.json"
+    source.write_text(json.dumps([_candidate(f"CAND-{n:03d}") for n in range(5)]), encoding="utf-8")
+
+    counts = export_candidates([str(source)], str(tmp_path / "out"), formats=["csv", "parquet"], row_group_size=2)
+
+    table = pq.read_table(tmp_path / "out" / "experiences.parquet")
+    assert table.num_rows == counts["experiences"] == 10
+    assert table.column("position").to_pylist()[:2] == [0, 1]
+    assert pq.ParquetFile(tmp_path / "out" / "candidates.parquet").metadata.num_row_groups == 3
+    assert pq.read_table(tmp_path / "out" / "educations.parquet").num_rows == 0
+
+
+def test_export_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_candidates([], str(tmp_path), formats=["xlsx"])
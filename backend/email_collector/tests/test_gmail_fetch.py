@@ -0,0 +1,121 @@
+import pytest
+from email_collector.gmail_fetch import (
+    list_message_ids,
+    list_history_message_ids,
+    fetch_messages,
+    HistoryExpiredError,
+)
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batch_calls += 1
+        for request_id, request in self.requests:
+            if request_id in self.service.failing:
+                self.callback(request_id, None, RuntimeError("boom"))
+            else:
+                self.callback(request_id, request.execute(), None)
+
+
+class FakeService:
+    def __init__(self, ids, page_size=3, failing=()):
+        self.ids = ids
+        self.page_size = page_size
+        self.failing = set(failing)
+        self.batch_calls = 0
+        self.list_calls = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, maxResults, pageToken=None, q=None):
+        self.list_calls.append(maxResults)
+        start = int(pageToken or 0)
+        end = start + min(maxResults, self.page_size)
+        result = {"messages": [{"id": i} for i in self.ids[start:end]]}
+        if end < len(self.ids):
+            result["nextPageToken"] = str(end)
+        return FakeRequest(result)
+
+    def get(self, userId, id, format, metadataHeaders=None):
+        return FakeRequest({"id": id, "format": format})
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+
+def test_list_message_ids_follows_pages():
+    service = FakeService([f"m{i}" for i in range(10)])
+    assert list_message_ids(service, 7) == [f"m{i}" for i in range(7)]
+    assert list_message_ids(service, 50) == [f"m{i}" for i in range(10)]
+
+
+def test_fetch_messages_batches_and_reports_errors():
+    service = FakeService([], failing={"m2"})
+    ids = [f"m{i}" for i in range(5)]
+
+    results = list(fetch_messages(service, ids, batch_size=2))
+
+    assert service.batch_calls == 3
+    assert [r[0] for r in results] == ids
+    assert results[0][1]["format"] == "full"
+    assert results[2][1] is None
+    assert isinstance(results[2][2], RuntimeError)
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status):
+        self.resp = type("resp", (), {"status": status})()
+
+
+class FakeHistoryService:
+    def __init__(self, pages=None, status=None):
+        self.pages = pages or []
+        self.status = status
+
+    def users(self):
+        return self
+
+    def history(self):
+        return self
+
+    def list(self, userId, startHistoryId, historyTypes, maxResults, pageToken=None):
+        if self.status:
+            raise FakeHttpError(self.status)
+        return FakeRequest(self.pages[int(pageToken or 0)])
+
+
+def test_list_history_message_ids():
+    pages = [
+        {"history": [{"messagesAdded": [{"message": {"id": "a"}}, {"message": {"id": "b"}}]}],
+         "historyId": "110", "nextPageToken": "1"},
+        {"history": [{"messagesAdded": [{"message": {"id": "b"}}]}, {"messagesAdded": [{"message": {"id": "c"}}]}],
+         "historyId": "120"},
+    ]
+    ids, history_id = list_history_message_ids(FakeHistoryService(pages), "100")
+    assert ids == ["a", "b", "c"]
+    assert history_id == "120"
+
+
+def test_list_history_message_ids_expired():
+    with pytest.raises(HistoryExpiredError):
+        list_history_message_ids(FakeHistoryService(status=404), "1")
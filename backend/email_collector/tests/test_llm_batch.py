@@ -0,0 +1,109 @@
+import json
+import re
+import threading
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("groq")
+from email_collector import llm_batch
+from email_collector.llm_batch import LLMBatcher, extract_cv_batch_with_llm, parse_batch_content, plan_batches
+
+
+class FakeClient:
+    """Answers a batch prompt with one entry per ``### CV <id>`` it contains,
+    or with prose when the batch is larger than ``max_ok``."""
+
+    def __init__(self, max_ok=10):
+        self.max_ok = max_ok
+        self.batches = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature):
+        ids = re.findall(r"^### CV (\S+)$", messages[0]["content"], re.MULTILINE)
+        self.batches.append(ids)
+        if len(ids) > self.max_ok:
+            content = "Voici les CV demandés :"
+        else:
+            content = "```json\n" + json.dumps([{"id": i, "cv": {"full_name": f"Candidat {i}"}} for i in ids]) + "\n```"
+        message = type("Message", (), {"content": content})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
+
+
+def test_plan_batches_respects_budget_and_size():
+    texts = ["a" * 400] * 5 + ["b" * 40000]
+    # each short CV costs 101 + 800 tokens
+    assert plan_batches(texts, token_budget=2000, max_batch_size=8) == [[0, 1], [2, 3], [4], [5]]
+    assert plan_batches(texts[:5], token_budget=100000, max_batch_size=3) == [[0, 1, 2], [3, 4]]
+
+
+def test_parse_batch_content_keeps_known_well_formed_entries():
+    content = json.dumps([{"id": "1", "cv": {"full_name": "A"}}, {"id": "9", "cv": {}}, {"id": "2", "cv": "x"}])
+    results = parse_batch_content(content, ["1", "2"])
+    assert list(results) == ["1"]
+    # entries are validated against the CV schema
+    assert results["1"]["full_name"] == "A" and results["1"]["technical_skills"] == []
+    with pytest.raises(ValueError):
+        parse_batch_content('{"full_name": "A"}', ["1"])
+
+
+def test_invalid_batch_is_bisected(monkeypatch):
+    client = FakeClient(max_ok=2)
+    monkeypatch.setattr(llm_batch, "_get_client", lambda: client)
+    monkeypatch.setattr(llm_batch, "extract_cv_data_with_llm", lambda text, **kw: {"full_name": "seul"})
+    stats = {}
+
+    results = extract_cv_batch_with_llm([f"CV {n}" for n in range(5)], use_cache=False, stats=stats)
+
+    assert [r["full_name"] for r in results] == ["Candidat 1", "Candidat 2", "seul", "Candidat 4", "Candidat 5"]
+    # 5 -> 2 + 3, then the 3 -> 1 (one-CV prompt) + 2
+    assert client.batches == [["1", "2", "3", "4", "5"], ["1", "2"], ["3", "4", "5"], ["4", "5"]]
+    assert stats == {"requests": 5, "splits": 2, "cache_hits": 0, "repaired": 0, "reprompted": 0}
+
+
+def test_truncated_batch_answer_retries_the_cut_cv(monkeypatch):
+    answer = json.dumps([{"id": "1", "cv": {"full_name": "Alice", "technical_skills": ["SQL"]}},
+                         {"id": "2", "cv": {"full_name": "Bob", "technical_skills": ["Python"]}}])
+    cut = answer[:answer.index("Bob") + 2]
+
+    class TruncatingClient(FakeClient):
+        def create(self, model, messages, temperature):
+            response = super().create(model, messages, temperature)
+            response.choices[0].message.content = cut
+            return response
+
+    client = TruncatingClient()
+    monkeypatch.setattr(llm_batch, "_get_client", lambda: client)
+    retried = []
+    monkeypatch.setattr(llm_batch, "extract_cv_data_with_llm",
+                        lambda text, **kw: retried.append(text) or {"full_name": "Bob"})
+    stats = {}
+
+    results = extract_cv_batch_with_llm(["CV Alice", "CV Bob"], use_cache=False, stats=stats)
+
+    assert [r["full_name"] for r in results] == ["Alice", "Bob"]
+    assert retried == ["CV Bob"]
+    assert stats["requests"] == 2 and stats["splits"] == 0
+    # Alice comes from an answer that had to be repaired
+    assert stats["repaired"] == 1
+
+
+def test_batcher_groups_concurrent_calls():
+    seen = []
+
+    def fake_batch(texts, **kwargs):
+        seen.append(list(texts))
+        return [{"full_name": text} for text in texts]
+
+    results = {}
+    with LLMBatcher(max_batch_size=4, max_wait=0.5, extract_batch=fake_batch) as batcher:
+        threads = [threading.Thread(target=lambda n=n: results.update({n: batcher.extract(f"CV {n}")}))
+                   for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert results == {n: {"full_name": f"CV {n}"} for n in range(4)}
+    assert len(seen) == 1 and sorted(seen[0]) == [f"CV {n}" for n in range(4)]
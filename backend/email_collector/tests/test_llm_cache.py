@@ -0,0 +1,34 @@
+from email_collector.llm_cache import LLMCache, make_cache_key
+
+
+def test_cache_key_normalizes_text():
+    key = make_cache_key("Jean  Dupont\n\nData Analyst ", "prompt", "model")
+    assert key == make_cache_key("Jean Dupont Data Analyst", "prompt", "model")
+    assert key != make_cache_key("Jean Dupont Data Analyst", "prompt v2", "model")
+    assert key != make_cache_key("Jean Dupont Data Analyst", "prompt", "other-model")
+
+
+def test_cache_hits_misses_and_lru_eviction(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_entries=2)
+    assert cache.get("a") is None
+
+    cache.set("a", {"full_name": "A"})
+    cache.set("b", {"full_name": "B"})
+    assert cache.get("a") == {"full_name": "A"}
+    cache.set("c", {"full_name": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("c") == {"full_name": "C"}
+    assert cache.stats() == {"hits": 2, "misses": 2, "entries": 2, "bytes": cache.stats()["bytes"]}
+
+
+def test_cache_age_limit_and_bypass(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_age_days=1)
+    cache.set("a", {"x": 1})
+    monkeypatch.setattr("email_collector.llm_cache.time.time", lambda: 10 ** 11)
+    assert cache.get("a") is None
+
+    bypassed = LLMCache(str(tmp_path / "cache.db"), bypass=True)
+    bypassed.set("b", {"x": 2})
+    assert bypassed.get("b") is None
+    assert bypassed.stats()["entries"] == 0
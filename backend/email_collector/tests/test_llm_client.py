@@ -1,20 +1,53 @@
 import json
+from email_collector import llm_client
 from email_collector.llm_client import extract_cv_data_with_llm
 
+
+class FakeClient:
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.calls = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature):
+        self.calls.append(messages)
+        message = type("obj2", (), {"content": self.contents.pop(0)})
+        return type("FakeResponse", (), {"choices": [type("obj", (), {"message": message})]})
+
+
 def test_extract_cv_data_with_llm(monkeypatch):
     fake_json = {
         "first_name": "John",
         "last_name": "Doe",
         "full_name": "John Doe"
     }
+    monkeypatch.setattr(llm_client, "_get_client", lambda: FakeClient([json.dumps(fake_json)]))
+
+    result = extract_cv_data_with_llm("Fake CV content", use_cache=False)
+    assert result["full_name"] == "John Doe"
+
+
+def test_malformed_answer_is_repaired_without_new_call(monkeypatch):
+    client = FakeClient(['Voici le JSON :\n{"full_name": "John Doe", "technical_skills": ["Python",'])
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    report = {"repairs": [], "missing": [], "coerced": [], "unexpected": []}
+
+    result = extract_cv_data_with_llm("Fake CV content", use_cache=False, report=report)
+
+    assert result["technical_skills"] == ["Python"]
+    assert len(client.calls) == 1
+    assert report["repairs"] == ["prose", "truncated"]
+    assert "email" in report["missing"]
 
-    class FakeResponse:
-        choices = [type("obj", (), {"message": type("obj2", (), {"content": json.dumps(fake_json)})})]
 
-    def fake_create(*args, **kwargs):
-        return FakeResponse()
+def test_reprompt_only_when_repair_is_impossible(monkeypatch):
+    client = FakeClient(["Je ne peux pas lire ce CV.", '{"full_name": "John Doe"}'])
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    report = {"repairs": [], "missing": [], "coerced": [], "unexpected": []}
 
-    monkeypatch.setattr("email_collector.llm_client.client.chat.completions.create", fake_create)
+    result = extract_cv_data_with_llm("Fake CV content", use_cache=False, report=report)
 
-    result = extract_cv_data_with_llm("Fake CV content")
     assert result["full_name"] == "John Doe"
+    assert report["reprompted"]
+    assert [m["role"] for m in client.calls[1]] == ["user", "assistant", "user"]
@@ -0,0 +1,74 @@
+import json
+import pstats
+import threading
+
+import pytest
+
+from email_collector.metrics import RunMetrics, percentile, profiled
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.9) == 90
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.99) == 3.0
+    assert percentile([], 0.5) is None
+
+
+def test_spans_and_counters_are_summarized():
+    metrics = RunMetrics({"run": "process_cvs"})
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.observe("llm", seconds)
+    metrics.observe("extract", 1.0, failed=True)
+    with metrics.span("triage"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("triage"):
+            raise ValueError("boom")
+    assert list(metrics.timed("fetch", "ab")) == ["a", "b"]
+    metrics.count({"processed": 2, "skipped": 1, "json_file": "x.json"})
+    metrics.count({"processed": 1})
+
+    data = metrics.finish().to_dict()
+    assert data["stages"]["llm"]["count"] == 3 and data["stages"]["llm"]["p50"] == 0.2
+    assert data["stages"]["extract"]["failed"] == 1
+    assert data["stages"]["triage"]["count"] == 2 and data["stages"]["triage"]["failed"] == 1
+    assert data["stages"]["fetch"]["count"] == 2
+    assert data["counters"] == {"processed": 3, "skipped": 1}
+    assert metrics.format_summary().startswith("extract 1.0s")
+
+
+def test_exports(tmp_path):
+    metrics = RunMetrics({"run": "process_cvs", "job_title": 'Data "Analyst"'})
+    metrics.observe("download", 0.5)
+    metrics.count({"processed": 4})
+    metrics.finish()
+
+    metrics.write_report(str(tmp_path / "run.json"))
+    assert json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))["counters"] == {"processed": 4}
+
+    metrics.write_prometheus(str(tmp_path / "collector.prom"))
+    text = (tmp_path / "collector.prom").read_text(encoding="utf-8")
+    labels = 'run="process_cvs",job_title="Data \\"Analyst\\""'
+    assert f'email_collector_stage_seconds{{{labels},stage="download",quantile="0.5"}} 0.5' in text
+    assert f'email_collector_stage_seconds_count{{{labels},stage="download"}} 1' in text
+    assert f'email_collector_events{{{labels},event="processed"}} 4' in text
+    assert not (tmp_path / "collector.prom.tmp").exists()
+
+
+def test_profiled_covers_worker_threads(tmp_path):
+    def worker_only_function():
+        return sum(range(1000))
+
+    path = str(tmp_path / "run.prof")
+    with profiled(path):
+        thread = threading.Thread(target=worker_only_function)
+        thread.start()
+        thread.join()
+
+    names = {function for _, _, function in pstats.Stats(path).stats}
+    assert "worker_only_function" in names
+
+    with profiled(None):
+        pass
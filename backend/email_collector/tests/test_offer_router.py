@@ -0,0 +1,54 @@
+from email_collector.offer_router import OfferIndex, is_active, title_tokens
+
+
+class Offer:
+    def __init__(self, offer_id, title, status=1):
+        self.id = offer_id
+        self.title = title
+        self.status = status
+
+
+OFFERS = [
+    Offer(1, "Data Analyst (H/F)"),
+    Offer(2, "Data Scientist"),
+    Offer(3, "Statisticien"),
+    Offer(4, "Comptable", status=0),
+    Offer(5, "Développeur Python Senior"),
+]
+
+
+def test_title_tokens_drop_noise_and_accents():
+    assert title_tokens("Data Analyste (H/F)") == ["data", "analyst"]
+    assert title_tokens("Développeur   Python") == ["developpeur", "python"]
+
+
+def test_best_offer_is_chosen():
+    index = OfferIndex([offer for offer in OFFERS if is_active(offer)])
+    assert len(index) == 4
+    assert index.match("Data Analyst").offer.id == 1
+    assert index.match("data analystes").offer.id == 1
+    assert index.match("Data Scientist").offer.id == 2
+    assert index.match("Statisticien débutant").offer.id == 3
+    assert index.match("Développeur Python").offer.id == 5
+
+
+def test_exact_title_beats_containment():
+    index = OfferIndex([Offer(1, "Data Analyst"), Offer(2, "Data Analyst Senior")])
+    assert index.match("Data Analyst Senior").offer.id == 2
+    assert index.match("Data Analyst").offer.id == 1
+
+
+def test_no_match_below_threshold():
+    index = OfferIndex(OFFERS[:3])
+    assert index.match("Comptable") is None
+    assert index.match("") is None
+    assert index.match(None) is None
+
+
+def test_from_repository_keeps_active_offers():
+    class Repository:
+        def list(self):
+            return OFFERS
+
+    index = OfferIndex.from_repository(Repository())
+    assert {offer.id for offer in index.offers} == {1, 2, 3, 5}
@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from email_collector.pipeline import Stage, SkipItem, run_pipeline
+
+
+def test_run_pipeline_keeps_input_order():
+    def slow_double(x):
+        time.sleep(random.random() / 100)
+        return x * 2
+
+    def drop_sevens(x):
+        if x == 14:
+            raise SkipItem("seven")
+        if x == 18:
+            raise ValueError("nine")
+        return x + 1
+
+    seen = []
+    fed = run_pipeline(range(20), [Stage("double", slow_double, 4), Stage("inc", drop_sevens, 3)], seen.append,
+                       queue_size=2)
+
+    assert fed == 20
+    assert [r.seq for r in seen] == list(range(20))
+    assert seen[3].value == 7 and seen[3].error is None
+    assert isinstance(seen[7].error, SkipItem) and seen[7].stage == "inc"
+    assert isinstance(seen[9].error, ValueError) and seen[9].item == 9
+
+
+def test_run_pipeline_stops_feeding():
+    seen = []
+    run_pipeline(iter(range(100)), [Stage("id", lambda x: x, 2)], seen.append,
+                 queue_size=1, should_stop=lambda: len(seen) >= 5)
+
+    assert 5 <= len(seen) < 100
+    assert [r.seq for r in seen] == list(range(len(seen)))
+
+
+def test_run_pipeline_reports_stage_timings():
+    calls = []
+
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("three")
+        return x
+
+    run_pipeline(range(5), [Stage("check", fail_on_three, 2), Stage("id", lambda x: x, 1)], lambda r: None,
+                 observer=lambda stage, seconds, error: calls.append((stage, seconds, error)))
+
+    stages = [stage for stage, _, _ in calls]
+    # the failed item skips the following stages but still reaches the sink
+    assert stages.count("check") == 5 and stages.count("id") == 4 and stages.count("sink") == 5
+    assert all(seconds >= 0 for _, seconds, _ in calls)
+    assert [type(error) for stage, _, error in calls if error is not None] == [ValueError]
+
+
+def test_run_pipeline_caps_items_in_flight():
+    head_released = threading.Event()
+    produced = []
+
+    def items():
+        for n in range(50):
+            produced.append(n)
+            yield n
+
+    def stall_first(x):
+        if x == 0:
+            head_released.wait(5)
+        return x
+
+    seen = []
+    runner = threading.Thread(target=run_pipeline, args=(items(), [Stage("stall", stall_first, 4)], seen.append),
+                              kwargs={"queue_size": 50, "max_in_flight": 5})
+    runner.start()
+    time.sleep(0.2)
+    # item 0 blocks the sink: the feeder waits instead of reading the 50 items
+    assert seen == [] and len(produced) <= 6
+    head_released.set()
+    runner.join(5)
+
+    assert [r.seq for r in seen] == list(range(50))
+
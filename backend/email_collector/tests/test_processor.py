@@ -1,4 +1,13 @@
-from email_collector.processor import extract_job_title_from_subject
+import json
+import os
+
+import pytest
+
+from benchmarks.fakes import FakeGmailService, FakeLLMClient, fake_extract
+from email_collector import llm_client, processor
+from email_collector.processor import extract_job_title_from_subject, _get_header, _parse_application_datetime
+from email_collector.storage import iter_jsonl_records
+from email_collector.text_extract import ExtractionService
 
 def test_extract_job_title_from_subject():
     s = "Candidature — Data Analyst — Jean Dupont"
@@ -8,3 +17,124 @@ def test_extract_job_title_from_subject():
     assert extract_job_title_from_subject(s2) == "Statisticien"
 
     assert extract_job_title_from_subject("Hello world") is None
+
+
+def test_triage_header_helpers():
+    headers = [
+        {"name": "From", "value": "Jean <jean@example.com>"},
+        {"name": "Date", "value": "Tue, 14 Oct 2025 09:30:00 +0200"},
+    ]
+    assert _get_header(headers, "from") == "Jean <jean@example.com>"
+    assert _get_header(headers, "subject", "No Subject") == "No Subject"
+    assert _parse_application_datetime(_get_header(headers, "date")) == "2025-10-14T09:30:00"
+
+
+class Offer:
+    def __init__(self, offer_id, title, status=1):
+        self.id = offer_id
+        self.title = title
+        self.status = status
+
+
+@pytest.fixture(scope="module")
+def extraction():
+    # fake text extraction: no PyMuPDF / python-docx needed, one pool for every run
+    with ExtractionService(max_workers=2, worker=fake_extract) as service:
+        yield service
+
+
+@pytest.fixture
+def fake_llm(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMAIL_COLLECTOR_DATA_DIR", str(tmp_path))
+    llm = FakeLLMClient()
+    monkeypatch.setattr(llm_client, "_client", llm)
+    return llm
+
+
+def _mailbox():
+    # 10 applications: the subjects mix Data Analyst with the fake's other jobs
+    return FakeGmailService(10, job_title="Data Analyst", match_ratio=0.5, duplicate_ratio=0.2, seed=3)
+
+
+def _subject_jobs(service):
+    return [title for title, _, _ in service._messages.values()]
+
+
+@pytest.mark.parametrize("options", [
+    {"storage_format": "json", "persist_attachments": "sync"},
+    {"storage_format": "jsonl", "persist_attachments": "async", "llm_batch_size": 4},
+    {"storage_format": "json", "persist_attachments": "none", "incremental": True},
+])
+def test_process_cvs_end_to_end(fake_llm, extraction, options):
+    service = _mailbox()
+    wanted = _subject_jobs(service).count("Data Analyst")
+
+    def _run():
+        return processor.process_cvs(target_job_title="Data Analyst", max_emails=20, verbose=False,
+                                     service_factory=lambda: service, extraction_service=extraction,
+                                     use_llm_cache=False, **options)
+
+    result = _run()
+    assert result["processed"] == wanted
+    assert result["filtered"] == 10 - wanted
+    assert result["failed"] == result["errors"] == result["write_errors"] == 0
+    records = list(iter_jsonl_records(result["store_file"])) if options["storage_format"] == "jsonl" \
+        else json.load(open(result["json_file"], encoding="utf-8"))
+    assert len(records) == wanted
+    assert len({record["source_email_id"] for record in records}) == wanted
+    assert all(record["job_applied_for"] == "Data Analyst" and record["full_name"] for record in records)
+    saved_files = os.listdir(result["cv_folder"])
+    assert len(saved_files) == (0 if options["persist_attachments"] == "none" else wanted)
+
+    calls = fake_llm.calls
+    again = _run()
+    assert again["processed"] == 0
+    # an incremental rerun lists nothing new, a full one skips every known email
+    assert again["skipped"] == (0 if options.get("incremental") else wanted)
+    assert fake_llm.calls == calls
+
+
+def test_process_cvs_counts_database_mirror_failures_apart(fake_llm, extraction):
+    class BrokenRepository:
+        def add(self, candidate, source_file=None):
+            raise RuntimeError("database is locked")
+
+    service = _mailbox()
+    result = processor.process_cvs(target_job_title="Data Analyst", max_emails=20, verbose=False,
+                                   service_factory=lambda: service, extraction_service=extraction,
+                                   use_llm_cache=False, candidate_repository=BrokenRepository())
+
+    wanted = _subject_jobs(service).count("Data Analyst")
+    assert result["processed"] == result["db_errors"] == wanted
+    assert result["failed"] == 0
+
+
+def test_route_cvs_sorts_the_mailbox_into_offers(fake_llm, extraction):
+    service = _mailbox()
+    jobs = _subject_jobs(service)
+    offers = [Offer(1, "Data Analyst (H/F)"), Offer(2, "Comptable"), Offer(3, "Chef de projet")]
+
+    def _run():
+        return processor.route_cvs(offers=offers, max_emails=20, verbose=False, service_factory=lambda: service,
+                                   extraction_service=extraction, use_llm_cache=False)
+
+    result = _run()
+    expected = {title: jobs.count(job) for title, job in
+                (("Data Analyst (H/F)", "Data Analyst"), ("Comptable", "Comptable"), ("Chef de projet", "Chef de projet"))
+                if jobs.count(job)}
+    assert {title: offer["processed"] for title, offer in result["offers"].items()} == expected
+    assert result["processed"] == sum(expected.values())
+    for title, offer in result["offers"].items():
+        records = json.load(open(processor.output_paths(title)[1], encoding="utf-8"))
+        assert {record["job_applied_for"] for record in records} == {title}
+
+    unmatched_jobs = [job for job in jobs if job not in ("Data Analyst", "Comptable", "Chef de projet")]
+    assert result["unmatched"] == len(unmatched_jobs) > 0
+    unmatched = json.load(open(result["unmatched_file"], encoding="utf-8"))
+    assert sorted(entry["detected_job_title"] for entry in unmatched) == sorted(unmatched_jobs)
+
+    again = _run()
+    assert again["processed"] == 0
+    assert again["skipped"] == result["processed"]
+    assert again["unmatched"] == result["unmatched"]
+    assert len(json.load(open(result["unmatched_file"], encoding="utf-8"))) == len(unmatched)
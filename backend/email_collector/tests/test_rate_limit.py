@@ -0,0 +1,39 @@
+import asyncio
+from email_collector.rate_limit import TokenBucket, parse_retry_after, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_waits_for_refill(monkeypatch):
+    clock = FakeClock()
+    waits = []
+
+    async def fake_sleep(delay):
+        waits.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr("email_collector.rate_limit.asyncio.sleep", fake_sleep)
+
+    async def scenario():
+        bucket = TokenBucket(60, clock=clock)
+        await bucket.acquire(60)
+        await bucket.acquire(30)
+        await bucket.acquire(1000)
+
+    asyncio.run(scenario())
+    assert waits == [30.0, 60.0]
+
+
+def test_retry_after_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert 5.0 <= backoff_delay(0, base=1.0, retry_after=5.0) <= 5.25
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=1.0, maximum=8.0) <= 8.0
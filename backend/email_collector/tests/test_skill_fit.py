@@ -0,0 +1,55 @@
+import pytest
+
+from email_collector import skill_fit
+from email_collector.skill_fit import SkillFitScorer, canonical_skill, candidate_terms, language_term
+
+np = pytest.importorskip("numpy")
+
+
+def _candidate(cv_id, technical, languages=(), soft=()):
+    return {"cv_id": cv_id, "technical_skills": list(technical), "secondary_skills": [],
+            "soft_skills": list(soft), "languages": [{"language": name, "level": "C1"} for name in languages]}
+
+
+POOL = [
+    _candidate("CAND-1", ["Python", "SQL", "Spark"], ["Anglais"]),
+    _candidate("CAND-2", ["Postgres", "SQL"], soft=["Rigueur"]),
+    _candidate("CAND-3", ["Excel"], ["Espagnol"]),
+    _candidate("CAND-4", ["Java", "Kubernetes"], ["English"]),
+]
+OFFERS = [
+    {"title": "Data Engineer Python", "description": "Pipelines Spark, SQL et PostgreSQL. Anglais courant."},
+    {"title": "Comptable", "description": "Clôtures mensuelles"},
+]
+
+
+def test_canonical_terms():
+    assert canonical_skill(" Node.JS ") == canonical_skill("nodejs") == "node.js"
+    assert canonical_skill("C++") == "c++"
+    assert canonical_skill("Postgres") == "postgresql"
+    assert language_term({"language": "Français", "level": "C2"}) == language_term("french") == "lang:french"
+    assert candidate_terms(_candidate("x", ["Python"], soft=["python"])) == {"python": 1.0}
+
+
+def test_top_k_ranks_the_pool_per_offer():
+    engineer, accountant = SkillFitScorer(POOL).top_k(OFFERS, k=3)
+
+    assert [fit.candidate["cv_id"] for fit in engineer] == ["CAND-1", "CAND-2", "CAND-4"]
+    assert engineer[0].skills == ["lang:english", "python", "spark", "sql"]
+    assert 0 < engineer[-1].score < engineer[0].score <= 1
+    assert accountant == []
+
+
+def test_scores_without_scipy_match(monkeypatch):
+    pytest.importorskip("scipy")
+    expected = SkillFitScorer(POOL).scores(OFFERS)
+
+    monkeypatch.setitem(__import__("sys").modules, "scipy.sparse", None)
+    scorer = SkillFitScorer(POOL)
+    assert isinstance(scorer._matrix, tuple)
+    assert np.allclose(scorer.scores(OFFERS), expected)
+
+
+def test_rank_candidates_handles_empty_inputs():
+    assert skill_fit.rank_candidates([], OFFERS) == [[], []]
+    assert skill_fit.rank_candidates(POOL, []) == []
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from email_collector import storage
+from email_collector.skill_index import SkillIndex, candidate_tokens, language_level
+
+
+def _candidate(cv_id, skills, languages=(), experiences=0, name=None):
+    return {
+        "cv_id": cv_id,
+        "full_name": name or cv_id,
+        "job_applied_for": "Data Analyst",
+        "technical_skills": list(skills),
+        "soft_skills": [],
+        "languages": [{"language": language, "level": level} for language, level in languages],
+        "experiences": [{"title": f"Poste {n}"} for n in range(experiences)],
+        "educations": [],
+    }
+
+
+POOL = [
+    _candidate("CAND-001", ["Python", "SQL"], [("Anglais", "C1")], experiences=3),
+    _candidate("CAND-002", ["python", "Power BI"], [("English", "B2")], experiences=5),
+    _candidate("CAND-003", ["SQL", "Postgres"], [("Français", "Langue maternelle")], experiences=1),
+    _candidate("CAND-004", ["Java"], [("Anglais", "natif")], experiences=4),
+]
+
+
+@pytest.fixture
+def index():
+    index = SkillIndex()
+    for candidate in POOL:
+        index.add(candidate, "candidates_data_analyst_20251014.json")
+    return index
+
+
+def _ids(index, query):
+    return [entry.cv_id for entry in index.search(query)]
+
+
+def test_tokens_and_levels():
+    tokens = candidate_tokens(POOL[0])
+    assert {"python", "sql", "lang:english", "lang:english@5", "#experiences=3", "#educations=0"} <= tokens
+    assert language_level("Courant") == 5
+    assert language_level("niveau B2 (TOEIC)") == 4
+    assert language_level("Langue maternelle") == 7
+    assert language_level(None) == 0
+
+
+def test_boolean_queries(index):
+    assert _ids(index, "Python AND SQL") == ["CAND-001"]
+    assert _ids(index, "python sql") == ["CAND-001"]
+    assert _ids(index, "python OR postgresql") == ["CAND-001", "CAND-002", "CAND-003"]
+    assert _ids(index, "sql AND NOT python") == ["CAND-003"]
+    assert _ids(index, '"power bi" OR (java AND NOT sql)') == ["CAND-002", "CAND-004"]
+    assert _ids(index, "anglais") == ["CAND-001", "CAND-002", "CAND-004"]
+    assert _ids(index, "(English C1)") == ["CAND-001", "CAND-004"]
+    assert _ids(index, "Python AND SQL AND (English C1) AND experiences>=3") == ["CAND-001"]
+    assert _ids(index, "experiences > 3 AND NOT java") == ["CAND-002"]
+    assert _ids(index, "skills=1") == ["CAND-004"]
+    assert index.count("english c1 or francais") == 3
+    assert index.search("") == []
+    assert len(index.search("NOT cobol", limit=2)) == 2
+
+
+@pytest.mark.parametrize("query", ["python AND", "(python", "python)", "salary>=3"])
+def test_invalid_queries(index, query):
+    with pytest.raises(ValueError):
+        index.match(query)
+
+
+def test_follows_storage_appends(tmp_path, index):
+    json_file = str(tmp_path / "candidates_data_analyst_20251015.json")
+    assert _ids(index, "rust") == []
+    index.watch()
+    try:
+        with storage.CandidateStore(json_file) as store:
+            store.append(_candidate("CAND-001", ["Rust"]))
+        storage.append_candidate_to_json(_candidate("CAND-002", ["Rust", "Python"]), json_file)
+        with storage.CandidateStore(str(tmp_path / "unmatched_20251015.json")) as unmatched:
+            unmatched.append({"source_email_id": "m9", "detected_job_title": "Comptable"})
+    finally:
+        index.close()
+    storage.append_candidate_to_json(_candidate("CAND-003", ["Rust"]), json_file)
+
+    assert [(entry.json_file, entry.cv_id) for entry in index.search("rust")] == [(json_file, "CAND-001"),
+                                                                                 (json_file, "CAND-002")]
+    assert len(index.search("python")) == 3
+    # the unmatched store is not indexed
+    assert len(index) == len(POOL) + 2
+
+
+def test_from_folder_skips_duplicates(tmp_path):
+    (tmp_path / "candidates_data_analyst_20251014.json").write_text(json.dumps(POOL[:2]), encoding="utf-8")
+    (tmp_path / "candidates_data_analyst_20251014.jsonl").write_text(
+        "".join(json.dumps(candidate) + "\n" for candidate in POOL[1:3]), encoding="utf-8")
+    (tmp_path / "unmatched_20251014.json").write_text(json.dumps(POOL[3:]), encoding="utf-8")
+
+    index = SkillIndex.from_folder(str(tmp_path))
+    assert len(index) == 3
+    assert _ids(index, "sql") == ["CAND-001", "CAND-003"]
@@ -1,5 +1,12 @@
 import json
-from email_collector.storage import get_next_ids, append_candidate_to_json
+from email_collector.storage import (
+    get_next_ids,
+    append_candidate_to_json,
+    CandidateStore,
+    JsonlCandidateStore,
+    compact_jsonl,
+    jsonl_path_for,
+)
 
 def test_get_next_ids(tmp_path, monkeypatch):
     json_file = tmp_path / "candidates.json"
@@ -20,3 +27,71 @@ def test_append_candidate_to_json(tmp_path):
     saved = json.loads(json_file.read_text())
 
     assert saved[0]["cv_id"] == "CAND-001"
+
+
+def test_candidate_store_buffers_and_flushes(tmp_path):
+    json_file = tmp_path / "candidates.json"
+    json_file.write_text(json.dumps([
+        {"cv_id": "CAND-004", "candidate_id": "PERS-002", "source_email_id": "m1"},
+    ]))
+
+    store = CandidateStore(str(json_file), flush_every=2, flush_interval=None)
+    assert store.is_email_already_processed("m1")
+    assert store.get_next_ids() == (5, 3)
+
+    assert store.append({"cv_id": "CAND-005", "candidate_id": "PERS-003", "source_email_id": "m2"})
+    assert store.is_email_already_processed("m2")
+    assert store.get_next_ids() == (6, 4)
+    assert len(json.loads(json_file.read_text())) == 1
+
+    store.append({"cv_id": "CAND-006", "candidate_id": "PERS-004", "source_email_id": "m3"})
+    assert len(json.loads(json_file.read_text())) == 3
+
+    store.append({"cv_id": "CAND-007", "candidate_id": "PERS-005", "source_email_id": "m4"})
+    assert store.close()
+    saved = json.loads(json_file.read_text())
+    assert [c["source_email_id"] for c in saved] == ["m1", "m2", "m3", "m4"]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_jsonl_store_recovers_torn_line_and_compacts(tmp_path):
+    jsonl_file = tmp_path / "candidates.jsonl"
+    jsonl_file.write_text(
+        json.dumps({"cv_id": "CAND-001", "candidate_id": "PERS-001", "source_email_id": "m1"}) + "\n"
+        + '{"cv_id": "CAND-002", "candid'
+    )
+
+    with JsonlCandidateStore(str(jsonl_file)) as store:
+        assert len(store) == 1
+        assert store.get_next_ids() == (2, 2)
+        store.append({"cv_id": "CAND-002", "candidate_id": "PERS-002", "source_email_id": "m2", "full_name": "Zoé"})
+
+    lines = jsonl_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["source_email_id"] for line in lines] == ["m1", "m2"]
+
+    json_file = compact_jsonl(str(jsonl_file))
+    with open(json_file, encoding="utf-8") as f:
+        exported = f.read()
+    records = json.loads(exported)
+    assert exported == json.dumps(records, indent=2, ensure_ascii=False)
+    assert records[1]["full_name"] == "Zoé"
+
+
+def test_jsonl_store_keeps_candidates_of_a_json_run(tmp_path):
+    json_file = str(tmp_path / "candidates_data_analyst_20251014.json")
+    with CandidateStore(json_file) as store:
+        store.append({"cv_id": "CAND-001", "candidate_id": "PERS-001", "source_email_id": "m1"})
+
+    with JsonlCandidateStore(jsonl_path_for(json_file)) as store:
+        assert store.is_email_already_processed("m1")
+        assert store.get_next_ids() == (2, 2)
+        store.append({"cv_id": "CAND-002", "candidate_id": "PERS-002", "source_email_id": "m2"})
+
+    # reopening does not copy the .json candidates twice
+    with JsonlCandidateStore(jsonl_path_for(json_file)) as store:
+        assert len(store) == 2
+
+    compact_jsonl(jsonl_path_for(json_file), json_file)
+    with open(json_file, encoding="utf-8") as f:
+        assert [record["source_email_id"] for record in json.load(f)] == ["m1", "m2"]
+
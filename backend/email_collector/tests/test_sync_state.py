@@ -0,0 +1,13 @@
+from email_collector.sync_state import load_checkpoint, save_checkpoint
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    state_file = str(tmp_path / "sync_state.json")
+    assert load_checkpoint("rh@example.com", "Data Analyst", state_file) is None
+
+    save_checkpoint("rh@example.com", "Data Analyst", 1234, state_file)
+    save_checkpoint("rh@example.com", "Statisticien", 99, state_file)
+
+    assert load_checkpoint("RH@example.com", "data analyst", state_file) == "1234"
+    assert load_checkpoint("rh@example.com", "Statisticien", state_file) == "99"
+    assert load_checkpoint("other@example.com", "Data Analyst", state_file) is None
@@ -0,0 +1,56 @@
+from email_collector.text_compact import (
+    compact_cv_text,
+    drop_artifacts,
+    normalize_whitespace,
+    remove_repeated_lines,
+    split_sections,
+    truncate_to_budget,
+)
+
+
+def test_normalize_whitespace():
+    text = "Jean  Dupont\t​\r\n\n\n\nData   ﬁnance\n\n"
+    assert normalize_whitespace(text) == "Jean Dupont\n\nData finance"
+
+
+def test_repeated_lines_are_kept_once():
+    pages = ["Jean Dupont - CV\nExpérience A\nPage 1/3",
+             "Jean Dupont - CV\nExpérience B\nPage 2/3",
+             "Jean Dupont - CV\nFormation\nPage 3/3"]
+    text = remove_repeated_lines("\f".join(pages))
+    assert text.count("Jean Dupont - CV") == 1
+    assert text.count("Page") == 1
+    assert "Expérience B" in text
+
+
+def test_single_page_is_untouched():
+    assert remove_repeated_lines("Jean\nJean") == "Jean\nJean"
+
+
+def test_drop_artifacts():
+    text = "•  Python\n______\nSQL.........Excel\n- 2 -\n12/14\n+33 6 12 34 56 78"
+    assert drop_artifacts(text) == "- Python\nSQL Excel\n+33 6 12 34 56 78"
+
+
+def test_split_sections():
+    sections = split_sections("Jean Dupont\nEXPÉRIENCES\nACME\nCentres d’intérêt :\nFoot")
+    assert [priority for priority, _ in sections] == [0, 1, 7]
+
+
+def test_truncation_keeps_the_most_useful_sections():
+    text = "\n".join(["Jean Dupont", "jean@example.com",
+                      "Centres d'intérêt", "Randonnée " * 40,
+                      "Expérience professionnelle", "Data analyst chez ACME, 2020-2023"])
+    truncated, was_truncated = truncate_to_budget(text, 30)
+    assert was_truncated
+    assert len(truncated) <= 30 * 4
+    assert "Data analyst chez ACME" in truncated and "jean@example.com" in truncated
+    # original order is preserved
+    assert truncated.index("Jean Dupont") < truncated.index("Expérience")
+
+
+def test_compact_cv_text_reports_reduction():
+    result = compact_cv_text("Jean   Dupont\n\n\n\n" + "Python\n" * 3)
+    assert result.text == "Jean Dupont\n\nPython\nPython\nPython"
+    assert result.tokens_after < result.tokens_before
+    assert not result.truncated
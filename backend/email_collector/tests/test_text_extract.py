@@ -1,5 +1,6 @@
+import time
 import pytest
-from email_collector.text_extract import extract_text
+from email_collector.text_extract import extract_text, extract_capped, ExtractionService
 
 def test_extract_text_pdf(monkeypatch):
     def fake_pdf(path):
@@ -15,3 +16,30 @@ def test_extract_text_docx(monkeypatch):
 
 def test_extract_text_unknown():
     assert extract_text("file.txt") == ""
+
+
+def test_extract_text_from_bytes_uses_filename(monkeypatch):
+    monkeypatch.setattr("email_collector.text_extract.extract_text_from_pdf", lambda source: bytes(source).decode())
+    assert extract_text(memoryview(b"PDF bytes"), filename="CV.PDF") == "PDF bytes"
+    assert extract_text(b"PDF bytes") == ""
+
+
+def _slow_worker(source, max_pages, max_chars, filename=None):
+    if b"slow" in source:
+        time.sleep(30)
+    return extract_capped(source, max_pages, max_chars, filename)
+
+
+def test_extract_capped_reports_errors():
+    result = extract_capped("notes.txt")
+    assert result.text == ""
+    assert result.error.startswith("ValueError")
+
+
+def test_extraction_service_times_out_and_keeps_going():
+    with ExtractionService(max_workers=1, timeout=2, worker=_slow_worker) as service:
+        slow = service.extract(b"slow", "cv.txt")
+        after = service.extract(memoryview(b"fast"), "cv.txt")
+
+    assert slow.error == "timeout after 2s"
+    assert after.error.startswith("ValueError")
@@ -5,6 +5,7 @@ def test_normalize_job_title():
     assert normalize_job_title("Statisticien Débutant") == "statisticien debutant"
     assert normalize_job_title("  DATA   Analyst  ") == "data analyst"
     assert normalize_job_title("Économétricien") == "econometricien"
+    assert normalize_job_title("Chargée de Cœur\tde métier") == "chargee de coeur de metier"
 
 def test_job_titles_match():
     assert job_titles_match("Statisticien débutant", "Statisticien")
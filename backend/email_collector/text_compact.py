@@ -0,0 +1,198 @@
+"""Compaction of extracted CV text before it is sent to the LLM.
+
+The raw output of ``text_extract`` carries page headers and footers repeated
+on every page, runs of whitespace, bullet glyphs, dotted leaders and other
+layout artifacts. Prompt tokens drive both Groq latency and the rate-limit
+budget, so ``compact_cv_text`` strips them and, when the CV is still over
+``token_budget``, truncates it section by section, least useful sections
+(references, interests...) first.
+
+Pages are separated by a form feed (``\\f``), as produced by ``_read_pdf``.
+"""
+
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+try:
+    from .rate_limit import estimate_tokens
+except Exception:
+    from rate_limit import estimate_tokens
+
+
+DEFAULT_TOKEN_BUDGET = 3000
+PAGE_BREAK = "\f"
+# a repeated line longer than this is content, not a header / footer
+MAX_REPEATED_LINE = 120
+# a heading is a short line starting with one of the keywords below
+MAX_HEADING = 50
+
+CompactionResult = namedtuple("CompactionResult", ["text", "tokens_before", "tokens_after", "truncated"])
+
+# lower priority = kept first when the budget is tight; the lines before the
+# first heading (name, contacts) have priority 0
+SECTIONS = [
+    (1, ("experience", "parcours", "emploi", "employment", "work history", "historique professionnel")),
+    (2, ("competence", "skills", "savoir-faire", "outils", "technologies", "informatique", "stack")),
+    (3, ("formation", "education", "diplome", "etudes", "cursus", "academic")),
+    (4, ("langue", "language")),
+    (5, ("profil", "profile", "resume", "summary", "a propos", "about", "objectif", "objective")),
+    (6, ("certification", "projet", "project", "realisation", "publication", "benevolat", "volunteer")),
+    (7, ("centre d'interet", "centres d'interet", "interet", "interest", "loisir", "hobbies", "passion")),
+    (8, ("reference",)),
+]
+
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f\u200b-\u200f\u202a-\u202e\u2060\ufeff\ufffd]")
+# NFKC already turned the exotic spaces (nbsp, thin space...) into " "
+_SPACES_RE = re.compile(r"[ \t]+")
+_LEADER_RE = re.compile(r"([.\-_=*~·•])\1{3,}")
+_BULLET_RE = re.compile(r"^[•▪●◦■□◆◇►▸➢➤✓✔❖-]+\s*")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(/|sur|of)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.IGNORECASE)
+
+
+def normalize_whitespace(text):
+    """NFKC-normalize, drop control characters and collapse blank runs.
+
+    Lines are stripped, spaces collapsed and at most one empty line is kept
+    in a row; page breaks are preserved.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL_RE.sub("", text)
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = []
+        for line in page.split("\n"):
+            line = _SPACES_RE.sub(" ", line).strip()
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        while lines and not lines[-1]:
+            lines.pop()
+        pages.append("\n".join(lines))
+    return PAGE_BREAK.join(pages)
+
+
+def _line_signature(line):
+    # "Page 2/3" and "Page 3/3" are the same footer
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def remove_repeated_lines(text):
+    """Drop header / footer lines repeated on every page.
+
+    The first occurrence is kept, so a name or contact line printed at the
+    top of each page still reaches the LLM once.
+    """
+    pages = text.split(PAGE_BREAK)
+    if len(pages) < 2:
+        return text
+
+    per_page = Counter()
+    for page in pages:
+        per_page.update({_line_signature(line) for line in page.split("\n") if 0 < len(line) <= MAX_REPEATED_LINE})
+    repeated = {signature for signature, count in per_page.items() if count == len(pages)}
+    if not repeated:
+        return text
+
+    seen = set()
+    kept_pages = []
+    for page in pages:
+        lines = []
+        for line in page.split("\n"):
+            signature = _line_signature(line)
+            if signature in repeated:
+                if signature in seen:
+                    continue
+                seen.add(signature)
+            lines.append(line)
+        kept_pages.append("\n".join(lines))
+    return PAGE_BREAK.join(kept_pages)
+
+
+def drop_artifacts(text):
+    """Remove lines without text, page numbers, dotted leaders and bullet glyphs."""
+    lines = []
+    for line in text.replace(PAGE_BREAK, "\n").split("\n"):
+        if line and (not any(c.isalnum() for c in line) or _PAGE_NUMBER_RE.match(line)):
+            continue
+        line = _BULLET_RE.sub("- ", _LEADER_RE.sub(" ", line)).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def _heading_priority(line):
+    if not line or len(line) > MAX_HEADING:
+        return None
+    key = unicodedata.normalize("NFKD", line.lower())
+    key = "".join(c for c in key if not unicodedata.combining(c)).replace("’", "'")
+    key = key.strip(" -:•*#|")
+    for priority, keywords in SECTIONS:
+        if key.startswith(keywords):
+            return priority
+    return None
+
+
+def split_sections(text):
+    """Split ``text`` into ``[(priority, lines)]`` at recognized headings."""
+    sections = [(0, [])]
+    for line in text.split("\n"):
+        priority = _heading_priority(line)
+        if priority is not None:
+            sections.append((priority, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(priority, lines) for priority, lines in sections if any(lines)]
+
+
+def _fit_lines(lines, budget_chars):
+    kept = []
+    used = 0
+    for line in lines:
+        cost = len(line) + 1
+        if used + cost > budget_chars:
+            remaining = budget_chars - used - 1
+            # a long paragraph is cut rather than dropped whole
+            if remaining > 40:
+                kept.append(line[:remaining].rsplit(" ", 1)[0])
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def truncate_to_budget(text, token_budget):
+    """Fit ``text`` in ``token_budget`` tokens, giving the budget to the most
+    useful sections first. Sections keep their original order.
+    """
+    budget_chars = token_budget * 4
+    if len(text) <= budget_chars:
+        return text, False
+
+    sections = split_sections(text)
+    allocation = {}
+    remaining = budget_chars
+    for index in sorted(range(len(sections)), key=lambda i: sections[i][0]):
+        size = sum(len(line) + 1 for line in sections[index][1])
+        allocation[index] = min(size, remaining)
+        remaining -= allocation[index]
+
+    kept = []
+    for index, (_, lines) in enumerate(sections):
+        # a heading alone is not worth its tokens
+        fitted = _fit_lines(lines, allocation[index])
+        if len(fitted) > 1 or (fitted and _heading_priority(fitted[0]) is None):
+            kept.extend(fitted)
+    return "\n".join(kept).strip(), True
+
+
+def compact_cv_text(text, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Run every compaction step; ``token_budget=None`` disables truncation."""
+    tokens_before = estimate_tokens(text)
+    compacted = drop_artifacts(remove_repeated_lines(normalize_whitespace(text)))
+    truncated = False
+    if token_budget is not None:
+        compacted, truncated = truncate_to_budget(compacted, token_budget)
+    return CompactionResult(compacted, tokens_before, estimate_tokens(compacted), truncated)
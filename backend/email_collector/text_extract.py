@@ -2,43 +2,224 @@
 
 Imports are performed lazily so the package can be imported even if
 optional dependencies (PyMuPDF / python-docx) are not installed.
+
+``ExtractionService`` runs extractions in a process pool with per-file
+timeouts and page / character caps, and reports each file as an
+``ExtractionResult`` so one pathological document cannot stall a run.
+
+Every extractor accepts either a file path or the file content itself
+(``bytes`` / ``memoryview``), in which case nothing touches the disk.
 """
 
-def extract_text_from_pdf(filepath):
+import io
+import os
+import time
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+MAX_PAGES = 40
+MAX_CHARS = 60000
+EXTRACTION_TIMEOUT = 60
+
+# ``error`` is None on success; ``truncated`` tells whether a cap was hit
+ExtractionResult = namedtuple("ExtractionResult", ["path", "text", "error", "pages", "truncated", "elapsed"])
+
+
+def _is_content(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def _source_name(source, filename=None):
+    """Name used to pick the extractor: ``filename`` for in-memory content."""
+    if _is_content(source):
+        return (filename or "").lower()
+    return source.lower()
+
+
+def _read_pdf(source, max_pages=None, max_chars=None):
     try:
         import fitz
     except Exception:
         raise ImportError("PyMuPDF (fitz) is required to extract text from PDFs. Install 'pymupdf'.")
 
+    if _is_content(source):
+        doc = fitz.open(stream=io.BytesIO(source), filetype="pdf")
+    else:
+        doc = fitz.open(source)
     try:
-        doc = fitz.open(filepath)
-        text = ""
-        for page in doc:
-            text += page.get_text()
+        page_count = doc.page_count
+        # collect the pages and join once: repeated += is quadratic on long documents
+        chunks = []
+        total = 0
+        for index, page in enumerate(doc):
+            if max_pages is not None and index >= max_pages:
+                break
+            chunk = page.get_text()
+            chunks.append(chunk)
+            total += len(chunk)
+            if max_chars is not None and total >= max_chars:
+                break
+    finally:
         doc.close()
-        return text.strip()
+
+    # pages are separated by a form feed so that text_compact can spot the
+    # headers and footers repeated on each of them
+    text = "\f".join(chunks)
+    truncated = len(chunks) < page_count
+    if max_chars is not None and len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    return text.strip(), len(chunks), truncated
+
+
+def _read_docx(source, max_chars=None):
+    try:
+        import docx
+    except Exception:
+        raise ImportError("python-docx is required to extract text from DOCX files. Install 'python-docx'.")
+
+    doc = docx.Document(io.BytesIO(source) if _is_content(source) else source)
+    paragraphs = []
+    total = 0
+    for p in doc.paragraphs:
+        paragraphs.append(p.text)
+        total += len(p.text) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+
+    text = "\n".join(paragraphs)
+    truncated = len(paragraphs) < len(doc.paragraphs)
+    if max_chars is not None and len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    return text.strip(), None, truncated
+
+
+def extract_text_from_pdf(filepath, max_pages=None, max_chars=None):
+    try:
+        import fitz  # noqa: F401
+    except Exception:
+        raise ImportError("PyMuPDF (fitz) is required to extract text from PDFs. Install 'pymupdf'.")
+
+    try:
+        return _read_pdf(filepath, max_pages, max_chars)[0]
     except Exception:
         return ""
 
 
-def extract_text_from_docx(filepath):
+def extract_text_from_docx(filepath, max_chars=None):
     try:
-        import docx
+        import docx  # noqa: F401
     except Exception:
         raise ImportError("python-docx is required to extract text from DOCX files. Install 'python-docx'.")
 
     try:
-        doc = docx.Document(filepath)
-        text = "\n".join([p.text for p in doc.paragraphs])
-        return text.strip()
+        return _read_docx(filepath, max_chars)[0]
     except Exception:
         return ""
 
 
-def extract_text(filepath):
-    path = filepath.lower()
+def extract_text(source, filename=None):
+    """Extract the text of a PDF / DOCX path, or of its content with ``filename``."""
+    path = _source_name(source, filename)
     if path.endswith(".pdf"):
-        return extract_text_from_pdf(filepath)
+        return extract_text_from_pdf(source)
     if path.endswith(".docx"):
-        return extract_text_from_docx(filepath)
+        return extract_text_from_docx(source)
     return ""
+
+
+def extract_capped(source, max_pages=MAX_PAGES, max_chars=MAX_CHARS, filename=None):
+    """Extract one file and describe the outcome as an ``ExtractionResult``.
+
+    Runs in the pool workers; never raises.
+    """
+    start = time.monotonic()
+    label = filename if _is_content(source) else source
+    try:
+        path = _source_name(source, filename)
+        if path.endswith(".pdf"):
+            text, pages, truncated = _read_pdf(source, max_pages, max_chars)
+        elif path.endswith(".docx"):
+            text, pages, truncated = _read_docx(source, max_chars)
+        else:
+            raise ValueError(f"unsupported file type: {os.path.basename(label or '')}")
+    except Exception as e:
+        return ExtractionResult(label, "", f"{type(e).__name__}: {e}", None, False, time.monotonic() - start)
+    return ExtractionResult(label, text, None, pages, truncated, time.monotonic() - start)
+
+
+class ExtractionService:
+    """Process pool running ``extract_capped`` with a timeout per file.
+
+    A worker stuck on a file past ``timeout`` seconds is killed and the pool
+    is rebuilt; the file is reported as a timeout and the other files keep
+    flowing. ``extract`` is safe to call from several threads.
+    """
+
+    def __init__(self, max_workers=None, timeout=EXTRACTION_TIMEOUT, max_pages=MAX_PAGES, max_chars=MAX_CHARS,
+                 worker=extract_capped):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self._worker = worker
+        self._lock = threading.Lock()
+        self._executor = None
+        self._generation = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs pipeline threads is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor, self._generation
+
+    def _recycle(self, generation):
+        with self._lock:
+            if generation != self._generation or self._executor is None:
+                return
+            executor, self._executor = self._executor, None
+            self._generation += 1
+        # there is no public way to stop one task: kill the workers and start over
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, source, filename=None):
+        """Extract a path, or in-memory content named by ``filename``."""
+        if isinstance(source, memoryview):
+            # memoryviews cannot be pickled to the pool
+            source = source.tobytes()
+        label = filename if _is_content(source) else source
+        for attempt in range(2):
+            executor, generation = self._get_executor()
+            start = time.monotonic()
+            try:
+                future = executor.submit(self._worker, source, self.max_pages, self.max_chars, filename)
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self._recycle(generation)
+                return ExtractionResult(label, "", f"timeout after {self.timeout}s", None, False,
+                                        time.monotonic() - start)
+            except (BrokenProcessPool, CancelledError, RuntimeError) as e:
+                # the pool was recycled under us because of another file: retry once
+                self._recycle(generation)
+                if attempt:
+                    return ExtractionResult(label, "", f"{type(e).__name__}: {e}", None, False,
+                                            time.monotonic() - start)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
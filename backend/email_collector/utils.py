@@ -1,25 +1,26 @@
 import re
+import unicodedata
+
+
+def _accent_table():
+    # every Latin letter with a diacritic -> its base letter, built once
+    table = {}
+    for code in range(0xC0, 0x250):
+        base = unicodedata.normalize("NFKD", chr(code))[0]
+        if base != chr(code) and base.isascii():
+            table[code] = base
+    table.update({ord("œ"): "oe", ord("æ"): "ae"})
+    return table
+
+
+_ACCENTS = _accent_table()
 
 
 def normalize_job_title(job_title):
     if not job_title:
         return ""
-
-    replacements = {
-        'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
-        'à': 'a', 'â': 'a', 'ä': 'a',
-        'î': 'i', 'ï': 'i',
-        'ô': 'o', 'ö': 'o',
-        'ù': 'u', 'û': 'u', 'ü': 'u',
-        'ç': 'c'
-    }
-
-    jt = job_title.lower()
-    for a, r in replacements.items():
-        jt = jt.replace(a, r)
-
-    jt = re.sub(r'\s+', ' ', jt).strip()
-    return jt
+    # one C-level pass instead of a str.replace per accented letter
+    return " ".join(job_title.lower().translate(_ACCENTS).split())
 
 
 def job_titles_match(subject_job, target_job):
@@ -0,0 +1,23 @@
+"""Migration des fichiers de candidats JSON vers la base SQLite RH.
+
+Usage : python import_candidates.py [dossier] [--db rh_jobs.db]
+"""
+
+import argparse
+import os
+
+from service_database import CandidateRepository, DB_PATH
+
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "email_collector", "candidates")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importe les fichiers candidates_*.json dans la base RH")
+    parser.add_argument("folder", nargs="?", default=DEFAULT_FOLDER)
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    repo = CandidateRepository(args.db)
+    added = repo.import_json_folder(args.folder)
+    print(f"✅ {added} candidat(s) importé(s) depuis {args.folder}")
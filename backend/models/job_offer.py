@@ -1,17 +1,28 @@
 
 
 class JobOffer:
-    """Objet représentant une offre d'emploi."""
+    """Objet représentant une offre d'emploi.
 
-    def __init__(self, title: str, department: str, description: str,
+    Les offres lues sans leur description (``JobOfferRepository.iter_offers``
+    avec ``columns``) la chargent au premier accès via ``load_description``.
+    """
+
+    __slots__ = (
+        "id", "title", "department", "_description", "_load_description",
+        "file_path", "location", "salary", "status", "created_at", "updated_at",
+    )
+
+    def __init__(self, title: str, department: str, description: str = None,
                  location: str = None, salary: str = None,
                  status: int = 1, offer_id: int = None,
                  file_path: str = None,
-                 created_at: str = None, updated_at: str = None):
+                 created_at: str = None, updated_at: str = None,
+                 load_description=None):
         self.id = offer_id
         self.title = title
         self.department = department
-        self.description = description
+        self._description = description
+        self._load_description = load_description if description is None else None
         self.file_path = file_path
         self.location = location
         self.salary = salary
@@ -19,5 +30,17 @@ class JobOffer:
         self.created_at = created_at
         self.updated_at = updated_at
 
+    @property
+    def description(self) -> str:
+        if self._load_description is not None:
+            self._description = self._load_description()
+            self._load_description = None
+        return self._description
+
+    @description.setter
+    def description(self, value: str):
+        self._description = value
+        self._load_description = None
+
     def __repr__(self):
-        return f"<JobOffer id={self.id} title='{self.title}' dept='{self.department}' status='{self.status}'>"
\ No newline at end of file
+        return f"<JobOffer id={self.id} title='{self.title}' dept='{self.department}' status='{self.status}'>"
@@ -1,10 +1,154 @@
+import glob
+import json
+import os
+import queue
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 from models.job_offer import *
 
 DB_PATH = "rh_jobs.db"
 
+# WAL : les lectures n'attendent plus l'écriture en cours. synchronous=NORMAL
+# reste sûr en WAL (seules les dernières transactions peuvent être perdues
+# sur coupure de courant) et évite un fsync par commit.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+)
+POOL_SIZE = 4
+
+
+class ConnectionPool:
+    """Petit pool de connexions SQLite réutilisées, partagé par les dépôts d'une même base."""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        # chaque connexion ":memory:" serait une base différente
+        self.size = 1 if db_path == ":memory:" else size
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._schemas = set()
+        self._schema_lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        # une connexion sert un seul thread à la fois, mais pas toujours le même
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"pool de connexions fermé ({self.db_path})")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if not self._closed and len(self._connections) < self.size:
+                    conn = self._open()
+                    self._connections.append(conn)
+                    return conn
+            try:
+                # réveil régulier pour ne pas attendre indéfiniment un pool fermé entre-temps
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+        # rendue après close() : elle ne doit plus servir
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Connexion du pool, dans une transaction validée en sortie (annulée sur erreur)."""
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+
+    def ensure_schema(self, name: str, create) -> None:
+        """Exécute ``create()`` une seule fois par base et par processus."""
+        with self._schema_lock:
+            if name not in self._schemas:
+                create()
+                self._schemas.add(name)
+
+    def close(self) -> None:
+        """Ferme les connexions libres ; celles en cours d'utilisation le seront à
+        leur retour. Le pool ne distribue plus de connexion ensuite."""
+        with self._lock:
+            self._closed = True
+            self._connections = []
+            idle = []
+            while True:
+                try:
+                    idle.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for conn in idle:
+            conn.close()
+        self._schemas.clear()
+
+
+# recherche plein texte : insensible aux accents ("developpeur" trouve "Développeur")
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+
+
+def fts_query(text: str) -> str:
+    """Mots-clés libres -> requête FTS5 : tous les termes requis, chacun entre
+    guillemets pour que "C++" ou "data-analyst" ne soient pas lus comme des opérateurs.
+    Un ``*`` final cherche par préfixe ("développ*")."""
+    terms = []
+    for term in re.findall(r'[^\s"]+', text or ""):
+        if term.endswith("*") and term.strip("*"):
+            terms.append(f'"{term.rstrip("*")}"*')
+        elif term.strip("*"):
+            terms.append(f'"{term}"')
+    return " ".join(terms)
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DB_PATH) -> ConnectionPool:
+    """Pool de la base ``db_path``, créé au premier appel."""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_path)
+        return _pools[key]
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
 
 
 class JobOfferRepository:
@@ -12,13 +156,11 @@ class JobOfferRepository:
 
     def __init__(self, db_path: str = DB_PATH):
         self.db_path = db_path
-        print("="*10)
-        print("INITIALISATION DE LA BASE DE DONNEE RH")
-        print("="*10)
-        self.init_db()
+        self._pool = get_pool(db_path)
+        self._pool.ensure_schema("job_offers", self.init_db)
 
     def init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -36,111 +178,199 @@ class JobOfferRepository:
                 )
                 """
             )
-            print("la tables des offres a ete cree")
-            conn.commit()
+            # pagination par clé filtrée : (filtre, id) sert à la fois le WHERE et le ORDER BY
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_job_offers_status ON job_offers (status, id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_job_offers_department ON job_offers (department, id)")
+            self._init_search(conn)
 
-    def add(self, offer: JobOffer) -> int:
+    def _init_search(self, conn: sqlite3.Connection):
+        """Index FTS5 adossé à la table (pas de copie du texte), tenu à jour par triggers."""
+        created = not _table_exists(conn, "job_offers_fts")
+        conn.executescript(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS job_offers_fts USING fts5(
+                title, department, description,
+                content='job_offers', content_rowid='id', tokenize='{FTS_TOKENIZE}'
+            );
+            CREATE TRIGGER IF NOT EXISTS job_offers_fts_insert AFTER INSERT ON job_offers BEGIN
+                INSERT INTO job_offers_fts (rowid, title, department, description)
+                VALUES (new.id, new.title, new.department, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS job_offers_fts_delete AFTER DELETE ON job_offers BEGIN
+                INSERT INTO job_offers_fts (job_offers_fts, rowid, title, department, description)
+                VALUES ('delete', old.id, old.title, old.department, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS job_offers_fts_update
+            AFTER UPDATE OF title, department, description ON job_offers BEGIN
+                INSERT INTO job_offers_fts (job_offers_fts, rowid, title, department, description)
+                VALUES ('delete', old.id, old.title, old.department, old.description);
+                INSERT INTO job_offers_fts (rowid, title, department, description)
+                VALUES (new.id, new.title, new.department, new.description);
+            END;
+            """
+        )
+        if created:
+            # base existante : indexer les offres déjà présentes
+            conn.execute("INSERT INTO job_offers_fts (job_offers_fts) VALUES ('rebuild')")
+
+    def _insert(self, cur: sqlite3.Cursor, offer: JobOffer) -> str:
         offer.created_at = datetime.now(timezone.utc).isoformat()
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO job_offers (title, department, description, location, salary, status, created_at,file_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    offer.title,
-                    offer.department,
-                    offer.description,
-                    offer.location,
-                    offer.salary,
-                    offer.status,
-                    offer.created_at,
-                    offer.file_path
-                ),
-            )
-            conn.commit()
-            offer.id = cur.lastrowid
-            return f'OFFRE_00{offer.id}'
-        
+        cur.execute(
+            """
+            INSERT INTO job_offers (title, department, description, location, salary, status, created_at,file_path)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                offer.title,
+                offer.department,
+                offer.description,
+                offer.location,
+                offer.salary,
+                offer.status,
+                offer.created_at,
+                offer.file_path
+            ),
+        )
+        offer.id = cur.lastrowid
+        return f'OFFRE_00{offer.id}'
 
-    def get(self, offer_id: int) -> JobOffer:
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM job_offers WHERE id = ?", (offer_id,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            return JobOffer(
-                title=row[1],
-                department=row[2],
-                description=row[3],
-                location=row[4],
-                salary=row[5],
-                status=row[6],
-                offer_id=row[0],
-                created_at=row[7],
-                file_path=row[8],
-                updated_at=row[9],
-            )
+    def add(self, offer: JobOffer) -> str:
+        with self._pool.connection() as conn:
+            return self._insert(conn.cursor(), offer)
 
-    def list(self) -> List[JobOffer]:
-        with sqlite3.connect(self.db_path) as conn:
+    def add_many(self, offers: Iterable[JobOffer]) -> List[str]:
+        """Ajoute toutes les offres en une seule transaction (un seul fsync)."""
+        with self._pool.connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM job_offers ORDER BY id DESC")
-            rows = cur.fetchall()
+            return [self._insert(cur, offer) for offer in offers]
 
 
-            if not rows:
-                print("📭 Aucune offre d'emploi disponible.")
-                return []
+    # colonnes dans l'ordre de la table; les lignes sont lues par nom
+    COLUMNS = ("id", "title", "department", "description", "location", "salary",
+               "status", "file_path", "created_at", "updated_at")
+    PAGE_SIZE = 500
 
+    def _to_offer(self, row: sqlite3.Row) -> JobOffer:
+        values = {key: row[key] for key in row.keys()}
+        offer_id = values.pop("id")
+        load_description = None
+        if "description" not in values:
+            # description non demandée : lue seulement si on y accède
+            load_description = lambda: self.get_description(offer_id)
+        return JobOffer(offer_id=offer_id, load_description=load_description,
+                        **{key: values.get(key) for key in self.COLUMNS[1:] if key in values},
+                        **{key: None for key in ("title", "department") if key not in values})
 
-            return [
-                    JobOffer(
-                        title=r[1], department=r[2], description=r[3],
-                        location=r[4], salary=r[5], status=r[6],
-                        file_path=r[8],
-                        offer_id=r[0], created_at=r[7], updated_at=r[9]
-                    ) for r in rows
-                    ]
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM job_offers ORDER BY id DESC")
-            rows = cur.fetchall()
-            return [
-                    JobOffer(
-                        title=r[1], department=r[2], description=r[3],
-                        location=r[4], salary=r[5], status=r[6],
-                        file_path=r[7], offer_id=r[0], created_at=r[8], updated_at=r[9]
-                    ) for r in rows
-                    ]
+    def get(self, offer_id: int) -> Optional[JobOffer]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT * FROM job_offers WHERE id = ?", (offer_id,)).fetchone()
+        return self._to_offer(row) if row else None
+
+    def get_description(self, offer_id: int) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT description FROM job_offers WHERE id = ?", (offer_id,)).fetchone()
+        return row["description"] if row else None
+
+    def iter_offers(self, status=None, department: str = None, columns: Iterable[str] = None,
+                    page_size: int = PAGE_SIZE) -> Iterator[JobOffer]:
+        """Parcourt les offres, les plus récentes d'abord, page par page.
+
+        Pagination par clé (``id < dernier id vu``) : chaque page est une
+        requête indexée sur la clé primaire, quelle que soit sa profondeur, et
+        aucune connexion n'est gardée entre deux pages. ``columns`` limite les
+        colonnes lues (``id`` est toujours inclus); sans ``description``,
+        celle-ci est chargée à la demande.
+        """
+        columns = self.COLUMNS if columns is None else ("id",) + tuple(c for c in columns if c != "id")
+        unknown = set(columns) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"colonnes inconnues : {', '.join(sorted(unknown))}")
+
+        filters, params = [], []
+        if status is not None:
+            filters.append("status = ?")
+            params.append(status)
+        if department is not None:
+            filters.append("department = ?")
+            params.append(department)
+        query = f"SELECT {', '.join(columns)} FROM job_offers WHERE id < ?"
+        query += "".join(f" AND {f}" for f in filters)
+        query += " ORDER BY id DESC LIMIT ?"
+
+        last_id = float("inf")
+        while True:
+            with self._pool.connection() as conn:
+                rows = conn.execute(query, [last_id, *params, page_size]).fetchall()
+            for row in rows:
+                yield self._to_offer(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def search(self, query: str, status=None, limit: int = 20) -> List[JobOffer]:
+        """Offres correspondant à tous les mots-clés, les plus pertinentes d'abord (BM25).
+
+        Un terme trouvé dans le titre compte plus que dans le département, et
+        plus encore que dans la description, qui n'est lue qu'à la demande.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        columns = ", ".join(f"o.{c}" for c in self.COLUMNS if c != "description")
+        sql = f"""
+            SELECT {columns} FROM job_offers_fts
+            JOIN job_offers o ON o.id = job_offers_fts.rowid
+            WHERE job_offers_fts MATCH ?
+        """
+        params = [match]
+        if status is not None:
+            sql += " AND o.status = ?"
+            params.append(status)
+        sql += " ORDER BY bm25(job_offers_fts, 10.0, 3.0, 1.0) LIMIT ?"
+        params.append(limit)
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._to_offer(row) for row in rows]
+
+    def list(self) -> List[JobOffer]:
+        offers = list(self.iter_offers())
+        if not offers:
+            print("📭 Aucune offre d'emploi disponible.")
+        return offers
+
+    UPDATE_SQL = """
+        UPDATE job_offers SET
+            title = ?, department = ?, description = ?,
+            location = ?, salary = ?, status = ?, file_path = ? , updated_at = ?
+        WHERE id = ?
+    """
+
+    @staticmethod
+    def _update_params(offer: JobOffer) -> tuple:
+        offer.updated_at = datetime.now(timezone.utc).isoformat()
+        return (
+            offer.title,
+            offer.department,
+            offer.description,
+            offer.location,
+            offer.salary,
+            offer.status,
+            offer.file_path,
+            offer.updated_at,
+            offer.id,
+        )
 
     def update(self, offer: JobOffer) -> bool:
-        offer.updated_at = datetime.utcnow().isoformat()
-        with sqlite3.connect(self.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                UPDATE job_offers SET
-                    title = ?, department = ?, description = ?,
-                    location = ?, salary = ?, status = ?, file_path = ? , updated_at = ?
-                WHERE id = ?
-                """,
-                (
-                    offer.title,
-                    offer.department,
-                    offer.description,
-                    offer.location,
-                    offer.salary,
-                    offer.status,
-                    offer.updated_at,
-                    offer.id,
-                ),
-            )
-            conn.commit()
+        with self._pool.connection() as conn:
+            cur = conn.execute(self.UPDATE_SQL, self._update_params(offer))
             return cur.rowcount > 0
 
+    def update_many(self, offers: Iterable[JobOffer]) -> int:
+        """Met à jour toutes les offres en une seule transaction; retourne le nombre de lignes modifiées."""
+        with self._pool.connection() as conn:
+            cur = conn.executemany(self.UPDATE_SQL, [self._update_params(offer) for offer in offers])
+            return cur.rowcount
+
     def delete(self, offer_id: int) -> bool:
         """Supprime une offre après confirmation et vérifie son existence."""
         # Vérifier si l'offre existe
@@ -158,10 +388,9 @@ class JobOfferRepository:
 
 
         # Suppression si confirmé
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection() as conn:
             cur = conn.cursor()
             cur.execute("DELETE FROM job_offers WHERE id = ?", (offer_id,))
-            conn.commit()
             if cur.rowcount > 0:
                 print(f"🗑️ Offre {offer_id} supprimée avec succès.")
                 return True
@@ -170,6 +399,367 @@ class JobOfferRepository:
                 return False
 
 
+class CandidateRepository:
+    """Stockage normalisé des candidats extraits des CV (même base que les offres)."""
+
+    SKILL_KINDS = {
+        "technical_skills": "technical",
+        "secondary_skills": "secondary",
+        "soft_skills": "soft",
+    }
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._pool = get_pool(db_path)
+        self._pool.ensure_schema("candidates", self.init_db)
+
+    def _connect(self):
+        """Connexion du pool (foreign_keys actif, lignes ``sqlite3.Row``), dans une transaction."""
+        return self._pool.connection()
+
+    def init_db(self):
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS candidates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cv_id TEXT NOT NULL DEFAULT '',
+                    candidate_id TEXT,
+                    source_email_id TEXT NOT NULL DEFAULT '',
+                    application_datetime TEXT,
+                    job_applied_for TEXT COLLATE NOCASE,
+                    first_name TEXT,
+                    last_name TEXT,
+                    full_name TEXT,
+                    email TEXT,
+                    phone_number TEXT,
+                    interests TEXT,
+                    summary TEXT,
+                    source_file TEXT,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS candidate_skills (
+                    candidate_pk INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    kind TEXT NOT NULL,
+                    skill TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS candidate_languages (
+                    candidate_pk INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    language TEXT,
+                    level TEXT
+                );
+                CREATE TABLE IF NOT EXISTS candidate_experiences (
+                    candidate_pk INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    title TEXT,
+                    company TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    missions TEXT,
+                    technical_skills_used TEXT,
+                    soft_skills_used TEXT
+                );
+                CREATE TABLE IF NOT EXISTS candidate_educations (
+                    candidate_pk INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    title TEXT,
+                    institution TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    description TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_candidates_source_email_id ON candidates (source_email_id);
+                -- cv_id repart à CAND-001 dans chaque fichier : un candidat est identifié
+                -- par son email source, ou à défaut par son fichier d'origine
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_source_email
+                    ON candidates (source_email_id, cv_id) WHERE source_email_id <> '';
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_candidates_source_file
+                    ON candidates (coalesce(source_file, ''), cv_id) WHERE source_email_id = '';
+                CREATE INDEX IF NOT EXISTS idx_candidates_job_applied_for ON candidates (job_applied_for, application_datetime);
+                CREATE INDEX IF NOT EXISTS idx_candidates_application_datetime ON candidates (application_datetime);
+                CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills (candidate_pk);
+                CREATE INDEX IF NOT EXISTS idx_candidate_languages_candidate ON candidate_languages (candidate_pk);
+                CREATE INDEX IF NOT EXISTS idx_candidate_experiences_candidate ON candidate_experiences (candidate_pk);
+                CREATE INDEX IF NOT EXISTS idx_candidate_educations_candidate ON candidate_educations (candidate_pk);
+                """
+            )
+            self._init_search(conn)
+
+    # texte indexé des compétences et expériences d'un candidat, recalculé par les triggers
+    SKILLS_TEXT = "(SELECT group_concat(skill, ' ') FROM candidate_skills WHERE candidate_pk = {pk})"
+    EXPERIENCES_TEXT = (
+        "(SELECT group_concat(coalesce(title, '') || ' ' || coalesce(company, '') || ' ' || "
+        "coalesce(missions, '') || ' ' || coalesce(technical_skills_used, ''), ' ') "
+        "FROM candidate_experiences WHERE candidate_pk = {pk})"
+    )
+
+    def _init_search(self, conn: sqlite3.Connection):
+        """Index FTS5 des profils (nom, poste, résumé, compétences, expériences).
+
+        Le texte vient de plusieurs tables : l'index a sa propre copie, mise à
+        jour par les triggers de chacune.
+        """
+        created = not _table_exists(conn, "candidates_fts")
+        triggers = []
+        for table, column, text in (("candidate_skills", "skills", self.SKILLS_TEXT),
+                                    ("candidate_experiences", "experiences", self.EXPERIENCES_TEXT)):
+            for event, row in (("INSERT", "new"), ("DELETE", "old")):
+                triggers.append(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE candidates_fts SET {column} = coalesce({text.format(pk=f"{row}.candidate_pk")}, '')
+                    WHERE rowid = {row}.candidate_pk;
+                END;""")
+        conn.executescript(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+                full_name, job_applied_for, summary, skills, experiences, tokenize='{FTS_TOKENIZE}'
+            );
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_insert AFTER INSERT ON candidates BEGIN
+                INSERT INTO candidates_fts (rowid, full_name, job_applied_for, summary, skills, experiences)
+                VALUES (new.id, new.full_name, new.job_applied_for, new.summary, '', '');
+            END;
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_update
+            AFTER UPDATE OF full_name, job_applied_for, summary ON candidates BEGIN
+                UPDATE candidates_fts
+                SET full_name = new.full_name, job_applied_for = new.job_applied_for, summary = new.summary
+                WHERE rowid = new.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS candidates_fts_delete AFTER DELETE ON candidates BEGIN
+                DELETE FROM candidates_fts WHERE rowid = old.id;
+            END;
+            {"".join(triggers)}
+            """
+        )
+        if created:
+            # base existante : indexer les candidats déjà importés
+            conn.execute(
+                f"""
+                INSERT INTO candidates_fts (rowid, full_name, job_applied_for, summary, skills, experiences)
+                SELECT c.id, c.full_name, c.job_applied_for, c.summary,
+                       coalesce({self.SKILLS_TEXT.format(pk="c.id")}, ''),
+                       coalesce({self.EXPERIENCES_TEXT.format(pk="c.id")}, '')
+                FROM candidates c
+                """
+            )
+
+    def _insert(self, cur: sqlite3.Cursor, candidate: dict, source_file: str = None) -> Optional[int]:
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO candidates (
+                cv_id, candidate_id, source_email_id, application_datetime, job_applied_for,
+                first_name, last_name, full_name, email, phone_number, interests, summary,
+                source_file, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                candidate.get("cv_id") or "",
+                candidate.get("candidate_id"),
+                candidate.get("source_email_id") or "",
+                candidate.get("application_datetime"),
+                candidate.get("job_applied_for"),
+                candidate.get("first_name"),
+                candidate.get("last_name"),
+                candidate.get("full_name"),
+                candidate.get("email"),
+                candidate.get("phone_number"),
+                json.dumps(candidate.get("interests") or [], ensure_ascii=False),
+                candidate.get("summary"),
+                source_file,
+                datetime.now(timezone.utc).isoformat(),
+            ),
+        )
+        if cur.rowcount == 0:
+            # déjà importé (même cv_id, même email source ou à défaut même fichier)
+            return None
+        pk = cur.lastrowid
+
+        skills = [
+            (pk, kind, skill)
+            for field, kind in self.SKILL_KINDS.items()
+            for skill in candidate.get(field) or []
+            if isinstance(skill, str) and skill.strip()
+        ]
+        cur.executemany("INSERT INTO candidate_skills (candidate_pk, kind, skill) VALUES (?, ?, ?)", skills)
+
+        cur.executemany(
+            "INSERT INTO candidate_languages (candidate_pk, language, level) VALUES (?, ?, ?)",
+            [(pk, lang.get("language"), lang.get("level"))
+             for lang in candidate.get("languages") or [] if isinstance(lang, dict)],
+        )
+        cur.executemany(
+            """
+            INSERT INTO candidate_experiences (
+                candidate_pk, position, title, company, start_date, end_date,
+                missions, technical_skills_used, soft_skills_used
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    pk, position, exp.get("title"), exp.get("company"),
+                    exp.get("start_date"), exp.get("end_date"), exp.get("missions"),
+                    json.dumps(exp.get("technical_skills_used") or [], ensure_ascii=False),
+                    json.dumps(exp.get("soft_skills_used") or [], ensure_ascii=False),
+                )
+                for position, exp in enumerate(candidate.get("experiences") or [])
+                if isinstance(exp, dict)
+            ],
+        )
+        cur.executemany(
+            """
+            INSERT INTO candidate_educations (
+                candidate_pk, position, title, institution, start_date, end_date, description
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    pk, position, edu.get("title"), edu.get("institution"),
+                    edu.get("start_date"), edu.get("end_date"), edu.get("description"),
+                )
+                for position, edu in enumerate(candidate.get("educations") or [])
+                if isinstance(edu, dict)
+            ],
+        )
+        return pk
+
+    def add(self, candidate: dict, source_file: str = None) -> Optional[int]:
+        """Enregistre un CV et ses listes en une seule transaction.
+
+        Retourne l'identifiant interne, ou None si le CV était déjà présent.
+        """
+        with self._connect() as conn:
+            return self._insert(conn.cursor(), candidate, source_file)
+
+    def is_email_processed(self, source_email_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM candidates WHERE source_email_id = ? LIMIT 1", (source_email_id,)
+            ).fetchone()
+            return row is not None
+
+    def _load(self, conn: sqlite3.Connection, row: sqlite3.Row) -> dict:
+        pk = row["id"]
+        candidate = {k: row[k] for k in row.keys() if k not in ("id", "source_file", "created_at")}
+        candidate["interests"] = json.loads(row["interests"] or "[]")
+
+        for field in self.SKILL_KINDS:
+            candidate[field] = []
+        for kind, skill in conn.execute(
+            "SELECT kind, skill FROM candidate_skills WHERE candidate_pk = ? ORDER BY rowid", (pk,)
+        ):
+            candidate[f"{kind}_skills"].append(skill)
+
+        candidate["languages"] = [
+            {"language": language, "level": level}
+            for language, level in conn.execute(
+                "SELECT language, level FROM candidate_languages WHERE candidate_pk = ? ORDER BY rowid", (pk,)
+            )
+        ]
+        candidate["educations"] = [
+            dict(r) for r in conn.execute(
+                """
+                SELECT title, institution, start_date, end_date, description
+                FROM candidate_educations WHERE candidate_pk = ? ORDER BY position
+                """,
+                (pk,),
+            )
+        ]
+        candidate["experiences"] = []
+        for r in conn.execute(
+            """
+            SELECT title, company, start_date, end_date, missions, technical_skills_used, soft_skills_used
+            FROM candidate_experiences WHERE candidate_pk = ? ORDER BY position
+            """,
+            (pk,),
+        ):
+            exp = dict(r)
+            exp["technical_skills_used"] = json.loads(exp["technical_skills_used"] or "[]")
+            exp["soft_skills_used"] = json.loads(exp["soft_skills_used"] or "[]")
+            candidate["experiences"].append(exp)
+        return candidate
+
+    def get(self, pk: int) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM candidates WHERE id = ?", (pk,)).fetchone()
+            return self._load(conn, row) if row else None
+
+    def list_for_job(self, job_title: str, start: str = None, end: str = None) -> List[dict]:
+        """Candidats d'un poste, éventuellement entre deux dates ISO (fin exclue)."""
+        query = "SELECT * FROM candidates WHERE job_applied_for = ?"
+        params = [job_title]
+        if start:
+            query += " AND application_datetime >= ?"
+            params.append(start)
+        if end:
+            query += " AND application_datetime < ?"
+            params.append(end)
+        query += " ORDER BY application_datetime"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+            return [self._load(conn, row) for row in rows]
+
+    def search(self, query: str, job_title: str = None, limit: int = 20) -> List[dict]:
+        """Candidats correspondant à tous les mots-clés, les plus pertinents d'abord (BM25).
+
+        Les compétences pèsent le plus, puis les expériences et le nom.
+        Chaque résultat porte l'identifiant interne (``id``, pour ``get``), le
+        score BM25 (plus petit = plus pertinent) et un extrait surligné.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = """
+            SELECT c.id, c.cv_id, c.candidate_id, c.full_name, c.email, c.job_applied_for,
+                   c.application_datetime,
+                   bm25(candidates_fts, 2.0, 1.0, 1.0, 5.0, 2.0) AS score,
+                   snippet(candidates_fts, -1, '[', ']', '…', 12) AS excerpt
+            FROM candidates_fts JOIN candidates c ON c.id = candidates_fts.rowid
+            WHERE candidates_fts MATCH ?
+        """
+        params = [match]
+        if job_title:
+            sql += " AND c.job_applied_for = ?"
+            params.append(job_title)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def import_json_file(self, json_file: str) -> int:
+        """Importe un fichier candidates_*.json (ou .jsonl); retourne le nombre de CV ajoutés."""
+        with open(json_file, "r", encoding="utf-8") as f:
+            if json_file.endswith(".jsonl"):
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # ligne vide ou dernière ligne incomplète
+                        continue
+            else:
+                content = f.read().strip()
+                records = json.loads(content) if content else []
+
+        added = 0
+        with self._connect() as conn:
+            cur = conn.cursor()
+            for candidate in records:
+                if self._insert(cur, candidate, source_file=os.path.basename(json_file)) is not None:
+                    added += 1
+        return added
+
+    def import_json_folder(self, folder: str) -> int:
+        """Migre tous les fichiers de candidats d'un dossier (import idempotent)."""
+        added = 0
+        for json_file in sorted(glob.glob(os.path.join(folder, "candidates_*.json*"))):
+            if json_file.endswith((".json", ".jsonl")):
+                added += self.import_json_file(json_file)
+        return added
+
+
 if __name__ == "__main__":
     repo = JobOfferRepository()
 
@@ -0,0 +1,91 @@
+import json
+from service_database import CandidateRepository
+
+
+CANDIDATE = {
+    "cv_id": "CAND-001",
+    "candidate_id": "PERS-001",
+    "source_email_id": "m1",
+    "application_datetime": "2025-10-14T09:30:00",
+    "job_applied_for": "Data Analyst",
+    "full_name": "Jean Dupont",
+    "technical_skills": ["Python", "SQL"],
+    "secondary_skills": [],
+    "soft_skills": ["Rigueur"],
+    "languages": [{"language": "Anglais", "level": "C1"}],
+    "educations": [{"title": "Master", "institution": "ENSAE", "start_date": "2019",
+                    "end_date": "2021", "description": ""}],
+    "experiences": [{"title": "Analyste", "company": "ACME", "start_date": "2021", "end_date": "2024",
+                     "missions": "Reporting", "technical_skills_used": ["SQL"], "soft_skills_used": []}],
+    "interests": ["Échecs"],
+    "summary": "Analyste de données",
+}
+
+
+def test_add_and_list_for_job(tmp_path):
+    repo = CandidateRepository(str(tmp_path / "rh.db"))
+
+    assert repo.add(CANDIDATE) is not None
+    assert repo.add(CANDIDATE) is None
+    assert repo.is_email_processed("m1")
+
+    found = repo.list_for_job("data analyst", start="2025-10-01", end="2025-11-01")
+    assert len(found) == 1
+    assert found[0]["technical_skills"] == ["Python", "SQL"]
+    assert found[0]["languages"] == [{"language": "Anglais", "level": "C1"}]
+    assert found[0]["experiences"][0]["technical_skills_used"] == ["SQL"]
+    assert found[0]["interests"] == ["Échecs"]
+    assert repo.list_for_job("Data Analyst", start="2025-11-01") == []
+
+
+def test_import_json_folder(tmp_path):
+    other = dict(CANDIDATE, cv_id="CAND-002", source_email_id="m2")
+    (tmp_path / "candidates_data_analyst_20251014.json").write_text(
+        json.dumps([CANDIDATE, other]), encoding="utf-8"
+    )
+    repo = CandidateRepository(str(tmp_path / "rh.db"))
+
+    assert repo.import_json_folder(str(tmp_path)) == 2
+    assert repo.import_json_folder(str(tmp_path)) == 0
+
+
+def test_search_skills_and_experiences(tmp_path):
+    repo = CandidateRepository(str(tmp_path / "rh.db"))
+    repo.add(CANDIDATE)
+    spark = dict(CANDIDATE, cv_id="CAND-002", source_email_id="m2", full_name="Marie Curie",
+                 technical_skills=["Spark", "Python"], summary="Ingénieure big data")
+    repo.add(spark)
+
+    assert {c["full_name"] for c in repo.search("python")} == {"Jean Dupont", "Marie Curie"}
+    found = repo.search("spark ingenieure")
+    assert [c["cv_id"] for c in found] == ["CAND-002"]
+    assert found[0]["score"] < 0
+    assert [c["cv_id"] for c in repo.search("acme reporting")] == ["CAND-001", "CAND-002"]
+    assert repo.search("spark", job_title="Data Engineer") == []
+
+    with repo._connect() as conn:
+        conn.execute("DELETE FROM candidates WHERE cv_id = 'CAND-002'")
+    assert repo.search("spark") == []
+
+
+def test_reimport_without_source_email_is_ignored(tmp_path):
+    imported = {key: value for key, value in CANDIDATE.items() if key != "source_email_id"}
+    (tmp_path / "candidates_data_analyst_20251014.json").write_text(json.dumps([imported]), encoding="utf-8")
+    repo = CandidateRepository(str(tmp_path / "rh.db"))
+
+    assert repo.import_json_folder(str(tmp_path)) == 1
+    assert repo.import_json_folder(str(tmp_path)) == 0
+    assert len(repo.list_for_job("Data Analyst")) == 1
+
+
+
+def test_same_cv_id_in_two_files_without_source_email(tmp_path):
+    imported = {key: value for key, value in CANDIDATE.items() if key != "source_email_id"}
+    (tmp_path / "candidates_data_analyst_20251014.json").write_text(json.dumps([imported]), encoding="utf-8")
+    other = dict(imported, job_applied_for="Comptable", full_name="Paul Martin")
+    (tmp_path / "candidates_comptable_20251014.json").write_text(json.dumps([other]), encoding="utf-8")
+    repo = CandidateRepository(str(tmp_path / "rh.db"))
+
+    assert repo.import_json_folder(str(tmp_path)) == 2
+    assert repo.import_json_folder(str(tmp_path)) == 0
+    assert [c["full_name"] for c in repo.list_for_job("Comptable")] == ["Paul Martin"]
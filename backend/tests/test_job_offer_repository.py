@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+
+import pytest
+
+from models.job_offer import JobOffer
+from service_database import JobOfferRepository, close_pools, get_pool
+
+
+def _offer(n, **kwargs):
+    return JobOffer(title=f"Offre {n}", department="Data", description=f"Description {n}", **kwargs)
+
+
+def test_add_many_and_update_many_in_one_transaction(tmp_path):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+
+    offers = [_offer(n) for n in range(50)]
+    ids = repo.add_many(offers)
+    assert len(ids) == 50 and offers[0].id is not None
+    assert len(repo.list()) == 50
+
+    for offer in offers[:10]:
+        offer.status = 0
+    assert repo.update_many(offers[:10]) == 10
+    assert sum(1 for offer in repo.list() if offer.status == 0) == 10
+
+
+def test_add_many_rolls_back_on_error(tmp_path):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.add_many([_offer(1), JobOffer(title=None, department="Data", description="x")])
+    assert repo.list() == []
+
+
+def test_update_writes_file_path(tmp_path):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+    offer = _offer(1)
+    repo.add(offer)
+
+    offer.file_path = "/offres/annonce.pdf"
+    assert repo.update(offer)
+    with repo._pool.connection() as conn:
+        row = conn.execute("SELECT file_path, updated_at FROM job_offers WHERE id = ?", (offer.id,)).fetchone()
+    assert row["file_path"] == "/offres/annonce.pdf" and row["updated_at"] is not None
+
+
+def test_repositories_share_a_wal_pool(tmp_path, capsys):
+    path = str(tmp_path / "rh.db")
+    first = JobOfferRepository(path)
+    second = JobOfferRepository(path)
+    assert capsys.readouterr().out == ""
+    assert first._pool is second._pool is get_pool(path)
+
+    with first._pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    errors = []
+
+    def _add(n):
+        try:
+            first.add_many([_offer(f"{n}-{i}") for i in range(20)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_add, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(second.list()) == 160
+
+
+def test_iter_offers_pages_filters_and_projects(tmp_path):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+    offers = [_offer(n, status=n % 2, location="Paris", file_path=f"/offres/{n}.pdf") for n in range(25)]
+    for offer in offers[:5]:
+        offer.department = "RH"
+    repo.add_many(offers)
+
+    everything = list(repo.iter_offers(page_size=4))
+    assert [o.id for o in everything] == sorted((o.id for o in offers), reverse=True)
+    # columns are read by name, not by position
+    assert everything[-1].file_path == "/offres/0.pdf" and everything[-1].created_at.startswith("20")
+
+    open_data = list(repo.iter_offers(status=1, department="Data", page_size=3))
+    assert {o.title for o in open_data} == {f"Offre {n}" for n in range(5, 25) if n % 2}
+
+    light = next(repo.iter_offers(columns=("title", "status")))
+    assert light.title == "Offre 24" and light.location is None
+    assert light._description is None
+    assert light.description == "Description 24"
+
+
+def test_iter_offers_rejects_unknown_columns(tmp_path):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+    with pytest.raises(ValueError):
+        list(repo.iter_offers(columns=("title; DROP TABLE job_offers",)))
+
+
+def test_job_offer_is_slotted():
+    offer = _offer(1)
+    assert not hasattr(offer, "__dict__")
+    offer.description = "Nouvelle description"
+    assert offer.description == "Nouvelle description"
+
+
+def test_search_ranks_title_matches_and_follows_changes(tmp_path, monkeypatch):
+    repo = JobOfferRepository(str(tmp_path / "rh.db"))
+    in_description = JobOffer(title="Chef de projet", department="IT", description="Équipe de développeurs Python")
+    in_title = JobOffer(title="Développeur Python", department="IT", description="Backend")
+    other = JobOffer(title="Comptable", department="Finance", description="Clôtures mensuelles")
+    repo.add_many([in_description, in_title, other])
+
+    found = repo.search("developpeur* python")
+    assert [offer.id for offer in found] == [in_title.id, in_description.id]
+    assert found[0].description == "Backend"
+    assert repo.search("python", status=0) == []
+    assert repo.search("") == []
+
+    other.title = "Développeur C++"
+    repo.update(other)
+    assert [offer.id for offer in repo.search("c++")] == [other.id]
+    assert repo.search("comptable") == []
+
+    monkeypatch.setattr("builtins.input", lambda prompt: "oui")
+    repo.delete(in_title.id)
+    assert [offer.id for offer in repo.search("python")] == [in_description.id]
+
+
+def test_search_indexes_offers_of_an_existing_database(tmp_path):
+    db_path = str(tmp_path / "rh.db")
+    repo = JobOfferRepository(db_path)
+    repo.add(_offer(1))
+    with get_pool(db_path).connection() as conn:
+        conn.execute("DROP TABLE job_offers_fts")
+    close_pools()
+
+    assert [offer.title for offer in JobOfferRepository(db_path).search("description")] == ["Offre 1"]
+
+
+def test_closed_pool_drops_connections_returned_late(tmp_path):
+    pool = get_pool(str(tmp_path / "rh.db"))
+    with pool.connection() as busy:
+        with pool.connection() as idle:
+            pass
+        close_pools()
+        busy.execute("SELECT 1")
+    assert idle is not busy
+
+    for conn in (idle, busy):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection():
+            pass
+    assert get_pool(str(tmp_path / "rh.db")) is not pool